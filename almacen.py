@@ -0,0 +1,1193 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo con las estructuras de almacenamiento que comparten las
+grillas cuadradas y hexagonales. Las grillas normales guardan cada
+celda, pared y vértice en un diccionario indexado por su posición,
+mientras que las grillas compactas identifican cada elemento con un
+índice entero y solo crean los objetos cuando se los pide. Las clases
+de este módulo permiten que ambas formas de almacenamiento se usen de
+la misma manera desde la grilla. GrillaBase reúne la parte de las
+grillas que no depende de la forma de las celdas.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+from array import array
+from collections import OrderedDict
+from functools import wraps
+from itertools import izip
+
+import capas
+
+try:
+	import numpy
+except ImportError:  # numpy es opcional, solo lo usan las operaciones vectorizadas
+	numpy = None
+
+def requiere_numpy():
+	'''Retorna el módulo numpy. Lanza ImportError si no está instalado,
+	ya que las operaciones vectorizadas no tienen alternativa sin él'''
+	if numpy is None:
+		raise ImportError("Esta operación requiere numpy")
+	return numpy
+
+def plano(arreglo, tipo='l'):
+	'''Retorna un array de la biblioteca estándar con los valores de 
+	un arreglo de numpy, aplanado. Leer valores sueltos de un array 
+	desde python es mucho más rápido que leerlos del arreglo de numpy,
+	por eso se usa en los algoritmos que recorren la grilla elemento 
+	por elemento'''
+	res = array(tipo)
+	res.fromstring(numpy.ascontiguousarray(arreglo, dtype=res.typecode).tobytes())
+	return res
+
+class Coleccion(object):
+	"""Colección de elementos de una grilla que no guarda ningún objeto.
+	Se comporta como el diccionario de posiciones de una grilla normal,
+	pero la existencia de cada elemento se calcula aritméticamente y
+	los objetos se crean en el momento en que se los pide, por lo que
+	cada pedido devuelve una vista nueva del elemento."""
+	def __init__(self, existe, crear, posiciones, cantidad, cache=None):
+		'''Define la colección. Los parámetros son:
+
+		existe     --> función que recibe una posición y devuelve True
+		               si el elemento existe en la grilla
+		crear      --> función que recibe una posición y devuelve el
+		               elemento ya vinculado a la grilla
+		posiciones --> función que devuelve un iterador con todas las
+		               posiciones, ordenadas por índice lineal
+		cantidad   --> cantidad de elementos de la colección
+		cache      --> objeto Cache donde se guardan los elementos ya
+		               creados, o None para crear una vista nueva en
+		               cada pedido'''
+
+		self._existe = existe
+		self._crear = crear
+		self._posiciones = posiciones
+		self._cantidad = cantidad
+		self.cache = cache
+
+	def __getitem__(self, pos):
+		if not self._existe(pos):
+			raise KeyError(pos)
+		return self.obtener(pos)
+
+	def __contains__(self, pos):
+		return self._existe(pos)
+
+	def __len__(self):
+		return self._cantidad
+
+	def __iter__(self):
+		return self._posiciones()
+
+	def get(self, pos, defecto=None):
+		'''Retorna el elemento indicado en pos, o defecto si no existe'''
+		if not self._existe(pos):
+			return defecto
+		return self.obtener(pos)
+
+	def obtener(self, pos):
+		'''Retorna el elemento indicado en pos sin verificar que 
+		exista. Si la colección tiene caché, el elemento se crea solo
+		la primera vez'''
+		if self.cache is None:
+			return self._crear(pos)
+
+		elemento = self.cache.get(pos)
+		if elemento is None:
+			elemento = self._crear(pos)
+			self.cache.poner(pos, elemento)
+		return elemento
+
+	def keys(self):
+		'''Retorna una vista de las posiciones. Permite iterar y
+		verificar pertenencia sin armar una lista'''
+		return _Indices(self)
+
+	def values(self):
+		'''Retorna un iterador con los elementos, ordenados por índice
+		lineal'''
+		return (self.obtener(pos) for pos in self._posiciones())
+
+	def items(self):
+		'''Retorna un iterador con los pares (posición, elemento),
+		ordenados por índice lineal'''
+		return ((pos, self.obtener(pos)) for pos in self._posiciones())
+
+class Cache(object):
+	"""Caché de los elementos ya creados de una colección. Si tiene un
+	máximo, al superarlo se descarta el elemento usado hace más tiempo
+	(LRU); un elemento descartado se vuelve a crear en el próximo 
+	pedido, por lo que pierde los atributos que se le hayan agregado"""
+	def __init__(self, maximo=None):
+		'''Define la caché. maximo es la cantidad máxima de elementos
+		que guarda, o None para no ponerle límite'''
+
+		self.maximo = maximo
+		if maximo is None:
+			self._elementos = {}
+		else:
+			self._elementos = OrderedDict()
+
+	def __len__(self):
+		return len(self._elementos)
+
+	def __contains__(self, clave):
+		return clave in self._elementos
+
+	def get(self, clave):
+		'''Retorna el elemento guardado en clave, o None si no está'''
+		if self.maximo is None:
+			return self._elementos.get(clave)
+
+		elemento = self._elementos.pop(clave, None)
+		if elemento is not None:  # Pasa a ser el último usado
+			self._elementos[clave] = elemento
+		return elemento
+
+	def poner(self, clave, elemento):
+		'''Guarda elemento en clave, descartando el usado hace más 
+		tiempo si se supera el máximo'''
+		self._elementos[clave] = elemento
+		if self.maximo is not None and len(self._elementos) > self.maximo:
+			self._elementos.popitem(last=False)
+
+	def limpiar(self):
+		'''Descarta todos los elementos guardados'''
+		self._elementos.clear()
+
+class Teselas(object):
+	"""Elementos ya creados de una grilla dividida en teselas, bloques
+	de celdas de tamaño fijo. Cada elemento pertenece a la tesela de su
+	celda de referencia, y cada tesela se crea en el primer acceso a
+	alguno de sus elementos. Si tiene un máximo, al superarlo se
+	descarta la tesela usada hace más tiempo (LRU) con todos sus
+	elementos y datos, por lo que la memoria queda acotada por la
+	cantidad de teselas y no por el tamaño de la grilla"""
+	def __init__(self, clave, maximo=None):
+		'''Define las teselas. clave es una función que recibe el tipo
+		de elemento ("celda", "pared" o "vertice") y su posición, y
+		devuelve la clave de la tesela a la que pertenece. maximo es la
+		cantidad máxima de teselas que se conservan, o None para no
+		ponerle límite'''
+
+		self.clave = clave
+		self.maximo = maximo
+		self._teselas = OrderedDict()
+
+	def __len__(self):
+		return len(self._teselas)
+
+	def __contains__(self, clave):
+		return clave in self._teselas
+
+	def __iter__(self):
+		return iter(self._teselas.values())
+
+	def ver(self, clave):
+		'''Retorna la tesela de clave si está cargada, o None si no, sin
+		crearla ni cambiar el orden de uso'''
+		return self._teselas.get(clave)
+
+	def obtener(self, clave):
+		'''Retorna la tesela de clave, creándola si no está. Pasa a
+		ser la última usada'''
+		tesela = self._teselas.pop(clave, None)
+		if tesela is None:
+			tesela = Tesela(clave)
+		self._teselas[clave] = tesela
+		if self.maximo is not None and len(self._teselas) > self.maximo:
+			self._teselas.popitem(last=False)[1].descartar()
+		return tesela
+
+	def cache(self, tipo):
+		'''Retorna una caché para la colección de los elementos de tipo,
+		que los guarda en sus teselas'''
+		return _CacheTeselas(self, tipo)
+
+	def limpiar(self):
+		'''Descarta todas las teselas'''
+		while self._teselas:
+			self._teselas.popitem(last=False)[1].descartar()
+
+class Tesela(object):
+	"""Tesela de una grilla. Guarda los elementos ya creados de cada
+	tipo y los arreglos de las capas que guardan sus datos por tesela.
+	Al descartarla, cada capa recibe su arreglo para poder guardarlo"""
+	__slots__ = ("clave", "elementos", "datos")
+
+	def __init__(self, clave):
+
+		self.clave = clave
+		self.elementos = {"celda": {}, "pared": {}, "vertice": {}}
+		self.datos = {}  # Arreglo de cada capa
+
+	def descartar(self):
+		'''Entrega los datos de la tesela a sus capas y los suelta'''
+		for capa, datos in self.datos.items():
+			capa.descargar(self.clave, datos)
+		self.datos.clear()
+
+class Memo(object):
+	"""Relaciones ya calculadas de los elementos de una grilla. Como la
+	topología de la grilla no cambia, cada relación se calcula una sola
+	vez por elemento y se guarda como Relacion de solo lectura. Cuenta
+	los pedidos que encontraron la relación ya calculada (aciertos) y
+	los que tuvieron que calcularla (fallos)"""
+	def __init__(self):
+
+		self._relaciones = {}
+		self.aciertos = 0
+		self.fallos = 0
+
+	def __len__(self):
+		return len(self._relaciones)
+
+	def __contains__(self, clave):
+		return clave in self._relaciones
+
+	def obtener(self, clave, calcular):
+		'''Retorna la relación guardada en clave. Si no está, la 
+		calcula llamando a calcular sin argumentos y la guarda'''
+		relacion = self._relaciones.get(clave)
+		if relacion is None:
+			self.fallos += 1
+			relacion = self._relaciones[clave] = Relacion(calcular())
+		else:
+			self.aciertos += 1
+		return relacion
+
+	def limpiar(self):
+		'''Descarta todas las relaciones guardadas. Los contadores se
+		conservan'''
+		self._relaciones.clear()
+
+class Relacion(dict):
+	"""Diccionario de solo lectura con el resultado de una relación
+	memorizada. Como se comparte entre todos los que la piden, no se
+	puede modificar"""
+	def _solo_lectura(self, *args, **kwargs):
+		raise TypeError("Las relaciones memorizadas son de solo lectura")
+
+	__setitem__ = __delitem__ = _solo_lectura
+	clear = pop = popitem = setdefault = update = _solo_lectura
+
+	def __reduce__(self):
+		# pickle restaura los diccionarios con __setitem__, que está
+		# bloqueado, por eso se crea a partir de un dict común
+		return (Relacion, (dict(self),))
+
+def memorizada(nombre):
+	'''Decorador para los métodos de relación de los elementos de una
+	grilla. Si la grilla memoriza las relaciones, el resultado se toma
+	de su Memo con la clave (nombre, posición del elemento); si no, el
+	método se ejecuta normalmente'''
+	def decorador(metodo):
+		@wraps(metodo)
+		def memorizado(self):
+			memo = self.grilla._memo
+			if memo is None:
+				return metodo(self)
+			return memo.obtener((nombre, self._pos), lambda: metodo(self))
+		return memorizado
+	return decorador
+
+class _CacheTeselas(object):
+	"""Caché de una colección que guarda los elementos en las teselas.
+	Tiene la interfaz de Cache, con el límite puesto en las teselas"""
+	def __init__(self, teselas, tipo):
+
+		self._teselas = teselas
+		self._tipo = tipo
+
+	def __len__(self):
+		return sum(len(tesela.elementos[self._tipo]) for tesela in self._teselas)
+
+	def __contains__(self, pos):
+		# Solo mira las teselas cargadas, sin crearlas ni cambiar el
+		# orden de uso, por lo que no descarta ni lee teselas
+		tesela = self._teselas.ver(self._teselas.clave(self._tipo, pos))
+		return tesela is not None and pos in tesela.elementos[self._tipo]
+
+	def get(self, pos):
+		'''Retorna el elemento guardado en pos, o None si no está'''
+		return self._teselas.obtener(self._teselas.clave(self._tipo, pos)).elementos[self._tipo].get(pos)
+
+	def poner(self, pos, elemento):
+		'''Guarda elemento en su tesela'''
+		self._teselas.obtener(self._teselas.clave(self._tipo, pos)).elementos[self._tipo][pos] = elemento
+
+	def limpiar(self):
+		'''Descarta todas las teselas, con los elementos de todos los
+		tipos'''
+		self._teselas.limpiar()
+
+class _Indices(object):
+	"""Vista de las posiciones de una colección. La pertenencia se
+	resuelve en tiempo constante"""
+	def __init__(self, coleccion):
+
+		self._coleccion = coleccion
+
+	def __contains__(self, pos):
+		return self._coleccion._existe(pos)
+
+	def __len__(self):
+		return self._coleccion._cantidad
+
+	def __iter__(self):
+		return self._coleccion._posiciones()
+
+class TablaCSR(object):
+	"""Tabla de adyacencia en formato CSR (compressed sparse row). 
+	Guarda, para cada índice lineal de un tipo de elemento, los índices
+	lineales de los elementos relacionados. Todas las filas tienen un
+	lugar por cada posición relativa, en el orden de claves: el
+	elemento de la fila i en la posición relativa de lugar k está en
+	indices[inicio[i] + k], y vale -1 si no existe (bordes), por lo que
+	cada consulta se resuelve sin recorrer la fila."""
+	def __init__(self, claves, cantidad, relacionados):
+		'''Construye la tabla. Los parámetros son:
+
+		claves       --> tupla con las posiciones relativas de la 
+		                 relación, en el orden en que se numeran
+		cantidad     --> cantidad de filas de la tabla
+		relacionados --> función que recibe un índice y devuelve la 
+		                 secuencia de índices relacionados en el orden
+		                 de claves, con None para los que no existen'''
+
+		self.claves = claves
+		self.ancho = len(claves)
+		self._lugar = dict((clave, k) for k, clave in enumerate(claves))
+
+		self.inicio = array('l', xrange(0, (cantidad + 1) * self.ancho, self.ancho))
+		self.indices = array('l', [-1]) * (cantidad * self.ancho)
+
+		for i in xrange(cantidad):
+			k = self.inicio[i]
+			for j in relacionados(i):
+				if j is not None:
+					self.indices[k] = j
+				k += 1
+
+	@classmethod
+	def desde_arreglos(cls, claves, inicio, indices):
+		'''Retorna una tabla que usa directamente los arreglos inicio e
+		indices ya construidos, sin copiarlos. Sirve para tablas
+		guardadas en memoria compartida'''
+		tabla = cls.__new__(cls)
+		tabla.claves = claves
+		tabla.ancho = len(claves)
+		tabla._lugar = dict((clave, k) for k, clave in enumerate(claves))
+		tabla.inicio = inicio
+		tabla.indices = indices
+		return tabla
+
+	def __len__(self):
+		return len(self.inicio) - 1
+
+	def fila(self, i):
+		'''Retorna un arreglo con los índices relacionados con i, en el
+		orden de claves y con -1 para los que no existen'''
+		return self.indices[self.inicio[i]:self.inicio[i+1]]
+
+	def relacion(self, i, obtener):
+		'''Retorna un diccionario con los elementos relacionados con i.
+		La clave es la posición relativa y el valor el elemento que 
+		devuelve obtener a partir de su índice, o None si no existe'''
+		k = self.inicio[i]
+		res = {}
+		for clave, j in izip(self.claves, self.indices[k:k + self.ancho]):
+			res[clave] = obtener(j) if j >= 0 else None
+		return res
+
+	def relacionado(self, i, clave, obtener):
+		'''Retorna el elemento relacionado con i en la posición 
+		relativa clave, o None si no existe'''
+		lugar = self._lugar.get(clave)
+		if lugar is None:
+			raise KeyError("Posición relativa desconocida: " + str(clave))
+		j = self.indices[self.inicio[i] + lugar]
+		return obtener(j) if j >= 0 else None
+
+class Bits(object):
+	"""Conjunto de bits empaquetados, ocho por byte, indexado por índice
+	lineal. Sirve para guardar un estado booleano de cada elemento de
+	una grilla ocupando un bit por elemento. Los bits sueltos se leen y
+	escriben desde python sobre un bytearray, y las operaciones sobre
+	muchos bits a la vez (requieren numpy) trabajan sobre una vista de
+	numpy del mismo bytearray. Dentro de cada byte el primer bit es el
+	más significativo, como en numpy.packbits"""
+	def __init__(self, cantidad, valor=False):
+		'''Crea el conjunto con cantidad bits, todos en valor'''
+		self._cantidad = cantidad
+		self._bytes = bytearray((cantidad + 7) // 8)
+		if valor:
+			self.llenar(True)
+
+	@classmethod
+	def desde_arreglo(cls, arreglo):
+		'''Retorna un conjunto con un bit por cada elemento del arreglo
+		de numpy arreglo, encendido si el elemento es distinto de cero'''
+		numpy = requiere_numpy()
+		bits = cls(len(arreglo))
+		bits._bytes[:] = numpy.packbits(numpy.asarray(arreglo) != 0).tobytes()
+		return bits
+
+	def __len__(self):
+		return self._cantidad
+
+	def __getitem__(self, i):
+		'''Indica si el bit i está encendido'''
+		if not 0 <= i < self._cantidad:
+			raise IndexError(i)
+		return bool(self._bytes[i >> 3] & (128 >> (i & 7)))
+
+	def __setitem__(self, i, valor):
+		'''Enciende el bit i si valor es verdadero, o lo apaga si no'''
+		if not 0 <= i < self._cantidad:
+			raise IndexError(i)
+		if valor:
+			self._bytes[i >> 3] |= 128 >> (i & 7)
+		else:
+			self._bytes[i >> 3] &= ~(128 >> (i & 7)) & 255
+
+	def __contains__(self, i):
+		return 0 <= i < self._cantidad and bool(self._bytes[i >> 3] & (128 >> (i & 7)))
+
+	def __iter__(self):
+		'''Recorre los índices de los bits encendidos, en orden'''
+		return iter(self.indices().tolist())
+
+	def __eq__(self, otro):
+		return isinstance(otro, Bits) and self._cantidad == otro._cantidad and self._bytes == otro._bytes
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	__hash__ = None
+
+	def __repr__(self):
+		return "Bits(%d, %d encendidos)" % (self._cantidad, self.contar())
+
+	def arreglo(self):
+		'''Retorna una vista de numpy de los bytes del conjunto, que
+		comparte la memoria con él'''
+		return requiere_numpy().frombuffer(self._bytes, dtype="uint8")
+
+	def desempaquetar(self, inicio=0, fin=None):
+		'''Retorna un arreglo de numpy de valores booleanos con los bits
+		inicio a fin-1'''
+		numpy = requiere_numpy()
+		inicio, fin = self._rango(inicio, fin)
+		corrido = inicio & 7
+		bytes_ = self.arreglo()[inicio >> 3:(fin + 7) >> 3]
+		return numpy.unpackbits(bytes_)[corrido:corrido + fin - inicio].view(bool)
+
+	def copia(self):
+		'''Retorna un conjunto nuevo con los mismos bits'''
+		res = Bits(0)
+		res._cantidad = self._cantidad
+		res._bytes = bytearray(self._bytes)
+		return res
+
+	def llenar(self, valor):
+		'''Enciende todos los bits si valor es verdadero, o los apaga si
+		no'''
+		self._bytes[:] = (b"\xff" if valor else b"\x00") * len(self._bytes)
+		self._limpiar_sobrantes()
+
+	def poner(self, indices):
+		'''Enciende los bits de la secuencia o arreglo de índices'''
+		bytes_, mascaras = self._mascaras(indices, "bitwise_or")
+		self.arreglo()[bytes_] |= mascaras
+
+	def quitar(self, indices):
+		'''Apaga los bits de la secuencia o arreglo de índices'''
+		bytes_, mascaras = self._mascaras(indices, "bitwise_or")
+		self.arreglo()[bytes_] &= ~mascaras
+
+	def invertir(self, indices=None):
+		'''Invierte los bits de la secuencia o arreglo de índices, o
+		todos si es None. Un índice repetido se invierte una vez por
+		cada aparición'''
+		if indices is None:
+			datos = self.arreglo()
+			datos ^= 255
+			self._limpiar_sobrantes()
+			return
+		bytes_, mascaras = self._mascaras(indices, "bitwise_xor")
+		self.arreglo()[bytes_] ^= mascaras
+
+	def probar(self, indices):
+		'''Retorna un arreglo de numpy de valores booleanos que indica
+		si está encendido cada bit de la secuencia o arreglo de índices'''
+		indices = self._verificar(indices)
+		return (self.arreglo()[indices >> 3] & (128 >> (indices & 7))) != 0
+
+	def contar(self, inicio=0, fin=None):
+		'''Retorna la cantidad de bits encendidos entre inicio y fin-1'''
+		numpy = requiere_numpy()
+		inicio, fin = self._rango(inicio, fin)
+		if inicio == 0 and fin == self._cantidad:  # Los sobrantes están apagados
+			return int(numpy.count_nonzero(numpy.unpackbits(self.arreglo())))
+		return int(numpy.count_nonzero(self.desempaquetar(inicio, fin)))
+
+	def indices(self, inicio=0, fin=None):
+		'''Retorna un arreglo de numpy con los índices de los bits
+		encendidos entre inicio y fin-1, en orden'''
+		numpy = requiere_numpy()
+		inicio, fin = self._rango(inicio, fin)
+		return numpy.flatnonzero(self.desempaquetar(inicio, fin)) + inicio
+
+	def _operar(self, otro, operacion, nuevo):
+		'''Aplica la operación de numpy entre los bytes del conjunto y
+		los de otro, dejando el resultado en un conjunto nuevo o en
+		este'''
+		if not isinstance(otro, Bits):
+			return NotImplemented
+		if otro._cantidad != self._cantidad:
+			raise ValueError("Los conjuntos de bits tienen distinta cantidad de bits")
+		res = self.copia() if nuevo else self
+		operacion(res.arreglo(), otro.arreglo(), out=res.arreglo())
+		return res
+
+	def __and__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_and, True)
+
+	def __or__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_or, True)
+
+	def __xor__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_xor, True)
+
+	def __sub__(self, otro):
+		return self & ~otro
+
+	def __invert__(self):
+		res = self.copia()
+		res.invertir()
+		return res
+
+	def __iand__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_and, False)
+
+	def __ior__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_or, False)
+
+	def __ixor__(self, otro):
+		return self._operar(otro, requiere_numpy().bitwise_xor, False)
+
+	def __isub__(self, otro):
+		if not isinstance(otro, Bits):
+			return NotImplemented
+		self &= ~otro
+		return self
+
+	def _rango(self, inicio, fin):
+		'''Verifica y retorna el rango de bits inicio a fin-1'''
+		if fin is None:
+			fin = self._cantidad
+		if not 0 <= inicio <= fin <= self._cantidad:
+			raise IndexError((inicio, fin))
+		return inicio, fin
+
+	def _verificar(self, indices):
+		'''Retorna indices como arreglo de numpy de enteros, verificando
+		que estén dentro del conjunto'''
+		numpy = requiere_numpy()
+		indices = numpy.asarray(indices, dtype=numpy.intp).ravel()
+		if len(indices) and (indices.min() < 0 or indices.max() >= self._cantidad):
+			raise IndexError("Índice fuera del conjunto de bits")
+		return indices
+
+	def _mascaras(self, indices, combinar):
+		'''Retorna los bytes que tocan los índices, sin repetir, y la
+		máscara de bits de cada uno, combinando con la función de numpy
+		combinar las máscaras de los índices del mismo byte'''
+		numpy = requiere_numpy()
+		indices = numpy.sort(self._verificar(indices))
+		bytes_ = indices >> 3
+		mascaras = (128 >> (indices & 7)).astype("uint8")
+		if len(indices) < 2:
+			return bytes_, mascaras
+
+		# Los índices ordenados dejan juntos los del mismo byte, y se
+		# reducen sus máscaras de una vez
+		inicios = numpy.flatnonzero(numpy.concatenate(([True], bytes_[1:] != bytes_[:-1])))
+		return bytes_[inicios], getattr(numpy, combinar).reduceat(mascaras, inicios)
+
+	def _limpiar_sobrantes(self):
+		'''Apaga los bits del último byte que no pertenecen al conjunto'''
+		sobrantes = -self._cantidad & 7
+		if sobrantes:
+			self._bytes[-1] &= (255 << sobrantes) & 255
+
+
+def elemento(grilla, tipo, pos):
+	'''Retorna el elemento de grilla del tipo ("celda", "pared" o
+	"vertice") y la posición indicados. Se usa al restaurar con pickle
+	los elementos sueltos'''
+	return getattr(grilla, "get_" + tipo)(pos)
+
+def vincular(clase, atributo, grilla):
+	'''Retorna una subclase de clase cuyos objetos pertenecen a
+	grilla. La grilla se guarda una sola vez, en el atributo de clase
+	indicado, y la subclase no agrega atributos a los objetos'''
+	return type(clase.__name__, (clase,), {"__slots__": (), atributo: grilla})
+
+class GrillaBase(object):
+	'''Parte común de las grillas cuadradas y hexagonales: el
+	almacenamiento de los elementos, los índices lineales de las
+	celdas, las tablas de adyacencia, las capas de datos y las
+	teselas. Las subclases (cuad.Grilla y exa.Grilla) definen la
+	existencia y la numeración de paredes y vértices, y además:
+	_elementos, las clases de los elementos; _relaciones, las
+	relaciones entre ellos; _cantidades, las cantidades de paredes y
+	vértices; _nueva_plantilla, la grilla que numera los elementos
+	de cada tesela, y _celda_de y _trasladar, la celda de referencia
+	de cada elemento'''
+
+	# Clases de los elementos. Una subclase de Grilla puede reemplazarlas
+	# por subclases de _Celda, _Pared y _Vertice, por ejemplo para
+	# agregarles propiedades gráficas
+	clase_celda = None
+	clase_pared = None
+	clase_vertice = None
+
+	def __init__(self, filas, columnas, compacta=False, lazy=False, cache=None, memorizar=False, tesela=None, directorio=None):
+		'''Grilla de filas por columnas celdas
+		Si compacta es True la grilla no crea ningún objeto: cada
+		celda, pared y vértice se identifica con un índice lineal y
+		los objetos se crean recién cuando se los pide, como vistas
+		livianas que no guardan estado propio.
+		Si lazy es True la grilla también es compacta, pero cada
+		objeto se crea solo en el primer acceso y se conserva para
+		los siguientes, por lo que la memoria usada es proporcional a
+		la parte de la grilla que se visitó. cache es la cantidad
+		máxima de objetos de cada tipo que se conservan (se descartan
+		los usados hace más tiempo), o None para conservarlos todos.
+		Si memorizar es True cada relación de cada elemento (paredes,
+		vecinas, vértices, etc.) se calcula solo la primera vez que se
+		la pide, y se devuelve siempre el mismo diccionario, de solo
+		lectura.
+		Si tesela es un entero o una tupla (alto, ancho) la grilla es
+		lazy y está dividida en teselas de ese tamaño: los objetos se
+		guardan en la tesela de su celda y cada tesela se crea en el
+		primer acceso a uno de sus elementos. cache es entonces la
+		cantidad máxima de teselas que se conservan, y al superarla se
+		descarta la usada hace más tiempo con todos sus objetos. Las
+		capas que se agregan sin archivo guardan sus valores por
+		tesela (ver capas.CapaTeselada); si se indica directorio, los
+		valores de cada tesela descartada se guardan en él y se vuelven
+		a cargar en el próximo acceso.'''
+		self._filas = filas
+		self._columnas = columnas
+		self._compacta = compacta or lazy or tesela is not None
+		self._lazy = lazy or tesela is not None
+		self._maximo_cache = cache
+		self._adyacencias = {}  # Tablas de adyacencia por nombre
+		self._listas = None  # Elementos ordenados por índice lineal
+		# Funciones con las que las tablas de adyacencia obtienen la
+		# celda, pared o vértice de un índice lineal
+		self._por_indice = (self._celda_indice, self._pared_indice, self._vertice_indice)
+		self._capas = {}  # Capas de datos por nombre
+		self._memo = Memo() if memorizar else None  # Relaciones ya calculadas
+		self._directorio = directorio  # Donde se guardan los datos de las teselas
+
+		self._tesela = None
+		self._teselas = None
+		if tesela is not None:
+			self._tesela = (tesela, tesela) if isinstance(tesela, int) else tuple(tesela)
+			if len(self._tesela) != 2 or min(self._tesela) < 1:
+				raise ValueError("Tamaño de tesela inválido: " + str(tesela))
+			self._teselas = Teselas(self._clave_tesela, cache)
+			# Grilla del tamaño de una tesela, que numera los elementos
+			# dentro de cada tesela
+			self._plantilla = self._nueva_plantilla(self._tesela[0], self._tesela[1])
+
+		# Cada grilla crea sus elementos con subclases propias, que
+		# guardan la referencia a la grilla como atributo de clase en
+		# lugar de repetirla en cada objeto
+		celda, pared, vertice = self._elementos()
+		self._clase_celda = vincular(self.clase_celda or celda, "_Celda__grid", self)
+		self._clase_pared = vincular(self.clase_pared or pared, "_Pared__grid", self)
+		self._clase_vertice = vincular(self.clase_vertice or vertice, "_Vertice__grid", self)
+
+		if self._compacta:
+			# La existencia de cada elemento se calcula a partir de
+			# las dimensiones, por lo que no hace falta recorrer la
+			# grilla
+			self._celdas = Coleccion(self.existe_celda, self._crear_celda, self._posiciones_celdas, filas*columnas, self._nueva_cache(cache, "celda"))
+			cant_paredes, cant_vertices = self._cantidades() if filas and columnas else (0, 0)
+			self._paredes = Coleccion(self.existe_pared, self._crear_pared, self._posiciones_paredes, cant_paredes, self._nueva_cache(cache, "pared"))
+			self._vertices = Coleccion(self.existe_vertice, self._crear_vertice, self._posiciones_vertices, cant_vertices, self._nueva_cache(cache, "vertice"))
+			return
+
+		self._celdas = {}
+		self._paredes = {}
+		self._vertices = {}
+
+		# Cada elemento se crea una sola vez, recorriendo sus
+		# posiciones en el orden del índice lineal. La posición es la
+		# misma tupla en la clave del diccionario y en el elemento
+		for pos in self._posiciones_celdas():
+			self._celdas[pos] = self._clase_celda(pos)
+		for pos in self._posiciones_paredes():
+			self._paredes[pos] = self._clase_pared(pos)
+		for pos in self._posiciones_vertices():
+			self._vertices[pos] = self._clase_vertice(pos)
+
+	@property
+	def cant_filas(self):
+		'''Cantidad de filas de la grilla. Solo lectura.'''
+		return self._filas
+
+	@property
+	def cant_columnas(self):
+		'''Cantidad de columnas de la grilla. Solo lectura.'''
+		return self._columnas
+
+	@property
+	def cant_celdas(self):
+		'''Cantidad de celdas de la grilla. Solo lectura.'''
+		return len(self._celdas)
+
+	@property
+	def cant_paredes(self):
+		'''Cantidad de paredes de la grilla. Solo lectura.'''
+		return len(self._paredes)
+
+	@property
+	def cant_vertices(self):
+		'''Cantidad de vértices de la grilla. Solo lectura.'''
+		return len(self._vertices)
+
+	@property
+	def compacta(self):
+		'''Indica si la grilla usa almacenamiento compacto. Solo 
+		lectura.'''
+		return self._compacta
+
+	@property
+	def lazy(self):
+		'''Indica si la grilla crea sus objetos recién en el primer
+		acceso. Solo lectura.'''
+		return self._lazy
+
+	@property
+	def tesela(self):
+		'''Tamaño (alto, ancho) de las teselas, o None si la grilla no
+		está dividida en teselas. Solo lectura.'''
+		return self._tesela
+
+	@property
+	def teselas(self):
+		'''Objeto Teselas con las teselas cargadas, o None si
+		la grilla no está dividida en teselas. Solo lectura.'''
+		return self._teselas
+
+	@property
+	def directorio(self):
+		'''Directorio donde se guardan los datos de las teselas
+		descartadas, o None si no se guardan. Solo lectura.'''
+		return self._directorio
+	@property
+	def rango_celdas(self):
+		'''Cantidad de índices lineales de celdas. Solo lectura.'''
+		return self._filas*self._columnas
+
+	def __getitem__(self, pos):
+		'''Retorna la celda indicada en pos'''
+		return self._celdas[pos]
+
+	def __len__(self):
+		'''Cantidad de celdas de la grilla'''
+		return self.cant_celdas
+
+	def __getstate__(self):
+		'''Estado de la grilla para pickle. Se guardan las dimensiones,
+		las opciones, los nombres de las tablas de adyacencia y las 
+		capas de datos, pero no los elementos, que se vuelven a crear
+		al restaurar la grilla. Los atributos que se hayan agregado a 
+		los elementos no se conservan. De las capas mapeadas en 
+		memoria se guarda solo el archivo, que se vuelve a mapear al
+		restaurar la grilla. De las capas por tesela se guardan las
+		teselas cargadas en el directorio de la grilla, y sus valores
+		se conservan solo si lo tiene. De las capas de bits se guardan
+		los bytes empaquetados'''
+		for capa in self._capas.values():
+			if isinstance(capa, capas.CapaTeselada):
+				capa.sincronizar()
+		return {
+			"filas": self._filas,
+			"columnas": self._columnas,
+			"compacta": self._compacta,
+			"lazy": self._lazy,
+			"cache": self._maximo_cache,
+			"memorizar": self._memo is not None,
+			"tesela": self._tesela,
+			"directorio": self._directorio,
+			"adyacencias": sorted(self._adyacencias),
+			"capas": [(capa.nombre, capa.tipo, capa.datos) for capa in self._capas.values() if isinstance(capa, capas.Capa) and capa.archivo is None],
+			"mapeadas": [(capa.nombre, capa.tipo, capa.dtype.str, capa.archivo, capa.modo, capa.desplazamiento) for capa in self._capas.values() if isinstance(capa, capas.Capa) and capa.archivo is not None],
+			"teseladas": [(capa.nombre, capa.tipo, capa.dtype.str, capa.valor) for capa in self._capas.values() if isinstance(capa, capas.CapaTeselada)],
+			"bits": [(capa.nombre, capa.tipo, bytes(capa.bits._bytes)) for capa in self._capas.values() if isinstance(capa, capas.CapaBits)],
+		}
+
+	def __setstate__(self, estado):
+		'''Restaura la grilla a partir del estado de __getstate__'''
+		GrillaBase.__init__(self, estado["filas"], estado["columnas"], estado["compacta"], estado["lazy"], estado["cache"], estado["memorizar"], estado.get("tesela"), estado.get("directorio"))
+		if estado["adyacencias"]:
+			self.construir_adyacencias(estado["adyacencias"])
+		for nombre, tipo, datos in estado["capas"]:
+			self.agregar_capa(nombre, tipo, datos.dtype).datos[:] = datos
+		for nombre, tipo, dtype, archivo, modo, desplazamiento in estado.get("mapeadas", ()):
+			# El archivo ya existe, no se debe volver a crear
+			self.agregar_capa(nombre, tipo, dtype, archivo=archivo, modo="r+" if modo == "w+" else modo, desplazamiento=desplazamiento)
+		for nombre, tipo, dtype, valor in estado.get("teseladas", ()):
+			self.agregar_capa(nombre, tipo, dtype, valor)
+		for nombre, tipo, datos in estado.get("bits", ()):
+			self.agregar_bits(nombre, tipo).bits._bytes[:] = datos
+	def get_celda(self, pos):
+		'''Retorna la celda indicada en pos'''
+		return self._celdas[pos]
+
+	def get_pared(self, pos):
+		'''Retorna la pared indicada en pos'''
+		return self._paredes[pos]
+
+	def get_vertice(self, pos):
+		'''Retorna el vertice indicado en pos'''
+		return self._vertices[pos]
+
+	def get_celda_indice(self, indice):
+		'''Retorna la celda con índice lineal indice'''
+		return self.get_celda(self.posicion_celda(indice))
+
+	def get_pared_indice(self, indice):
+		'''Retorna la pared con índice lineal indice'''
+		return self.get_pared(self.posicion_pared(indice))
+
+	def get_vertice_indice(self, indice):
+		'''Retorna el vértice con índice lineal indice'''
+		return self.get_vertice(self.posicion_vertice(indice))
+
+	def get_columna(self, numCol):
+		'''Retorna una lista con las celdas que pertenecen a la 
+		columna numCol, ordenadas por fila'''
+		if not 0 <= numCol < self.cant_columnas:
+			return []
+		return [self._celdas[(f, numCol)] for f in xrange(self.cant_filas)]
+
+	def get_fila(self, numFil):
+		'''Retorna una lista con las celdas que pertenecen a la fila
+		numFil, ordenadas por columna'''
+		if not 0 <= numFil < self.cant_filas:
+			return []
+		return [self._celdas[(numFil, c)] for c in xrange(self.cant_columnas)]
+
+	def get_paredes_columna(self, numCol):
+		'''Retorna una lista con las paredes de las celdas de la 
+		columna numCol, ordenadas por índice lineal'''
+		if not 0 <= numCol < self.cant_columnas:
+			return []
+		return self._paredes_de((f, numCol) for f in xrange(self.cant_filas))
+
+	def get_paredes_fila(self, numFil):
+		'''Retorna una lista con las paredes de las celdas de la fila
+		numFil, ordenadas por índice lineal'''
+		if not 0 <= numFil < self.cant_filas:
+			return []
+		return self._paredes_de((numFil, c) for c in xrange(self.cant_columnas))
+
+	def get_vertices_columna(self, numCol):
+		'''Retorna una lista con los vértices de las celdas de la 
+		columna numCol, ordenados por índice lineal'''
+		if not 0 <= numCol < self.cant_columnas:
+			return []
+		return self._vertices_de((f, numCol) for f in xrange(self.cant_filas))
+
+	def get_vertices_fila(self, numFil):
+		'''Retorna una lista con los vértices de las celdas de la 
+		fila numFil, ordenados por índice lineal'''
+		if not 0 <= numFil < self.cant_filas:
+			return []
+		return self._vertices_de((numFil, c) for c in xrange(self.cant_columnas))
+
+	def get_region(self, f0, c0, f1, c1):
+		'''Retorna un iterador con las celdas de las filas f0 a f1-1
+		y las columnas c0 a c1-1, recorridas por filas. Los límites 
+		que quedan fuera de la grilla se recortan, y cada celda se 
+		obtiene recién cuando se la pide'''
+		f0, c0 = max(f0, 0), max(c0, 0)
+		f1, c1 = min(f1, self.cant_filas), min(c1, self.cant_columnas)
+		for f in xrange(f0, f1):
+			for c in xrange(c0, c1):
+				yield self._celdas[(f, c)]
+
+	def index_celdas(self):
+		'''Retorna una lista con todos los indices de las celdas de 
+		la grilla'''
+		return self._celdas.keys()
+
+	def index_paredes(self):
+		'''Retorna una lista con todos los indices de las paredes de 
+		la grilla'''
+		return self._paredes.keys()
+
+	def index_vertices(self):
+		'''Retorna una lista con todos los indices de los vértices de 
+		la grilla'''
+		return self._vertices.keys()
+
+	def agregar_capa(self, nombre, tipo="celda", dtype="float64", valor=0, archivo=None, modo=None, desplazamiento=0):
+		'''Agrega a la grilla una capa de datos llamada nombre y la 
+		retorna. La capa guarda un valor por cada elemento del tipo
+		indicado ("celda", "pared" o "vertice") en un arreglo contiguo
+		de numpy con tipo de dato dtype, inicializado en valor. Si se 
+		indica archivo, los valores se guardan en un archivo mapeado
+		en memoria abierto en modo, a partir del byte desplazamiento.
+		Ver capas.Capa. Si la grilla está dividida en teselas y no se
+		indica archivo, la capa guarda sus valores por tesela (ver
+		capas.CapaTeselada). Requiere numpy.'''
+		if nombre in self._capas:
+			raise ValueError("Ya existe la capa " + str(nombre))
+		if self._teselas is not None and archivo is None:
+			capa = capas.CapaTeselada(self, nombre, tipo, dtype, valor)
+		else:
+			capa = capas.Capa(self, nombre, tipo, dtype, valor, archivo, modo, desplazamiento)
+		self._capas[nombre] = capa
+		return capa
+
+	def agregar_bits(self, nombre, tipo="pared", valor=False):
+		'''Agrega a la grilla una capa de bits llamada nombre y la
+		retorna. La capa guarda un valor booleano por cada elemento del
+		tipo indicado, empaquetado en un bit e inicializado en valor.
+		Ver capas.CapaBits. Las grillas divididas en teselas no admiten
+		capas de bits. Requiere numpy para las operaciones sobre muchos
+		elementos.'''
+		if nombre in self._capas:
+			raise ValueError("Ya existe la capa " + str(nombre))
+		if self._teselas is not None:
+			raise ValueError("Las grillas divididas en teselas no admiten capas de bits")
+		capa = capas.CapaBits(self, nombre, tipo, valor)
+		self._capas[nombre] = capa
+		return capa
+
+	def get_capa(self, nombre):
+		'''Retorna la capa de datos llamada nombre'''
+		return self._capas[nombre]
+
+	def quitar_capa(self, nombre):
+		'''Quita de la grilla la capa de datos llamada nombre'''
+		del self._capas[nombre]
+
+	def index_capas(self):
+		'''Retorna una lista con los nombres de las capas de datos de
+		la grilla'''
+		return self._capas.keys()
+	def existe_celda(self, pos):
+		'''Indica si la celda indicada en pos pertenece a la grilla'''
+		try:
+			f, c = pos
+		except (TypeError, ValueError):
+			return False
+		return 0 <= f < self._filas and 0 <= c < self._columnas
+
+	def indice_celda(self, pos):
+		'''Retorna el índice lineal de la celda indicada en pos. Las
+		celdas se numeran por filas'''
+		if not self.existe_celda(pos):
+			raise KeyError(pos)
+		return self._indice_celda(pos)
+
+	def posicion_celda(self, indice):
+		'''Retorna la posición de la celda con índice lineal indice'''
+		if not 0 <= indice < self.rango_celdas:
+			raise KeyError(indice)
+		return self._posicion_celda(indice)
+
+	def _indice_celda(self, pos):
+		'''Índice lineal de la celda pos, sin verificar que exista'''
+		return pos[0]*self._columnas + pos[1]
+
+	def _posicion_celda(self, indice):
+		'''Posición de la celda indice, sin verificar que exista'''
+		return divmod(indice, self._columnas)
+
+	def adyacencia(self, nombre):
+		'''Retorna la tabla de adyacencia indicada en nombre, o None 
+		si todavía no fue construida'''
+		return self._adyacencias.get(nombre)
+
+	def construir_adyacencias(self, relaciones=None):
+		'''Construye las tablas de adyacencia de la grilla en formato
+		CSR (ver TablaCSR). Una vez construida una tabla, los 
+		métodos de celdas, paredes y vértices que calculan esa 
+		relación la leen de la tabla en lugar de recalcularla en 
+		cada pedido. relaciones es una lista con los nombres de las 
+		tablas a construir, o None para construirlas todas. Las 
+		tablas que ya existen no se vuelven a construir. Los nombres
+		posibles son:
+
+		"celda_paredes", "celda_vecinas", "celda_vertices",
+		"pared_vertices", "pared_celdas", "pared_continuaciones",
+		"vertice_paredes", "vertice_celdas"'''
+
+		definiciones = self._relaciones()
+
+		# Para cada tipo de elemento: posición a partir del índice,
+		# existencia, índice a partir de la posición y cantidad de 
+		# índices
+		tipos = {
+			"celda": (self.posicion_celda, self.existe_celda, self._indice_celda, self.rango_celdas),
+			"pared": (self.posicion_pared, self.existe_pared, self._indice_pared, self.rango_paredes),
+			"vertice": (self.posicion_vertice, self.existe_vertice, self._indice_vertice, self.rango_vertices),
+		}
+
+		if relaciones is None:
+			relaciones = definiciones.keys()
+
+		if not self._compacta and self._listas is None:
+			# En las grillas que ya tienen todos sus objetos creados
+			# se guardan también listas ordenadas por índice lineal,
+			# para no tener que buscarlos por posición al leer las 
+			# tablas
+			self._listas = ([], [], [])
+			elementos = (self._celdas, self._paredes, self._vertices)
+			for lista, dicc, tipo in zip(self._listas, elementos, ("celda", "pared", "vertice")):
+				posicion, _, _, cantidad = tipos[tipo]
+				for i in xrange(cantidad):
+					try:
+						lista.append(dicc[posicion(i)])
+					except KeyError:  # Índice sin elemento
+						lista.append(None)
+			self._por_indice = tuple(lista.__getitem__ for lista in self._listas)
+
+		for nombre in relaciones:
+			if nombre in self._adyacencias:
+				continue
+
+			claves, origen, destino, relativas = definiciones[nombre]
+			posicion, _, _, cantidad = tipos[origen]
+			_, existe, indice, _ = tipos[destino]
+
+			def relacionados(i, posicion=posicion, existe=existe, indice=indice, relativas=relativas):
+				try:
+					pos = posicion(i)
+				except KeyError:  # Índice sin elemento
+					return ()
+				return [indice(p) if existe(p) else None for p in relativas(pos)]
+
+			self._adyacencias[nombre] = TablaCSR(claves, cantidad, relacionados)
+
+	def _celda_indice(self, indice):
+		'''Celda con índice lineal indice, sin verificar que exista'''
+		if self._compacta:
+			return self._celdas.obtener(self._posicion_celda(indice))
+		return self._celdas[self._posicion_celda(indice)]
+
+	def _pared_indice(self, indice):
+		'''Pared con índice lineal indice, sin verificar que exista'''
+		if self._compacta:
+			return self._paredes.obtener(self._posicion_pared(indice))
+		return self._paredes[self._posicion_pared(indice)]
+
+	def _vertice_indice(self, indice):
+		'''Vértice con índice lineal indice, sin verificar que exista'''
+		if self._compacta:
+			return self._vertices.obtener(self._posicion_vertice(indice))
+		return self._vertices[self._posicion_vertice(indice)]
+
+	@property
+	def memo(self):
+		'''Devuelve el objeto Memo con las relaciones memorizadas y los
+		contadores de aciertos y fallos, o None si la grilla no
+		memoriza las relaciones'''
+		return self._memo
+
+	def limpiar_relaciones(self):
+		'''Descarta las relaciones memorizadas. Se vuelven a calcular
+		en el próximo pedido'''
+		if self._memo is not None:
+			self._memo.limpiar()
+
+	def limpiar_cache(self):
+		'''Descarta los objetos que conserva una grilla lazy. Los 
+		objetos se vuelven a crear en el próximo acceso. En una grilla
+		dividida en teselas se descartan todas las teselas'''
+		if self._teselas is not None:
+			self._teselas.limpiar()
+		elif self._lazy:
+			self._celdas.cache.limpiar()
+			self._paredes.cache.limpiar()
+			self._vertices.cache.limpiar()
+
+	def _nueva_cache(self, maximo, tipo):
+		'''Retorna la caché para la colección de los elementos de tipo,
+		o None si la grilla no es lazy. En una grilla dividida en
+		teselas los elementos se guardan en sus teselas'''
+		if self._teselas is not None:
+			return self._teselas.cache(tipo)
+		if self._lazy:
+			return Cache(maximo)
+		return None
+	def _clave_tesela(self, tipo, pos):
+		'''Clave (fila, columna) de la tesela del elemento pos de tipo.
+		Las paredes y vértices pertenecen a la tesela de su celda de
+		referencia (ver _celda_de), o a la de la celda más cercana si
+		es una celda fantasma'''
+		f, c = self._celda_de(tipo, pos)
+		return (min(max(f, 0), self._filas-1) // self._tesela[0], min(max(c, 0), self._columnas-1) // self._tesela[1])
+
+	def _ubicar(self, tipo, pos):
+		'''Retorna la clave de la tesela del elemento pos de tipo y el
+		índice del elemento dentro de la tesela, que es su índice
+		lineal en una grilla del tamaño de la tesela'''
+		clave = self._clave_tesela(tipo, pos)
+		pos = self._trasladar(tipo, pos, clave[0]*self._tesela[0], clave[1]*self._tesela[1])
+		if tipo == "celda":
+			return clave, self._plantilla._indice_celda(pos)
+		elif tipo == "pared":
+			return clave, self._plantilla._indice_pared(pos)
+		return clave, self._plantilla._indice_vertice(pos)
+
+	def _crear_celda(self, pos):
+		'''Crea la celda indicada en pos, ya vinculada a la grilla'''
+		return self._clase_celda(pos)
+
+	def _crear_pared(self, pos):
+		'''Crea la pared indicada en pos, ya vinculada a la grilla'''
+		return self._clase_pared(pos)
+
+	def _crear_vertice(self, pos):
+		'''Crea el vértice indicado en pos, ya vinculado a la grilla'''
+		return self._clase_vertice(pos)
+
+	def _paredes_de(self, celdas):
+		'''Retorna una lista con las paredes de las celdas de las
+		posiciones de celdas, sin repetir y ordenadas por índice 
+		lineal'''
+		paredes_celda = self._relaciones()["celda_paredes"][3]
+		posiciones = set(pos for celda in celdas for pos in paredes_celda(celda))
+		return [self._paredes[pos] for pos in sorted(posiciones, key=self._indice_pared)]
+
+	def _vertices_de(self, celdas):
+		'''Retorna una lista con los vértices de las celdas de las
+		posiciones de celdas, sin repetir y ordenados por índice 
+		lineal'''
+		vertices_celda = self._relaciones()["celda_vertices"][3]
+		posiciones = set(pos for celda in celdas for pos in vertices_celda(celda))
+		return [self._vertices[pos] for pos in sorted(posiciones, key=self._indice_vertice)]
+
+	def _posiciones_celdas(self):
+		'''Iterador con las posiciones de las celdas, ordenadas por
+		índice lineal'''
+		for f in xrange(self._filas):
+			for c in xrange(self._columnas):
+				yield (f, c)
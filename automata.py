@@ -0,0 +1,229 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para simular autómatas celulares sobre una grilla cuadrada o
+hexagonal. El estado de cada celda se guarda en una capa de celdas, y
+en cada paso el nuevo estado de todas las celdas se calcula a partir
+del estado actual de cada una y de sus vecinas, que se reúnen de una
+vez con numpy usando grilla.vecinas_array. En las grillas hexagonales
+las vecinas respetan el desplazamiento de las columnas impares, igual
+que exa._Celda.vecinas.
+
+La regla puede ser vectorizada, una función que recibe el arreglo de
+estados y el de los estados de las vecinas y devuelve el arreglo de
+estados nuevos, o una función común que se llama para cada celda:
+
+>>> automata = Automata(grilla, "vivas", Vida())
+>>> automata.paso(100)
+
+El nuevo estado se escribe en un segundo arreglo (doble buffer), de
+modo que todas las celdas se actualizan a partir del mismo estado.
+Con procesos se reparte cada paso entre varios procesos por bandas de
+filas. Los dos arreglos se publican en memoria compartida (ver el
+módulo compartida), y cada proceso lee las filas vecinas de su banda
+(el halo) directamente del estado compartido, sin copiarlas; en ese
+caso la regla tiene que poder pasarse con pickle, por ejemplo una
+función definida a nivel de módulo o una instancia de Vida o Incendio.
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import multiprocessing
+import multiprocessing.util
+
+import almacen
+import capas
+import compartida
+
+class Automata(object):
+	"""Autómata celular sobre las celdas de una grilla"""
+	def __init__(self, grilla, capa, regla, vectorizada=True, borde=0, procesos=None):
+		'''Prepara el autómata. Los parámetros son:
+
+		grilla      --> grilla cuadrada o hexagonal
+		capa        --> capa de celdas (o su nombre) con el estado de
+		                cada celda, que se actualiza en cada paso
+		regla       --> si vectorizada es True, función que recibe un
+		                arreglo con los estados de n celdas y otro de
+		                forma (n, cantidad de vecinas) con los de sus
+		                vecinas, en el orden de vecinas_array, y
+		                devuelve los n estados nuevos. Si vectorizada
+		                es False, función que recibe el estado de una
+		                celda y una tupla con los de sus vecinas, y
+		                devuelve su estado nuevo
+		borde       --> estado que se usa para las vecinas que no
+		                existen, en los bordes de la grilla
+		procesos    --> cantidad de procesos entre los que se reparte
+		                cada paso, o None para hacerlo en este proceso'''
+		numpy = almacen.requiere_numpy()
+
+		self._grilla = grilla
+		self._capa = capas.obtener(grilla, capa, "celda")
+		if not isinstance(self._capa, capas.Capa):  # Se escribe en datos
+			raise TypeError("La capa " + str(self._capa.nombre) + " guarda sus valores en bits")
+		self._regla = regla
+		self._vectorizada = vectorizada
+		self._borde = borde
+		self._procesos = procesos
+		self._generacion = 0
+
+		if procesos is None:
+			self._vecinas = grilla.vecinas_array()
+			self._siguiente = numpy.empty_like(self._capa.datos)
+			return
+
+		# Los dos estados quedan en un segmento compartido, en una
+		# grilla compacta que no copia las tablas de la original
+		clase = [clase for clase in compartida.TOPOLOGIAS if isinstance(grilla, clase)][0]
+		copia = clase(grilla.cant_filas, grilla.cant_columnas, compacta=True)
+		copia.agregar_capa(0, "celda", self._capa.dtype)
+		copia.agregar_capa(1, "celda", self._capa.dtype)
+		self._segmento = compartida.publicar(copia)
+
+		# Bandas de filas de tamaño parejo, una o más por proceso
+		F = grilla.cant_filas
+		cantidad = min(F, procesos) or 1
+		self._bandas = [(F*k // cantidad, F*(k+1) // cantidad) for k in xrange(cantidad)]
+		self._pool = multiprocessing.Pool(procesos)
+
+		# Si el autómata se descarta sin cerrarlo, o al terminar el
+		# intérprete, se terminan los procesos igual
+		self._finalizar = multiprocessing.util.Finalize(self, _liberar, (self._pool, self._segmento), exitpriority=10)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, tipo, valor, traza):
+		self.cerrar()
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla del autómata'''
+		return self._grilla
+
+	@property
+	def capa(self):
+		'''Devuelve la capa con el estado de las celdas'''
+		return self._capa
+
+	@property
+	def generacion(self):
+		'''Devuelve la cantidad de pasos realizados. Solo lectura'''
+		return self._generacion
+
+	def paso(self, cantidad=1):
+		'''Avanza el autómata cantidad pasos y deja el resultado en la
+		capa'''
+		if self._procesos is None:
+			for _ in xrange(cantidad):
+				self._siguiente[:] = _aplicar(self._regla, self._vectorizada, self._borde, self._capa.datos, self._capa.datos, self._vecinas)
+				# Se copia en el lugar, para que quienes tengan capa.datos
+				# (buscadores, vistas de flujo.leer, un archivo mapeado)
+				# vean el estado nuevo
+				self._capa.datos[:] = self._siguiente
+				self._generacion += 1
+			return
+
+		# Se alterna entre las dos capas compartidas, y la capa del
+		# autómata se copia solo al principio y al final
+		if self._segmento is None:
+			raise ValueError("El autómata está cerrado")
+		estados = self._segmento.grilla
+		estados.get_capa(0).datos[:] = self._capa.datos
+		for k in xrange(cantidad):
+			leer, escribir = k % 2, 1 - k % 2
+			tareas = [(self._segmento.nombre, leer, escribir, f0, f1, self._regla, self._vectorizada, self._borde) for f0, f1 in self._bandas]
+			self._pool.map(_paso_banda, tareas)
+			self._generacion += 1
+		self._capa.datos[:] = estados.get_capa(cantidad % 2).datos
+
+	def cerrar(self):
+		'''Termina los procesos y libera la memoria compartida. Sin
+		procesos no hace nada'''
+		if self._procesos is None or self._segmento is None:
+			return
+		self._finalizar()
+		self._segmento = None
+
+class Vida(object):
+	"""Regla vectorizada de un autómata tipo juego de la vida. Cada celda
+	vale 1 si está viva o 0 si está muerta; una celda muerta nace si la
+	cantidad de vecinas vivas está en nacer, y una viva sobrevive si
+	está en sobrevivir. Por defecto es el juego de la vida de Conway
+	(B3/S23); en las grillas hexagonales suele usarse B2/S34"""
+	def __init__(self, nacer=(3,), sobrevivir=(2, 3)):
+
+		self.nacer = tuple(nacer)
+		self.sobrevivir = tuple(sobrevivir)
+
+	def __call__(self, estado, vecinas):
+		numpy = almacen.requiere_numpy()
+		vivas = (vecinas != 0).sum(axis=1)
+		nace = numpy.in1d(vivas, self.nacer)
+		sobrevive = numpy.in1d(vivas, self.sobrevivir)
+		return numpy.where(estado != 0, sobrevive, nace).astype(estado.dtype)
+
+class Incendio(object):
+	"""Regla vectorizada de propagación de un incendio. Los estados son
+	VACIO, ARBOL, FUEGO y CENIZA: un árbol con alguna vecina en llamas
+	se prende fuego, y una celda en llamas queda hecha ceniza en el
+	paso siguiente"""
+	VACIO, ARBOL, FUEGO, CENIZA = 0, 1, 2, 3
+
+	def __call__(self, estado, vecinas):
+		res = estado.copy()
+		res[estado == self.FUEGO] = self.CENIZA
+		res[(estado == self.ARBOL) & (vecinas == self.FUEGO).any(axis=1)] = self.FUEGO
+		return res
+
+def automata(grilla, capa, regla, pasos=1, vectorizada=True, borde=0):
+	'''Avanza pasos veces el autómata de regla sobre la capa de grilla,
+	en este proceso, y retorna los datos de la capa. Ver Automata'''
+	Automata(grilla, capa, regla, vectorizada, borde).paso(pasos)
+	return capas.obtener(grilla, capa, "celda").datos
+
+def _liberar(pool, segmento):
+	'''Termina los procesos de pool y destruye el segmento compartido'''
+	pool.terminate()
+	pool.join()
+	segmento.destruir()
+
+def _aplicar(regla, vectorizada, borde, estado, todos, vecinas):
+	'''Retorna los estados nuevos de las celdas de estado, cuyas
+	vecinas son las filas de vecinas, con índices en el arreglo todos'''
+	numpy = almacen.requiere_numpy()
+
+	valores = numpy.where(vecinas >= 0, todos[vecinas], borde)
+	if vectorizada:
+		return regla(estado, valores)
+
+	# Los valores se pasan a listas, que son mucho más rápidas que
+	# numpy para los accesos sueltos
+	cantidad = vecinas.shape[1]
+	plano = valores.ravel().tolist()
+	return [regla(valor, tuple(plano[i*cantidad:(i+1)*cantidad])) for i, valor in enumerate(estado.tolist())]
+
+# Segmentos a los que ya se adjuntó cada proceso del pool, y vecinas
+# de cada banda ya calculadas, por segmento y banda
+_segmentos = {}
+_bandas = {}
+
+def _paso_banda(tarea):
+	'''Calcula en un proceso del pool los estados nuevos de las filas
+	f0 a f1-1. Lee de la capa compartida leer, que ya tiene completas
+	las filas del halo, y escribe en la capa escribir'''
+	nombre, leer, escribir, f0, f1, regla, vectorizada, borde = tarea
+	if not nombre in _segmentos:
+		_segmentos[nombre] = compartida.adjuntar(nombre)
+	grilla = _segmentos[nombre].grilla
+	clave = (nombre, f0, f1)
+	if not clave in _bandas:
+		_bandas[clave] = grilla.vecinas_array(f0, f1)
+
+	C = grilla.cant_columnas
+	todos = grilla.get_capa(leer).datos
+	grilla.get_capa(escribir).datos[f0*C:f1*C] = _aplicar(regla, vectorizada, borde, todos[f0*C:f1*C], todos, _bandas[clave])
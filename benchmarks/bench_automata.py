@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de autómatas celulares. Mide las celdas por milisegundo
+de un paso del juego de la vida sobre grillas cuadradas y hexagonales,
+recorriendo las celdas con vecinas() y con el motor de automata, en
+este proceso y repartido entre varios procesos.
+
+Uso: python bench_automata.py [lado] [procesos]
+
+La versión con vecinas() se mide sobre una grilla más chica, ya que
+tarda varios segundos por paso en las grillas grandes. Antes comprueba
+en grillas chicas que el motor, en este proceso y repartido, da los
+mismos estados que la versión con vecinas(), que escribe el estado
+nuevo en el mismo arreglo capa.datos y que no quedan procesos vivos al
+salir del with ni al descartar un autómata sin cerrarlo.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import gc
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import automata
+import cuad
+import exa
+
+LADO = 2000
+LADO_VECINAS = 200
+PASOS = 5
+
+def con_vecinas(grilla, capa):
+	'''Un paso del juego de la vida recorriendo los objetos de las
+	celdas, como se hacía sin el motor'''
+	nuevo = capa.datos.copy()
+	for celda in grilla._celdas.values():
+		vivas = sum(1 for vecina in celda.vecinas().values() if vecina is not None and capa.datos[vecina.indice])
+		nuevo[celda.indice] = vivas == 3 or (vivas == 2 and capa.datos[celda.indice])
+	capa.datos[:] = nuevo
+
+def poblar(modulo, lado):
+	'''Retorna una grilla compacta con una capa de celdas vivas al azar'''
+	grilla = modulo.Grilla(lado, lado, compacta=True)
+	capa = grilla.agregar_capa("vivas", "celda", "int8")
+	capa.datos[:] = numpy.random.rand(len(capa.datos)) < 0.3
+	return grilla, capa
+
+def comprobar():
+	'''Compara varios pasos del motor con con_vecinas'''
+	for modulo in (cuad, exa):
+		grilla, capa = poblar(modulo, 17)
+		_, referencia = poblar(modulo, 17)
+		referencia.datos[:] = capa.datos
+		datos = capa.datos
+		with automata.Automata(grilla, capa, automata.Vida(), procesos=2) as repartido:
+			motor = automata.Automata(grilla, capa, automata.Vida())
+			for k in xrange(6):
+				con_vecinas(referencia.grilla, referencia)
+				(motor if k % 2 else repartido).paso()
+				assert (capa.datos == referencia.datos).all(), (modulo.__name__, k)
+				assert capa.datos is datos  # Se actualiza en el lugar
+		assert not multiprocessing.active_children()  # El with terminó los procesos
+
+		# Un autómata descartado sin cerrarlo también termina sus procesos
+		automata.Automata(grilla, capa, automata.Vida(), procesos=2).paso()
+		gc.collect()
+		assert not multiprocessing.active_children()
+
+def por_milisegundo(celdas, paso, pasos=PASOS):
+	'''Retorna las celdas por milisegundo de llamar pasos veces a paso'''
+	inicio = time.time()
+	for _ in xrange(pasos):
+		paso()
+	return celdas * pasos / ((time.time() - inicio) * 1000)
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	procesos = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+	numpy.random.seed(0)
+	comprobar()
+	for modulo in (cuad, exa):
+		grilla, capa = poblar(modulo, LADO_VECINAS)
+		antes = por_milisegundo(len(grilla), lambda: con_vecinas(grilla, capa), 1)
+
+		grilla, capa = poblar(modulo, lado)
+		motor = automata.Automata(grilla, capa, automata.Vida())
+		ahora = por_milisegundo(len(grilla), motor.paso)
+
+		with automata.Automata(grilla, capa, automata.Vida(), procesos=procesos) as motor:
+			motor.paso()  # Los procesos preparan sus bandas
+			repartido = por_milisegundo(len(grilla), motor.paso)
+
+		print("%-5s vecinas(): %9.0f celdas/ms  motor: %9.0f celdas/ms  %d procesos: %9.0f celdas/ms" % (modulo.__name__, antes, ahora, procesos, repartido))
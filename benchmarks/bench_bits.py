@@ -0,0 +1,95 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de las capas de bits. Compara guardar el estado cerrado de
+las paredes en un diccionario indexado por la posición de cada pared,
+buscando las cerradas con un recorrido del diccionario, con guardarlo
+en una capa de bits. Mide los cambios de estado por segundo de a uno y de a muchos,
+y los milisegundos para encontrar todas las paredes cerradas.
+Antes comprueba en grillas hexagonales, con índices fantasma en los
+bordes, que las escrituras en bloque no encienden esos índices, y
+después de los cambios de a uno que la capa y el diccionario tienen
+las mismas paredes cerradas.
+
+Uso: python bench_bits.py [lado]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import cuad
+import exa
+
+LADO = 500
+CAMBIOS = 200000
+
+def segundos(funcion):
+	'''Retorna los segundos que tarda en ejecutarse funcion'''
+	inicio = time.time()
+	funcion()
+	return time.time() - inicio
+
+def comprobar():
+	'''Comprueba las cuentas de las capas de bits de paredes y vértices
+	de grillas hexagonales después de cada escritura en bloque'''
+	for filas, columnas in ((3, 4), (5, 5), (1, 1)):
+		grilla = exa.Grilla(filas, columnas)
+		for tipo, cantidad in (("pared", grilla.cant_paredes), ("vertice", grilla.cant_vertices)):
+			capa = grilla.agregar_bits("prueba_" + tipo, tipo)
+			bits = capa.bits
+			todos = numpy.arange(len(capa))
+			escrituras = (lambda: capa.poner(todos), lambda: capa.__setitem__(slice(None), True),
+			              lambda: capa.__setitem__(todos, True), lambda: capa.invertir(todos),
+			              lambda: capa.llenar(True), lambda: capa.invertir())
+			for escribir in escrituras:
+				capa.llenar(False)
+				escribir()
+				assert capa.contar() == cantidad, (filas, columnas, tipo)
+				assert len(capa.indices()) == cantidad
+			capa.invertir()
+			assert capa.contar() == 0
+			assert capa.bits is bits  # Se modifica siempre en el lugar
+
+if __name__ == "__main__":
+	comprobar()
+
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+
+	numpy.random.seed(0)
+	grilla = cuad.Grilla(lado, lado)
+	paredes = list(grilla._paredes.values())
+	elegidas = numpy.random.randint(0, len(paredes), CAMBIOS)
+
+	# Estado en un diccionario
+	estado = dict.fromkeys(grilla._paredes, True)
+	def invertir_diccionario():
+		for k in elegidas.tolist():
+			pos = paredes[k].id
+			estado[pos] = not estado[pos]
+	diccionario = CAMBIOS / segundos(invertir_diccionario)
+	buscar_diccionario = segundos(lambda: [pos for pos, cerrada in estado.items() if cerrada]) * 1000
+
+	# Estado en una capa de bits
+	cerradas = grilla.agregar_bits("cerradas", "pared", True)
+	indices = numpy.array([paredes[k].indice for k in elegidas])
+	bits = cerradas.bits
+	def invertir_bits():
+		for i in indices.tolist():
+			bits[i] = not bits[i]
+	sueltos = CAMBIOS / segundos(invertir_bits)
+	assert set(cerradas.indices().tolist()) == set(grilla.indice_pared(pos) for pos, cerrada in estado.items() if cerrada)
+	juntos = CAMBIOS / segundos(lambda: cerradas.invertir(indices))
+	buscar_bits = segundos(cerradas.indices) * 1000
+
+	print("%d paredes" % len(paredes))
+	print("cambios por segundo  diccionario: %10.0f  bits de a uno: %10.0f  bits de a muchos: %12.0f" % (diccionario, sueltos, juntos))
+	print("buscar cerradas      diccionario: %8.1f ms  bits: %8.1f ms  contar: %8.1f ms" % (buscar_diccionario, buscar_bits, segundos(cerradas.contar) * 1000))
@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de búsqueda de caminos. Crea grillas lazy cuadradas y
+hexagonales de 1000x1000 con una fracción de paredes cerradas al azar,
+y mide el tiempo de preparar el Buscador y de hacer búsquedas con A* y
+Dijkstra entre celdas elegidas al azar y entre esquinas opuestas.
+También mide el cálculo del campo de distancias hacia las esquinas y
+su actualización después de cambiar unas pocas paredes.
+Antes comprueba en grillas chicas, con y sin costos, que A* y Dijkstra
+devuelven caminos válidos de costo mínimo y que el campo de distancias
+actualizado coincide con uno calculado desde cero, comparándolos con
+un Dijkstra sobre los objetos de las celdas.
+
+Uso: python bench_caminos.py [lado] [busquedas] [cerradas]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import random
+import heapq
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import caminos
+import cuad
+import exa
+
+LADO = 1000
+BUSQUEDAS = 20
+CERRADAS = 0.25
+SEMILLA = 1
+CAMBIOS = 1000
+
+def referencia(grilla, abiertas, costos, inicio, hacia=False):
+	'''Costos mínimos desde la celda inicio, o hacia ella si hacia es
+	True, con un Dijkstra sobre los objetos de las celdas'''
+	distancias = {inicio: 0.0}
+	pendientes = [(0.0, inicio)]
+	while pendientes:
+		d, pos = heapq.heappop(pendientes)
+		if d > distancias[pos]:
+			continue
+		celda = grilla.get_celda(pos)
+		paredes = celda.paredes()
+		for lugar, vecina in celda.vecinas().items():
+			if vecina is None or not abiertas[paredes[lugar]]:
+				continue
+			nueva = d + costos[pos if hacia else vecina.posicion]
+			if nueva < distancias.get(vecina.posicion, float("inf")):
+				distancias[vecina.posicion] = nueva
+				heapq.heappush(pendientes, (nueva, vecina.posicion))
+	return distancias
+
+def comprobar():
+	'''Compara los caminos y el campo de distancias con referencia en
+	grillas chicas con paredes cerradas y costos al azar'''
+	azar = random.Random(SEMILLA)
+	for modulo in (cuad, exa):
+		for con_costos in (False, True):
+			grilla = modulo.Grilla(12, 13)
+			abiertas = grilla.agregar_capa("abiertas", "pared", "bool", True)
+			abiertas.datos[:] = numpy.random.RandomState(SEMILLA).rand(len(abiertas)) >= 0.3
+			capa_costos = None
+			costos = dict.fromkeys(grilla._celdas, 1.0)
+			if con_costos:
+				capa_costos = grilla.agregar_capa("costos", "celda", "float64", 1.0)
+				for pos in costos:
+					costos[pos] = capa_costos[pos] = azar.randint(1, 5)
+			buscador = caminos.Buscador(grilla, abiertas, capa_costos)
+
+			for _ in xrange(30):
+				origen = (azar.randrange(12), azar.randrange(13))
+				destino = (azar.randrange(12), azar.randrange(13))
+				esperado = referencia(grilla, abiertas, costos, origen).get(destino)
+				for buscar in (buscador.a_estrella, buscador.dijkstra):
+					camino = buscar(origen, destino)
+					if esperado is None:
+						assert camino is None, (modulo.__name__, origen, destino)
+						continue
+					assert camino[0] == origen and camino[-1] == destino
+					for a, b in zip(camino, camino[1:]):
+						celda = grilla.get_celda(a)
+						lugares = dict((v.posicion, k) for k, v in celda.vecinas().items() if v is not None)
+						assert b in lugares and abiertas[celda.get_pared(lugares[b])], (a, b)
+					assert abs(sum(costos[pos] for pos in camino[1:]) - esperado) < 1e-9, (modulo.__name__, origen, destino)
+
+			destinos = [(0, 0), (11, 12)]
+			campo = caminos.CampoDistancias(grilla, destinos, abiertas, capa_costos)
+			paredes = [i for i in xrange(grilla.rango_paredes) if grilla.existe_pared(grilla._posicion_pared(i))]
+			for _ in xrange(20):
+				p = azar.choice(paredes)
+				abiertas[p] = not abiertas[p]
+				campo.actualizar([p])
+			esperado = {}
+			for destino in destinos:
+				for pos, d in referencia(grilla, abiertas, costos, destino, True).items():
+					esperado[pos] = min(d, esperado.get(pos, float("inf")))
+			for pos in grilla._celdas:
+				assert abs(campo.get_distancia(pos) - esperado.get(pos, float("inf"))) < 1e-9 or campo.get_distancia(pos) == esperado.get(pos, float("inf")), (modulo.__name__, pos)
+
+def medir(modulo, lado, busquedas, cerradas):
+	'''Mide la preparación y las búsquedas sobre una grilla del 
+	módulo indicado'''
+	grilla = modulo.Grilla(lado, lado, lazy=True)
+	abiertas = grilla.agregar_capa("abiertas", "pared", "bool", True)
+	abiertas.datos[:] = numpy.random.RandomState(SEMILLA).rand(len(abiertas)) >= cerradas
+
+	inicio = time.time()
+	buscador = caminos.Buscador(grilla, abiertas)
+	print("%-5s %dx%d preparación: %8.1f ms" % (modulo.__name__, lado, lado, (time.time() - inicio) * 1e3))
+
+	azar = random.Random(SEMILLA)
+	pares = [((azar.randrange(lado), azar.randrange(lado)), (azar.randrange(lado), azar.randrange(lado))) for _ in xrange(busquedas)]
+
+	for nombre, buscar in (("a_estrella", buscador.a_estrella), ("dijkstra", buscador.dijkstra)):
+		inicio = time.time()
+		encontrados = 0
+		for origen, destino in pares:
+			if buscar(origen, destino) is not None:
+				encontrados += 1
+		total = time.time() - inicio
+		print("%-5s %-10s al azar: %8.1f ms/búsqueda (%d/%d con camino)" % (modulo.__name__, nombre, total * 1e3 / busquedas, encontrados, busquedas))
+
+	inicio = time.time()
+	camino = buscador.a_estrella((0, 0), (lado-1, lado-1))
+	print("%-5s a_estrella esquinas: %8.1f ms (largo %s)" % (modulo.__name__, (time.time() - inicio) * 1e3, len(camino) if camino else None))
+
+	inicio = time.time()
+	campo = caminos.CampoDistancias(grilla, ((0, 0), (0, lado-1), (lado-1, 0), (lado-1, lado-1)), abiertas)
+	print("%-5s campo completo: %8.1f ms" % (modulo.__name__, (time.time() - inicio) * 1e3))
+
+	# En las grillas hexagonales hay índices sin pared que se descartan
+	paredes = [azar.randrange(grilla.rango_paredes) for _ in xrange(CAMBIOS)]
+	paredes = [p for p in paredes if grilla.existe_pared(grilla._posicion_pared(p))]
+	total = 0
+	for _ in xrange(busquedas):
+		p = azar.choice(paredes)
+		abiertas[p] = not abiertas[p]
+		inicio = time.time()
+		campo.actualizar([p])
+		total += time.time() - inicio
+	print("%-5s campo actualizado: %8.1f ms/pared" % (modulo.__name__, total * 1e3 / busquedas))
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	busquedas = int(sys.argv[2]) if len(sys.argv) > 2 else BUSQUEDAS
+	cerradas = float(sys.argv[3]) if len(sys.argv) > 3 else CERRADAS
+
+	comprobar()
+	for modulo in (cuad, exa):
+		medir(modulo, lado, busquedas, cerradas)
@@ -0,0 +1,167 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de las grillas en memoria compartida. Publica grillas
+cuadradas y hexagonales con una capa y las tablas de adyacencia de
+las celdas, y mide el tiempo que tarda otro proceso en adjuntarse al
+segmento y recorrer las vecinas de algunas celdas, comparándolo con el
+de construir la grilla en ese proceso.
+Antes comprueba en grillas chicas que un proceso que se adjunta por
+nombre ve las mismas capas, tablas y relaciones que la grilla original,
+que sus cambios en las capas los ve el proceso que publicó el segmento,
+que el proceso adjunto al terminar no borra el segmento, y que al
+destruirlo se borra el archivo pero los procesos ya adjuntos lo siguen
+usando.
+
+Uso: python bench_compartida.py [lado]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import compartida
+import cuad
+import exa
+
+LADO = 1000
+MUESTRA = 1000
+
+def relaciones(grilla):
+	'''Índices de las vecinas y las paredes de cada celda de grilla,
+	por posición'''
+	res = {}
+	for pos in grilla.index_celdas():
+		celda = grilla.get_celda(pos)
+		res[pos] = (dict((k, v and v.indice) for k, v in celda.vecinas().items()), dict((k, v.indice) for k, v in celda.paredes().items()))
+	return res
+
+def adjunto(nombre, cola):
+	'''Se adjunta al segmento nombre, pone en cola si es el dueño, las
+	relaciones y los valores de las capas que ve, y escribe en la capa
+	de celdas el doble de cada valor. Se ejecuta en otro proceso'''
+	segmento = compartida.adjuntar(nombre)
+	grilla = segmento.grilla
+	alturas = grilla.get_capa("alturas")
+	cola.put((segmento.duenio, relaciones(grilla), alturas.datos.tolist(), grilla.get_capa("paredes").datos.tolist(), sorted(grilla._adyacencias)))
+	alturas.datos *= 2
+	segmento.cerrar()
+
+def comprobar():
+	'''Compara la grilla que ve un proceso adjunto con la original'''
+	generador = numpy.random.RandomState(1)
+	for modulo in (cuad, exa):
+		for filas, columnas in ((7, 8), (1, 5)):
+			grilla = modulo.Grilla(filas, columnas)
+			grilla.agregar_capa("alturas").datos[:] = generador.rand(grilla.rango_celdas)
+			grilla.agregar_capa("paredes", "pared", "int32").datos[:] = generador.randint(0, 100, grilla.rango_paredes)
+			grilla.construir_adyacencias()
+			esperadas = relaciones(grilla)
+
+			with compartida.publicar(grilla) as segmento:
+				assert segmento.duenio
+				ruta = os.path.join(compartida.DIRECTORIO, segmento.nombre)
+				for nombre in grilla._adyacencias:
+					assert list(segmento.grilla.adyacencia(nombre).indices) == list(grilla.adyacencia(nombre).indices), nombre
+				assert relaciones(segmento.grilla) == esperadas
+
+				cola = multiprocessing.Queue()
+				proceso = multiprocessing.Process(target=adjunto, args=(segmento.nombre, cola))
+				proceso.start()
+				duenio, vistas, alturas, paredes, tablas = cola.get()
+				proceso.join()
+				assert proceso.exitcode == 0
+				assert not duenio
+				assert vistas == esperadas, (modulo.__name__, filas, columnas)
+				assert alturas == grilla.get_capa("alturas").datos.tolist()
+				assert paredes == grilla.get_capa("paredes").datos.tolist()
+				assert tablas == sorted(grilla._adyacencias)
+
+				# Los cambios del otro proceso se ven en el segmento, no en
+				# la grilla original, y al terminar no borró el archivo
+				assert (segmento.grilla.get_capa("alturas").datos == 2 * grilla.get_capa("alturas").datos).all()
+				assert os.path.exists(ruta)
+
+				otro = compartida.adjuntar(segmento.nombre)
+			assert not os.path.exists(ruta)
+
+			# Después de destruirlo el segmento sigue andando para los
+			# que ya estaban adjuntos, pero no se puede adjuntar otro
+			assert relaciones(otro.grilla) == esperadas
+			assert (otro.grilla.get_capa("alturas").datos == 2 * grilla.get_capa("alturas").datos).all()
+			otro.cerrar()
+			try:
+				compartida.adjuntar(segmento.nombre)
+			except (IOError, OSError):
+				pass
+			else:
+				assert False, "Se adjuntó a un segmento destruido"
+
+		teselada = modulo.Grilla(4, 4, tesela=2, cache=1)
+		try:
+			compartida.publicar(teselada)
+		except ValueError:
+			pass
+		else:
+			assert False, "Se publicó una grilla dividida en teselas"
+
+def recorrer(grilla, modulo, lado):
+	'''Pide las vecinas de una muestra de celdas de grilla'''
+	paso = max(1, lado * lado // MUESTRA)
+	for i in xrange(0, lado * lado, paso):
+		grilla.get_celda(grilla.posicion_celda(i)).vecinas()
+
+def medir_adjunto(nombre, modulo, lado, cola):
+	'''Mide adjuntarse al segmento nombre y recorrer la muestra. Se
+	ejecuta en otro proceso'''
+	inicio = time.time()
+	recorrer(compartida.adjuntar(nombre).grilla, modulo, lado)
+	cola.put(time.time() - inicio)
+
+def medir_construyendo(modulo, lado, cola):
+	'''Mide construir la grilla y recorrer la muestra. Se ejecuta en
+	otro proceso'''
+	inicio = time.time()
+	recorrer(modulo.Grilla(lado, lado), modulo, lado)
+	cola.put(time.time() - inicio)
+
+def en_proceso(funcion, *args):
+	'''Ejecuta funcion en otro proceso y retorna lo que pone en la cola'''
+	cola = multiprocessing.Queue()
+	proceso = multiprocessing.Process(target=funcion, args=args + (cola,))
+	proceso.start()
+	res = cola.get()
+	proceso.join()
+	return res
+
+def medir(modulo, lado):
+	'''Mide la publicación y el adjunto de una grilla del lado
+	indicado'''
+	grilla = modulo.Grilla(lado, lado, compacta=True)
+	grilla.agregar_capa("alturas", valor=1)
+	grilla.construir_adyacencias(["celda_vecinas"])
+
+	inicio = time.time()
+	with compartida.publicar(grilla) as segmento:
+		publicacion = time.time() - inicio
+		adjuntando = en_proceso(medir_adjunto, segmento.nombre, modulo, lado)
+	construyendo = en_proceso(medir_construyendo, modulo, lado)
+
+	print("%-5s %dx%d  publicar: %6.3f s  otro proceso adjuntándose: %6.3f s  construyendo: %6.3f s" % (
+		modulo.__name__, lado, lado, publicacion, adjuntando, construyendo))
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	comprobar()
+
+	for modulo in (cuad, exa):
+		medir(modulo, lado)
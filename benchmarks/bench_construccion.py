@@ -0,0 +1,68 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de construcción de grillas. Mide el tiempo de crear
+grillas normales cuadradas y hexagonales de distintos tamaños, y lo
+compara con el de la construcción anterior, que generaba cada pared y
+cada vértice desde todas sus celdas y descartaba los repetidos
+verificando si ya estaban en el diccionario.
+
+Uso: python bench_construccion.py [lado1 lado2 ...]
+
+Una grilla hexagonal de 3000x3000 tiene unos 54 millones de elementos
+y necesita más de 10 GB de memoria, por eso no está entre los lados
+que se miden por defecto.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cuad
+import exa
+
+LADOS = (100, 300, 1000)
+
+def deduplicando(modulo, lado):
+	'''Construcción de referencia: recorre las celdas y crea sus paredes
+	y vértices solo si todavía no están en el diccionario'''
+	grilla = modulo.Grilla(0, 0)
+	celdas, paredes, vertices = {}, {}, {}
+	for f in xrange(lado):
+		for c in xrange(lado):
+			if not (f, c) in celdas:
+				celdas[(f, c)] = grilla._clase_celda((f, c))
+			for pos in modulo._paredes_celda((f, c)):
+				if not pos in paredes:
+					paredes[pos] = grilla._clase_pared(pos)
+			for pos in modulo._vertices_celda((f, c)):
+				if not pos in vertices:
+					vertices[pos] = grilla._clase_vertice(pos)
+	return celdas, paredes, vertices
+
+def cronometrar(funcion, *args):
+	'''Retorna el tiempo en segundos de llamar a funcion, descartando
+	el resultado fuera de la medición'''
+	gc.disable()  # Crear millones de objetos dispara el recolector
+	inicio = time.time()
+	resultado = funcion(*args)
+	total = time.time() - inicio
+	gc.enable()
+	del resultado
+	return total
+
+if __name__ == "__main__":
+	lados = [int(lado) for lado in sys.argv[1:]] or LADOS
+
+	for modulo in (cuad, exa):
+		for lado in lados:
+			antes = cronometrar(deduplicando, modulo, lado)
+			ahora = cronometrar(modulo.Grilla, lado, lado)
+			print("%-5s %5dx%-5d deduplicando: %8.2f s  enumerando: %8.2f s  (%.1fx)" % (modulo.__name__, lado, lado, antes, ahora, antes / ahora))
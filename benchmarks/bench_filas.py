@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark del acceso por filas y columnas. Mide el tiempo de pedir
+una fila y una columna con get_fila y get_columna en grillas de
+distinto tamaño, y lo compara con el recorrido de todas las celdas
+ordenándolas que se hacía antes, para verificar que el costo depende
+del largo de la fila y no del tamaño de la grilla.
+Antes comprueba en grillas chicas, en todos los modos de
+almacenamiento, que get_fila, get_columna, get_paredes_fila,
+get_paredes_columna, get_vertices_fila, get_vertices_columna y
+get_region devuelven lo mismo que filtrar index_celdas().
+
+Uso: python bench_filas.py [lado1 lado2 ...]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cuad
+import exa
+
+LADOS = (100, 200, 400)
+REPETICIONES = 20
+MODOS = ({}, {"compacta": True}, {"lazy": True, "cache": 5}, {"tesela": 3, "cache": 2})
+
+def filtrar(grilla, condicion):
+	'''Posiciones de las celdas de grilla que cumplen condicion,
+	ordenadas por fila y columna'''
+	return sorted(pos for pos in grilla.index_celdas() if condicion(pos))
+
+def elementos(grilla, posiciones, relacion):
+	'''Ids de los elementos de la relación indicada ("paredes" o
+	"vertices") de las celdas de las posiciones, ordenados por índice
+	lineal'''
+	res = {}
+	for pos in posiciones:
+		for elemento in getattr(grilla.get_celda(pos), relacion)().values():
+			res[elemento.indice] = elemento.id
+	return [res[i] for i in sorted(res)]
+
+def comprobar():
+	'''Compara el acceso por filas, columnas y regiones con el filtrado
+	de index_celdas()'''
+	for modulo in (cuad, exa):
+		for filas, columnas in ((7, 8), (1, 5), (4, 1)):
+			for modo in MODOS:
+				grilla = modulo.Grilla(filas, columnas, **modo)
+				for f in xrange(-1, filas + 1):
+					esperadas = filtrar(grilla, lambda pos: pos[0] == f)
+					assert [celda.posicion for celda in grilla.get_fila(f)] == esperadas, (modulo.__name__, modo, f)
+					assert [pared.id for pared in grilla.get_paredes_fila(f)] == elementos(grilla, esperadas, "paredes"), (modulo.__name__, modo, f)
+					assert [vertice.id for vertice in grilla.get_vertices_fila(f)] == elementos(grilla, esperadas, "vertices"), (modulo.__name__, modo, f)
+				for c in xrange(-1, columnas + 1):
+					esperadas = filtrar(grilla, lambda pos: pos[1] == c)
+					assert [celda.posicion for celda in grilla.get_columna(c)] == esperadas, (modulo.__name__, modo, c)
+					assert [pared.id for pared in grilla.get_paredes_columna(c)] == elementos(grilla, esperadas, "paredes"), (modulo.__name__, modo, c)
+					assert [vertice.id for vertice in grilla.get_vertices_columna(c)] == elementos(grilla, esperadas, "vertices"), (modulo.__name__, modo, c)
+				for f0, c0, f1, c1 in ((0, 0, filas, columnas), (1, 1, 3, 4), (-2, -2, 2, 2), (2, 3, 20, 20), (3, 3, 1, 1)):
+					region = grilla.get_region(f0, c0, f1, c1)
+					assert not isinstance(region, list)  # Las celdas se piden de a una
+					esperadas = filtrar(grilla, lambda pos: f0 <= pos[0] < f1 and c0 <= pos[1] < c1)
+					assert [celda.posicion for celda in region] == esperadas, (modulo.__name__, modo, f0, c0, f1, c1)
+
+def recorriendo(grilla, numFil):
+	'''Fila numFil buscada recorriendo y ordenando todas las celdas,
+	como se hacía antes'''
+	return sorted((celda for celda in grilla._celdas.values() if celda.posicion[0] == numFil), key=lambda celda: celda.posicion[1])
+
+def medir(modulo, lado):
+	'''Mide el pedido de filas y columnas en una grilla del lado
+	indicado'''
+	grilla = modulo.Grilla(lado, lado)
+
+	inicio = time.time()
+	for k in xrange(REPETICIONES):
+		grilla.get_fila(k % lado)
+		grilla.get_columna(k % lado)
+	indexado = (time.time() - inicio) * 1e3 / (2 * REPETICIONES)
+
+	inicio = time.time()
+	recorriendo(grilla, lado // 2)
+	recorrido = (time.time() - inicio) * 1e3
+
+	print("%-5s %5dx%-5d get_fila/get_columna: %8.3f ms  recorriendo: %8.3f ms" % (modulo.__name__, lado, lado, indexado, recorrido))
+	return indexado
+
+if __name__ == "__main__":
+	lados = [int(x) for x in sys.argv[1:]] or LADOS
+	comprobar()
+
+	for modulo in (cuad, exa):
+		tiempos = [medir(modulo, lado) for lado in lados]
+		# El lado se multiplica por lados[-1]/lados[0], y el tiempo
+		# por fila debería crecer en la misma proporción
+		print("%-5s crecimiento: %.1fx para un lado %.1fx más grande" % (modulo.__name__, tiempos[-1] / tiempos[0], float(lados[-1]) / lados[0]))
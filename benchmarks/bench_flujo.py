@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark del procesamiento de grillas fila por fila. Mide las filas
+por segundo de un paso de autómata celular sobre una grilla alta
+procesada con el módulo flujo, y lo compara con el mismo paso sobre
+la grilla completa con automata.Automata.
+Antes comprueba en grillas chicas que las filas de flujo.filas tienen
+las posiciones de celdas, paredes y vértices de la grilla de esa
+altura, cada elemento en una sola fila y en el orden de los índices
+lineales, también al empezar en otra fila y sin cantidad; que ventana
+y leer devuelven las filas esperadas, y que flujo.automata da los
+mismos estados que automata.Automata.
+
+Uso: python bench_flujo.py [filas] [columnas]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import automata
+import cuad
+import exa
+import flujo
+
+FILAS = 2000
+COLUMNAS = 500
+SEMILLA = 1
+
+def fila_de(grilla, pos):
+	'''Fila a la que pertenece la pared o el vértice pos: la de su celda
+	de referencia, o la más cercana dentro de la grilla'''
+	f = pos[0][0] if isinstance(pos[0], tuple) else pos[0]
+	return min(max(f, 0), grilla.cant_filas - 1)
+
+def comprobar():
+	'''Compara las filas de flujo con las de la grilla de la misma
+	altura, y el autómata por filas con el de la grilla completa'''
+	generador = numpy.random.RandomState(SEMILLA)
+	for modulo in (cuad, exa):
+		regla = automata.Vida() if modulo is cuad else automata.Vida((2,), (3, 4))
+		for columnas in (1, 5, 8):
+			for cantidad in (1, 2, 3, 4, 7):
+				grilla = modulo.Grilla(cantidad, columnas)
+				filas = list(flujo.filas(modulo.Grilla, columnas, cantidad))
+				assert [fila.fila for fila in filas] == range(cantidad)
+
+				assert [pos for fila in filas for pos in fila.celdas] == [grilla.posicion_celda(i) for i in xrange(grilla.rango_celdas)]
+				for fila in filas:
+					assert all(grilla.get_celda(pos).posicion == pos for pos in fila.celdas)
+				for atributo, indice, todas in (("paredes", grilla.indice_pared, grilla.index_paredes()), ("vertices", grilla.indice_vertice, grilla.index_vertices())):
+					vistas = [pos for fila in filas for pos in getattr(fila, atributo)]
+					assert sorted(vistas) == sorted(todas), (modulo.__name__, columnas, cantidad, atributo)
+					for fila in filas:
+						indices = [indice(pos) for pos in getattr(fila, atributo)]
+						assert indices == sorted(indices), (modulo.__name__, columnas, cantidad, atributo, fila.fila)
+						assert all(fila_de(grilla, pos) == fila.fila for pos in getattr(fila, atributo))
+
+				# Empezando en otra fila, y sin fin
+				assert [(fila.celdas, fila.paredes, fila.vertices) for fila in flujo.filas(modulo.Grilla, columnas, cantidad, 1)] == [(fila.celdas, fila.paredes, fila.vertices) for fila in filas[1:]]
+				sin_fin = list(islice(flujo.filas(modulo.Grilla, columnas), cantidad + 3))
+				alta = list(flujo.filas(modulo.Grilla, columnas, cantidad + 4))
+				assert [(fila.celdas, fila.paredes, fila.vertices) for fila in sin_fin] == [(fila.celdas, fila.paredes, fila.vertices) for fila in alta[:-1]]
+
+				# El autómata por filas, encadenando dos pasos
+				capa = grilla.agregar_capa("estados", dtype="int8")
+				capa.datos[:] = generador.randint(0, 2, grilla.rango_celdas)
+				assert [fila.tolist() for fila in flujo.leer(capa)] == capa.datos.reshape(cantidad, columnas).tolist()
+				pasos = flujo.automata(modulo.Grilla, columnas, flujo.automata(modulo.Grilla, columnas, flujo.leer(capa), regla), regla)
+				por_filas = numpy.concatenate(list(pasos))
+				automata.Automata(grilla, capa, regla).paso(2)
+				assert (por_filas == capa.datos).all(), (modulo.__name__, columnas, cantidad)
+
+	assert list(flujo.ventana(range(4), 3)) == [(0, (None, 0, 1)), (1, (0, 1, 2)), (2, (1, 2, 3)), (3, (2, 3, None))]
+	assert list(flujo.ventana(range(2), 5, -1)) == [(0, (-1, -1, 0, 1, -1)), (1, (-1, 0, 1, -1, -1))]
+	assert list(flujo.ventana([], 3)) == []
+
+def medir(modulo, filas, columnas):
+	'''Mide un paso de autómata por filas y sobre la grilla completa'''
+	regla = automata.Vida() if modulo is cuad else automata.Vida((2,), (3, 4))
+	generador = numpy.random.RandomState(SEMILLA)
+	datos = [generador.randint(0, 2, columnas).astype("int8") for _ in xrange(filas)]
+
+	inicio = time.time()
+	for _ in flujo.automata(modulo.Grilla, columnas, iter(datos), regla):
+		pass
+	por_filas = time.time() - inicio
+
+	grilla = modulo.Grilla(filas, columnas, compacta=True)
+	capa = grilla.agregar_capa("estados", dtype="int8")
+	capa.datos[:] = numpy.concatenate(datos)
+	inicio = time.time()
+	automata.Automata(grilla, capa, regla).paso()
+	completa = time.time() - inicio
+
+	print("%-5s %dx%d  por filas: %8.0f filas/s  grilla completa: %8.0f filas/s" % (modulo.__name__, filas, columnas, filas / por_filas, filas / completa))
+
+if __name__ == "__main__":
+	filas = int(sys.argv[1]) if len(sys.argv) > 1 else FILAS
+	columnas = int(sys.argv[2]) if len(sys.argv) > 2 else COLUMNAS
+	comprobar()
+
+	for modulo in (cuad, exa):
+		medir(modulo, filas, columnas)
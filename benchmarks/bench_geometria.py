@@ -0,0 +1,193 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de la geometría de las grillas. Mide los microsegundos por
+punto de ubicar la celda de un punto, de a uno y con arreglos, y los
+milisegundos por consulta de las celdas de un rectángulo, y los compara
+con buscar la celda de centro más cercano y las celdas del rectángulo
+recorriendo todas las celdas. Mide también los milisegundos de generar
+los buffers de vértices, polígonos y paredes de una grilla de
+BUFFERS x BUFFERS, y los compara con calcular en Python las
+coordenadas de los vértices de cada celda, estimados a partir de sus
+primeras FILAS filas.
+
+Antes comprueba en grillas chicas la celda, la pared y el vértice de
+puntos al azar contra los polígonos de las celdas, y las celdas de
+rectángulos al azar contra las de recorrer todas las celdas, y los
+buffers contra _Celda.vertices() y _Pared.vertices().
+
+Uso: python bench_geometria.py [lado] [buffers]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import cuad
+import exa
+import geometria
+
+LADO = 200
+PUNTOS = 1000
+BUFFERS = 500
+FILAS = 20
+
+def recorriendo(geo, x, y):
+	'''Celda de centro más cercano al punto, recorriendo las celdas'''
+	grilla = geo.grilla
+	mejor = None
+	for f in xrange(grilla.cant_filas):
+		for c in xrange(grilla.cant_columnas):
+			cx, cy = geo.centro((f, c))
+			d = (cx - x)**2 + (cy - y)**2
+			if mejor is None or d < mejor[0]:
+				mejor = (d, (f, c))
+	return mejor[1]
+
+def rectangulo_recorriendo(geo, x0, y0, x1, y1):
+	'''Celdas del rectángulo recorriendo las celdas'''
+	grilla = geo.grilla
+	mitad_ancho, mitad_alto = geo.ancho_celda / 2, geo.alto_celda / 2
+	res = []
+	for f in xrange(grilla.cant_filas):
+		for c in xrange(grilla.cant_columnas):
+			cx, cy = geo.centro((f, c))
+			if cx - mitad_ancho < x1 and cx + mitad_ancho > x0 and cy - mitad_alto < y1 and cy + mitad_alto > y0:
+				res.append(f*grilla.cant_columnas + c)
+	return res
+
+def poligonos_en_python(geo, modulo, filas):
+	'''Coordenadas de los vértices de las celdas de las primeras filas,
+	calculadas vértice por vértice'''
+	grilla = geo.grilla
+	res = []
+	for f in xrange(filas):
+		for c in xrange(grilla.cant_columnas):
+			cx, cy = geo.centro((f, c))
+			if modulo is exa:
+				angulos = (120, 60, 0, 300, 240, 180)  # NO, NE, E, SE, SO, O
+				res.append([(cx + geo.tamano*math.cos(math.radians(a)), cy - geo.tamano*math.sin(math.radians(a))) for a in angulos])
+			else:
+				ancho, alto = geo.tamano
+				res.append([(cx + dx*ancho/2, cy + dy*alto/2) for dx, dy in ((-1, -1), (1, -1), (1, 1), (-1, 1))])
+	return res
+
+def esquinas(geo, pos):
+	'''Vértices del polígono de la celda de pos, en el orden de
+	_Celda.vertices()'''
+	cx, cy = geo.centro(pos)
+	if isinstance(geo.grilla, exa.Grilla):
+		angulos = (120, 60, 0, 300, 240, 180)  # NO, NE, E, SE, SO, O
+		return [(cx + geo.tamano*math.cos(math.radians(a)), cy - geo.tamano*math.sin(math.radians(a))) for a in angulos]
+	ancho, alto = geo.tamano
+	return [(cx + dx*ancho/2, cy + dy*alto/2) for dx, dy in ((-1, -1), (1, -1), (1, 1), (-1, 1))]
+
+def distancia_segmento(x, y, a, b):
+	'''Distancia del punto (x, y) al segmento de a a b'''
+	dx, dy = b[0] - a[0], b[1] - a[1]
+	t = max(0.0, min(1.0, ((x - a[0])*dx + (y - a[1])*dy) / (dx*dx + dy*dy)))
+	return math.hypot(x - a[0] - t*dx, y - a[1] - t*dy)
+
+def dentro(x, y, puntos):
+	'''Indica si el punto (x, y) está dentro del polígono convexo de
+	puntos'''
+	signos = set()
+	for (ax, ay), (bx, by) in zip(puntos, puntos[1:] + puntos[:1]):
+		signos.add((bx - ax)*(y - ay) - (by - ay)*(x - ax) > 0)
+	return len(signos) == 1
+
+def comprobar():
+	'''Compara las consultas de Geometria con los polígonos de las
+	celdas y con recorrer todas las celdas'''
+	azar = numpy.random.RandomState(0)
+	for modulo, tamano in ((cuad, (10.0, 7.0)), (exa, 13.0)):
+		grilla = modulo.Grilla(7, 9)
+		geo = geometria.Geometria(grilla, tamano, origen=(5, -3))
+		poligonos = dict((pos, esquinas(geo, pos)) for pos in grilla._celdas)
+		nombres = ("NO", "NE", "SE", "SO") if modulo is cuad else ("NO", "NE", "E", "SE", "SO", "O")
+		lados = ("N", "E", "S", "O") if modulo is cuad else ("N", "NE", "SE", "S", "SO", "NO")  # Del vértice k al k+1
+
+		x0, y0, x1, y1 = geo.limites()
+		xs = azar.uniform(x0 - 20, x1 + 20, 2000)
+		ys = azar.uniform(y0 - 20, y1 + 20, 2000)
+		for x, y, indice in zip(xs.tolist(), ys.tolist(), geo.indices(xs, ys).tolist()):
+			pos = geo.celda(x, y)
+			contienen = [q for q, puntos in poligonos.items() if dentro(x, y, puntos)]
+			assert pos == (contienen[0] if contienen else None), (modulo.__name__, x, y)
+			assert indice == (-1 if pos is None else grilla.indice_celda(pos))
+			if pos is None:
+				continue
+
+			celda = grilla.get_celda(pos)
+			puntos = poligonos[pos]
+			distancias = [math.hypot(x - a, y - b) for a, b in puntos]
+			assert geo.vertice(x, y) == celda.get_vertice(nombres[distancias.index(min(distancias))]).id
+			distancias = [distancia_segmento(x, y, a, b) for a, b in zip(puntos, puntos[1:] + puntos[:1])]
+			assert geo.pared(x, y) == celda.get_pared(lados[distancias.index(min(distancias))]).id
+
+		for _ in xrange(300):
+			a, c = sorted(azar.uniform(x0 - 20, x1 + 20, 2))
+			b, d = sorted(azar.uniform(y0 - 20, y1 + 20, 2))
+			assert geo.rectangulo(a, b, c, d).tolist() == rectangulo_recorriendo(geo, a, b, c, d)
+
+		# Los buffers tienen la topología de los objetos y las
+		# coordenadas de los polígonos
+		coordenadas = geo.vertices_array()
+		celdas = sorted(grilla._celdas.values(), key=lambda celda: celda.indice)
+		for celda, indices in zip(celdas, geo.poligonos_array().tolist()):
+			vertices = celda.vertices()
+			assert indices == [vertices[nombre].indice for nombre in nombres]
+			assert numpy.allclose(coordenadas[indices], poligonos[celda.posicion], atol=1e-3)
+		paredes = sorted(grilla._paredes.values(), key=lambda pared: pared.indice)
+		for pared, indices in zip(paredes, geo.segmentos_array().tolist()):
+			vertices = pared.vertices()
+			assert indices == [vertices["A"].indice, vertices["B"].indice], pared.id
+		assert len(geo.segmentos_array()) == len(paredes)
+
+def segundos(funcion, veces=1):
+	'''Retorna los segundos por llamada de llamar veces a funcion'''
+	inicio = time.time()
+	for _ in xrange(veces):
+		funcion()
+	return (time.time() - inicio) / veces
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	buffers = int(sys.argv[2]) if len(sys.argv) > 2 else BUFFERS
+	comprobar()
+
+	numpy.random.seed(0)
+	for modulo in (cuad, exa):
+		grilla = modulo.Grilla(lado, lado, compacta=True)
+		geo = geometria.Geometria(grilla, 16)
+		x0, y0, x1, y1 = geo.limites()
+		xs = numpy.random.uniform(x0, x1, PUNTOS)
+		ys = numpy.random.uniform(y0, y1, PUNTOS)
+		puntos = zip(xs.tolist(), ys.tolist())
+
+		de_a_uno = segundos(lambda: [geo.celda(x, y) for x, y in puntos]) * 1e6 / PUNTOS
+		arreglo = segundos(lambda: geo.indices(xs, ys), 100) * 1e6 / PUNTOS
+		lento = segundos(lambda: [recorriendo(geo, x, y) for x, y in puntos[:5]]) * 1e6 / 5
+
+		vista = (x1 * 0.25, y1 * 0.25, x1 * 0.75, y1 * 0.75)
+		rectangulo = segundos(lambda: geo.rectangulo(*vista), 100) * 1e3
+		rect_lento = segundos(lambda: rectangulo_recorriendo(geo, *vista)) * 1e3
+
+		print("%-5s celda: %6.1f us  indices: %6.3f us/punto  recorriendo: %9.0f us  rectangulo: %6.2f ms  recorriendo: %7.0f ms" % (modulo.__name__, de_a_uno, arreglo, lento, rectangulo, rect_lento))
+
+	for modulo in (cuad, exa):
+		geo = geometria.Geometria(modulo.Grilla(buffers, buffers, compacta=True), 16)
+		vertices = segundos(geo.vertices_array) * 1e3
+		poligonos = segundos(geo.poligonos_array) * 1e3
+		segmentos = segundos(geo.segmentos_array) * 1e3
+		en_python = segundos(lambda: poligonos_en_python(geo, modulo, FILAS)) * 1e3 * buffers / FILAS
+		print("%-5s %dx%d vertices: %6.1f ms  poligonos: %6.1f ms  paredes: %6.1f ms  en Python: %7.0f ms" % (modulo.__name__, buffers, buffers, vertices, poligonos, segmentos, en_python))
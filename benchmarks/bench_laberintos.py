@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de los generadores de laberintos. Mide los laberintos por
+minuto de cada algoritmo sobre grillas cuadradas y hexagonales, y los
+compara con un recursive backtracker que recorre los objetos de la
+grilla con vecinas() y guarda las paredes abiertas en un conjunto.
+Antes comprueba en grillas chicas que cada algoritmo genera un árbol
+de expansión (todas las celdas conectadas con cant_celdas-1 paredes
+abiertas, y los bordes cerrados), que la misma semilla da el mismo
+laberinto y que la capa de paredes cerradas sirve para resolverlo con
+caminos de una esquina a la otra.
+
+Uso: python bench_laberintos.py [lado]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import caminos
+import capas
+import cuad
+import exa
+import laberintos
+import regiones
+import vision
+
+LADO = 50
+REPETICIONES = 5
+ALGORITMOS = ("kruskal", "prim", "backtracker", "wilson", "eller")
+
+def con_vecinas(grilla, semilla):
+	'''Recursive backtracker sobre los objetos de la grilla, como se
+	hacía sin el módulo laberintos'''
+	generador = random.Random(semilla)
+	inicio = grilla.get_celda((0, 0))
+	visitadas = set([inicio.posicion])
+	abiertas = set()
+	pila = [inicio]
+	while pila:
+		celda = pila[-1]
+		libres = [(lugar, vecina) for lugar, vecina in celda.vecinas().items() if vecina is not None and not vecina.posicion in visitadas]
+		if not libres:
+			pila.pop()
+			continue
+		lugar, vecina = generador.choice(libres)
+		abiertas.add(celda.get_pared(lugar).id)
+		visitadas.add(vecina.posicion)
+		pila.append(vecina)
+	return abiertas
+
+def comprobar():
+	'''Comprueba que los laberintos son árboles de expansión y que se
+	repiten con la misma semilla'''
+	for modulo in (cuad, exa):
+		for filas, columnas in ((9, 11), (1, 6), (5, 1)):
+			grilla = modulo.Grilla(filas, columnas)
+			for algoritmo in ALGORITMOS:
+				capa = laberintos.generar(grilla, algoritmo, semilla=7)
+				cerradas = capa.indices().tolist()
+				assert laberintos.generar(grilla, algoritmo, semilla=7).indices().tolist() == cerradas, (modulo.__name__, algoritmo)
+				assert capa.contar() == grilla.cant_paredes - (grilla.cant_celdas - 1), (modulo.__name__, algoritmo, filas, columnas)
+
+				cerradas = set(cerradas)
+				for pared in grilla._paredes.values():
+					if None in pared.celdas().values():
+						assert pared.indice in cerradas, (modulo.__name__, algoritmo, pared.id)
+				alcanzadas = set([(0, 0)])
+				pendientes = [grilla.get_celda((0, 0))]
+				while pendientes:
+					celda = pendientes.pop()
+					paredes = celda.paredes()
+					for lugar, vecina in celda.vecinas().items():
+						if vecina is not None and not paredes[lugar].indice in cerradas and not vecina.posicion in alcanzadas:
+							alcanzadas.add(vecina.posicion)
+							pendientes.append(vecina)
+				assert len(alcanzadas) == grilla.cant_celdas, (modulo.__name__, algoritmo, filas, columnas)
+
+				# El laberinto se resuelve de una esquina a la otra, y
+				# al ser un árbol el camino pasa por paredes abiertas
+				destino = (filas - 1, columnas - 1)
+				camino = caminos.Buscador(grilla, cerradas=capa).a_estrella((0, 0), destino)
+				assert camino is not None and camino[0] == (0, 0) and camino[-1] == destino, (modulo.__name__, algoritmo, filas, columnas)
+				for pos, siguiente in zip(camino, camino[1:]):
+					pared = [pared for pared in grilla.get_celda(pos).paredes().values() if set(c.posicion for c in pared.celdas().values() if c is not None) == set([pos, siguiente])]
+					assert len(pared) == 1 and not pared[0].indice in cerradas, (modulo.__name__, algoritmo, pos, siguiente)
+				assert regiones.Regiones(grilla, cerradas=capa).cantidad == 1, (modulo.__name__, algoritmo)
+
+				# La capa de bits tapa la vista igual que una capa común
+				muros = capas.Capa(grilla, "muros", "pared", "bool")
+				muros.datos[:] = capa.desempaquetar()
+				assert (vision.Vision(grilla, capa).visibles((0, 0), 5) == vision.Vision(grilla, muros).visibles((0, 0), 5)).all(), (modulo.__name__, algoritmo)
+
+def por_minuto(funcion, veces=REPETICIONES):
+	'''Retorna las veces por minuto que se puede llamar a funcion'''
+	inicio = time.time()
+	for k in xrange(veces):
+		funcion(k)
+	return veces * 60 / (time.time() - inicio)
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	comprobar()
+
+	for modulo in (cuad, exa):
+		grilla = modulo.Grilla(lado, lado)
+		linea = "%-5s vecinas(): %7.0f/min" % (modulo.__name__, por_minuto(lambda k: con_vecinas(grilla, k)))
+		grilla = modulo.Grilla(lado, lado, compacta=True)
+		for algoritmo in ALGORITMOS:
+			linea += "  %s: %7.0f/min" % (algoritmo, por_minuto(lambda k: laberintos.generar(grilla, algoritmo, semilla=k)))
+		print(linea)
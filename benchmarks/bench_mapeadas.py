@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de las capas mapeadas en memoria. Crea una capa de celdas
+en un archivo para una grilla lazy grande y mide el tiempo de leer
+valores de celdas al azar y de una fila, que solo cargan las páginas
+del archivo que se usan, comparándolo con cargar la capa completa en
+memoria.
+Antes comprueba en grillas chicas que los valores escritos en una capa
+mapeada quedan en el archivo en el desplazamiento indicado, que otra
+grilla y otro proceso que mapean el mismo archivo ven los mismos
+valores, que los modos "r" y "c" no modifican el archivo y que se
+rechazan los archivos más chicos que la capa.
+
+Uso: python bench_mapeadas.py [lado] [lecturas]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import cuad
+import exa
+
+LADO = 3000
+LECTURAS = 10000
+SEMILLA = 1
+
+def sumar(modulo, filas, columnas, archivo, desplazamiento, cola):
+	'''Mapea la capa del archivo en otra grilla, suma sus valores,
+	duplica el de la primera celda y pone la suma en cola. Se ejecuta
+	en otro proceso'''
+	grilla = modulo.Grilla(filas, columnas, compacta=True)
+	capa = grilla.agregar_capa("alturas", archivo=archivo, modo="r+", desplazamiento=desplazamiento)
+	cola.put(float(capa.datos.sum()))
+	capa[(0, 0)] *= 2
+	capa.sincronizar()
+
+def comprobar():
+	'''Compara los valores de las capas mapeadas con los del archivo y
+	con los que ven otras grillas y procesos'''
+	directorio = tempfile.mkdtemp()
+	generador = random.Random(SEMILLA)
+	try:
+		for modulo in (cuad, exa):
+			for filas, columnas in ((7, 8), (1, 5)):
+				archivo = os.path.join(directorio, "%s%dx%d.dat" % (modulo.__name__, filas, columnas))
+				grilla = modulo.Grilla(filas, columnas)
+
+				# Dos capas en el mismo archivo, una después de la otra. La
+				# segunda crea el archivo completo, y la primera lo abre
+				desplazamiento = grilla.rango_celdas * 8
+				paredes = grilla.agregar_capa("paredes", "pared", "int32", archivo=archivo, modo="w+", valor=3, desplazamiento=desplazamiento)
+				assert (paredes.datos == 3).all()
+				alturas = grilla.agregar_capa("alturas", archivo=archivo, modo="r+")
+				assert (alturas.datos == 0).all()
+				valores = {}
+				for pos in grilla.index_celdas():
+					valores[pos] = generador.random()
+					alturas[pos] = valores[pos]
+				for pared in grilla.index_paredes():
+					paredes[pared] = generador.randint(0, 1000)
+				alturas.sincronizar()
+				paredes.sincronizar()
+
+				en_archivo = numpy.fromfile(archivo, dtype="float64", count=grilla.rango_celdas)
+				assert all(en_archivo[grilla.indice_celda(pos)] == valor for pos, valor in valores.items())
+				en_archivo = numpy.fromfile(archivo, dtype="int32")[desplazamiento // 4:]
+				assert (en_archivo == paredes.datos).all()
+
+				# Otra grilla que mapea el archivo ve los mismos valores,
+				# y con modo None lo abre sin borrarlo
+				otra = modulo.Grilla(filas, columnas, lazy=True)
+				leida = otra.agregar_capa("alturas", archivo=archivo)
+				assert leida.modo == "r+"
+				assert all(leida[pos] == valor for pos, valor in valores.items())
+				assert (otra.agregar_capa("paredes", "pared", "int32", archivo=archivo, modo="r", desplazamiento=desplazamiento).datos == paredes.datos).all()
+
+				# Otro proceso ve los valores y sus cambios llegan a este
+				suma = float(alturas.datos.sum())
+				cola = multiprocessing.Queue()
+				proceso = multiprocessing.Process(target=sumar, args=(modulo, filas, columnas, archivo, 0, cola))
+				proceso.start()
+				assert cola.get() == suma
+				proceso.join()
+				assert proceso.exitcode == 0
+				assert alturas[(0, 0)] == 2 * valores[(0, 0)]
+				valores[(0, 0)] *= 2
+
+				# Los modos "r" y "c" no modifican el archivo
+				solo_lectura = modulo.Grilla(filas, columnas).agregar_capa("alturas", archivo=archivo, modo="r")
+				try:
+					solo_lectura[(0, 0)] = -1
+				except ValueError:
+					pass
+				else:
+					assert False, "Se escribió en una capa de solo lectura"
+				copia = modulo.Grilla(filas, columnas).agregar_capa("alturas", archivo=archivo, modo="c")
+				copia[(0, 0)] = -1
+				copia.sincronizar()
+				assert copia[(0, 0)] == -1
+				assert numpy.fromfile(archivo, dtype="float64", count=1)[0] == valores[(0, 0)]
+
+				# El archivo no alcanza para otra capa a continuación
+				try:
+					modulo.Grilla(filas, columnas).agregar_capa("alturas", archivo=archivo, modo="r", desplazamiento=os.path.getsize(archivo))
+				except ValueError:
+					pass
+				else:
+					assert False, "Se mapeó una capa fuera del archivo"
+	finally:
+		shutil.rmtree(directorio)
+
+def medir(modulo, lado, lecturas):
+	'''Mide las lecturas sobre una capa mapeada de una grilla lazy del
+	lado indicado'''
+	directorio = tempfile.mkdtemp()
+	try:
+		archivo = os.path.join(directorio, "alturas.dat")
+		modulo.Grilla(lado, lado, lazy=True).agregar_capa("alturas", archivo=archivo, modo="w+", valor=1).sincronizar()
+
+		generador = random.Random(SEMILLA)
+		posiciones = [(generador.randrange(lado), generador.randrange(lado)) for _ in xrange(lecturas)]
+
+		inicio = time.time()
+		grilla = modulo.Grilla(lado, lado, lazy=True)
+		capa = grilla.agregar_capa("alturas", archivo=archivo, modo="r")
+		total = sum(capa[pos] for pos in posiciones)
+		fila = capa.datos[grilla.indice_celda((lado // 2, 0)):grilla.indice_celda((lado // 2, lado - 1)) + 1].sum()
+		mapeada = time.time() - inicio
+		assert total == lecturas and fila == lado
+
+		inicio = time.time()
+		datos = numpy.fromfile(archivo, dtype="float64")
+		total = sum(datos[grilla.indice_celda(pos)] for pos in posiciones)
+		cargada = time.time() - inicio
+		assert total == lecturas
+
+		print("%-5s %dx%d (%d MB)  %d lecturas mapeando: %7.3f s  cargando el archivo: %7.3f s" % (
+			modulo.__name__, lado, lado, os.path.getsize(archivo) >> 20, lecturas, mapeada, cargada))
+	finally:
+		shutil.rmtree(directorio)
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	lecturas = int(sys.argv[2]) if len(sys.argv) > 2 else LECTURAS
+	comprobar()
+
+	for modulo in (cuad, exa):
+		medir(modulo, lado, lecturas)
@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Reporte de memoria de las grillas. Para cada tipo de grilla crea
+todos los elementos, en una grilla normal y en una lazy recorrida
+completa, y mide cuánto crece la memoria del proceso y cuántos bytes
+ocupa cada objeto. Cada medición se hace en un proceso aparte para que
+no la afecte la memoria que dejan las anteriores.
+
+Uso: python bench_memoria.py [lado]
+
+La medición usa el pico de memoria residente del proceso, por lo que
+solo es exacta en Linux.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import multiprocessing
+import os
+import resource
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cuad
+import exa
+
+LADO = 1000
+
+def tamano(objeto):
+	'''Retorna los bytes que ocupa objeto, incluyendo su diccionario
+	de atributos si lo tiene'''
+	res = sys.getsizeof(objeto)
+	if hasattr(objeto, "__dict__"):
+		res += sys.getsizeof(objeto.__dict__)
+	return res
+
+def medir(modulo, lado, lazy, cola):
+	'''Crea la grilla con todos sus elementos y pone en cola la
+	cantidad de elementos, el crecimiento de la memoria en kB y los
+	bytes de una celda'''
+	antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	grilla = modulo.Grilla(lado, lado, lazy=lazy)
+	if lazy:  # Se crean todos los elementos recorriéndolos
+		for coleccion in (grilla._celdas, grilla._paredes, grilla._vertices):
+			for _ in coleccion.values():
+				pass
+	despues = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	elementos = grilla.cant_celdas + grilla.cant_paredes + grilla.cant_vertices
+	cola.put((elementos, despues - antes, tamano(grilla.get_celda((0, 0)))))
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+
+	for modulo in (cuad, exa):
+		for lazy in (False, True):
+			cola = multiprocessing.Queue()
+			proceso = multiprocessing.Process(target=medir, args=(modulo, lado, lazy, cola))
+			proceso.start()
+			elementos, memoria, celda = cola.get()
+			proceso.join()
+			print("%-5s lazy=%-5s %dx%d: %9d elementos %9.1f MB %6.1f bytes/elemento (celda: %d bytes)" % (modulo.__name__, lazy, lado, lado, elementos, memoria / 1024.0, memoria * 1024.0 / elementos, celda))
@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de guardado y carga de grillas. Mide el tiempo de guardar
+y cargar grillas cuadradas y hexagonales de distintos tamaños con el
+formato binario de persistencia y con pickle, y lo compara con el de
+construirlas desde cero.
+Antes comprueba en grillas chicas, con distintas opciones, tablas de
+adyacencia y capas (comunes, mapeadas en memoria y de bits), que la
+grilla cargada tiene las mismas dimensiones, opciones, tablas, valores
+de las capas y relaciones que la original, con el formato binario y
+con pickle; que se cargan los archivos de la versión 1 del formato y
+se rechazan los de una versión posterior.
+
+Uso: python bench_persistencia.py [lado1 lado2 ...]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import pickle
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import capas
+import cuad
+import exa
+import persistencia
+
+LADOS = (100, 300, 1000)
+MODOS = ({}, {"compacta": True}, {"lazy": True, "cache": 5}, {"memorizar": True})
+SEMILLA = 1
+
+def preparar(modulo, modo, directorio):
+	'''Crea una grilla chica con tablas de adyacencia y capas de cada
+	clase con valores al azar'''
+	generador = numpy.random.RandomState(SEMILLA)
+	grilla = modulo.Grilla(5, 7, **modo)
+	grilla.construir_adyacencias(["celda_vecinas", "pared_celdas"])
+	grilla.agregar_capa("alturas").datos[:] = generador.rand(grilla.rango_celdas)
+	grilla.agregar_capa(u"daño", "pared", "int16").datos[:] = generador.randint(-100, 100, grilla.rango_paredes)
+	mapeada = grilla.agregar_capa("luz", "vertice", "float32", archivo=os.path.join(directorio, "luz.dat"), modo="w+")
+	mapeada.datos[:] = generador.rand(grilla.rango_vertices)
+	bits = grilla.agregar_bits("cerradas", "pared")
+	bits.poner(numpy.flatnonzero(generador.rand(grilla.rango_paredes) < 0.5))
+	return grilla
+
+def comparar(original, cargada, mapeadas_en_memoria):
+	'''Verifica que la grilla cargada es igual a la original'''
+	assert type(cargada) is type(original)
+	estado, otro = original.__getstate__(), cargada.__getstate__()
+	for clave in ("filas", "columnas", "compacta", "lazy", "cache", "memorizar", "tesela", "adyacencias"):
+		assert estado[clave] == otro[clave], clave
+
+	for nombre in estado["adyacencias"]:
+		assert list(original.adyacencia(nombre).indices) == list(cargada.adyacencia(nombre).indices), nombre
+
+	assert sorted(original.index_capas()) == sorted(cargada.index_capas())
+	for nombre in original.index_capas():
+		capa, otra = original.get_capa(nombre), cargada.get_capa(nombre)
+		assert capa.tipo == otra.tipo, nombre
+		if isinstance(capa, capas.CapaBits):
+			assert isinstance(otra, capas.CapaBits), nombre
+			assert (capa.indices() == otra.indices()).all(), nombre
+			continue
+		assert capa.dtype == otra.dtype, nombre
+		assert (capa.datos == otra.datos).all(), nombre
+		if capa.archivo is not None:
+			# El formato binario carga en memoria las capas mapeadas
+			assert (otra.archivo is None) == mapeadas_en_memoria, nombre
+
+	for pos in original.index_celdas():
+		celda, otra = original.get_celda(pos), cargada.get_celda(pos)
+		assert dict((k, v.id) for k, v in celda.paredes().items()) == dict((k, v.id) for k, v in otra.paredes().items()), pos
+		assert dict((k, v and v.posicion) for k, v in celda.vecinas().items()) == dict((k, v and v.posicion) for k, v in otra.vecinas().items()), pos
+
+def comprobar():
+	'''Compara las grillas guardadas y cargadas con las originales'''
+	directorio = tempfile.mkdtemp()
+	try:
+		for modulo in (cuad, exa):
+			for modo in MODOS:
+				grilla = preparar(modulo, modo, directorio)
+
+				archivo = os.path.join(directorio, "grilla.bin")
+				persistencia.guardar(grilla, archivo)
+				comparar(grilla, persistencia.cargar(archivo), True)
+				datos = persistencia.serializar(grilla)
+				comparar(grilla, persistencia.deserializar(datos), True)
+				assert struct.unpack_from("<4sH", datos) == (persistencia.MAGIA, persistencia.VERSION)
+
+				for protocolo in (0, pickle.HIGHEST_PROTOCOL):
+					cargada, capa = pickle.loads(pickle.dumps((grilla, grilla.get_capa("alturas")), protocolo))
+					comparar(grilla, cargada, False)
+					assert capa is cargada.get_capa("alturas")  # Las capas sueltas vuelven a su grilla
+
+				# La versión 1 es la misma sin capas de bits
+				del grilla._capas["cerradas"]
+				datos = persistencia.serializar(grilla)
+				anterior = datos[:4] + struct.pack("<H", 1) + datos[6:]
+				comparar(grilla, persistencia.deserializar(anterior), True)
+				posterior = datos[:4] + struct.pack("<H", persistencia.VERSION + 1) + datos[6:]
+				try:
+					persistencia.deserializar(posterior)
+				except ValueError:
+					pass
+				else:
+					assert False, "Se cargó una versión posterior"
+				try:
+					persistencia.deserializar(datos[:-1])
+				except ValueError:
+					pass
+				else:
+					assert False, "Se cargó un archivo incompleto"
+	finally:
+		shutil.rmtree(directorio)
+
+def cronometrar(funcion, *args):
+	'''Retorna el resultado de llamar a funcion y el tiempo en
+	segundos que tardó'''
+	inicio = time.time()
+	resultado = funcion(*args)
+	return resultado, time.time() - inicio
+
+if __name__ == "__main__":
+	lados = [int(lado) for lado in sys.argv[1:]] or LADOS
+	comprobar()
+
+	for modulo in (cuad, exa):
+		for lado in lados:
+			grilla, construccion = cronometrar(modulo.Grilla, lado, lado)
+			grilla.agregar_capa("alturas").datos[:] = numpy.random.rand(grilla.rango_celdas)
+			datos, guardado = cronometrar(persistencia.serializar, grilla)
+			_, carga = cronometrar(persistencia.deserializar, datos)
+			volcado, pickleado = cronometrar(pickle.dumps, grilla, pickle.HIGHEST_PROTOCOL)
+			_, despickleado = cronometrar(pickle.loads, volcado)
+			print("%-5s %5dx%-5d construcción: %7.2f s  guardar: %7.2f s  cargar: %7.2f s  pickle: %7.2f s  unpickle: %7.2f s  (%d bytes)" % (
+				modulo.__name__, lado, lado, construccion, guardado, carga, pickleado, despickleado, len(datos)))
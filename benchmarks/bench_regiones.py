@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de las regiones conexas. Crea grillas cuadradas y
+hexagonales con una fracción de paredes cerradas al azar y mide las
+celdas por milisegundo que se etiquetan con Regiones, comparándolas
+con un relleno por inundación que recorre los objetos de las celdas
+con vecinas(). También mide la unión incremental al abrir paredes.
+Antes comprueba en grillas chicas que las regiones coinciden con las
+del relleno por inundación, que las etiquetas se numeran en el orden
+de la primera celda de cada región, y que después de abrir paredes con
+abrir las regiones coinciden con las de un cálculo desde cero.
+
+Uso: python bench_regiones.py [lado] [cerradas]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import cuad
+import exa
+import regiones
+
+LADO = 300
+CERRADAS = 0.5
+SEMILLA = 1
+CAMBIOS = 1000
+
+def inundar(grilla, abiertas):
+	'''Regiones de la grilla calculadas con un relleno por inundación
+	sobre los objetos de las celdas. Retorna un conjunto con las
+	posiciones de cada región'''
+	res = set()
+	visitadas = set()
+	for pos in grilla.index_celdas():
+		if pos in visitadas:
+			continue
+		region = set([pos])
+		pendientes = [pos]
+		while pendientes:
+			celda = grilla.get_celda(pendientes.pop())
+			paredes = celda.paredes()
+			for lugar, vecina in celda.vecinas().items():
+				if vecina is not None and abiertas[paredes[lugar]] and not vecina.posicion in region:
+					region.add(vecina.posicion)
+					pendientes.append(vecina.posicion)
+		visitadas |= region
+		res.add(frozenset(region))
+	return res
+
+def particion(calculadas):
+	'''Conjunto con las posiciones de cada región de calculadas, a
+	partir de las etiquetas'''
+	grupos = {}
+	for pos in calculadas.grilla.index_celdas():
+		grupos.setdefault(calculadas.etiqueta(pos), set()).add(pos)
+	return set(frozenset(grupo) for grupo in grupos.values())
+
+def pasable(grilla, fraccion, generador):
+	'''Agrega a grilla una capa de paredes con la fracción indicada de
+	paredes cerradas al azar'''
+	capa = grilla.agregar_capa("abiertas", "pared", "int8", 1)
+	capa.datos[:] = numpy.array([generador.random() >= fraccion for _ in xrange(len(capa))])
+	return capa
+
+def comprobar():
+	'''Compara las regiones con las del relleno por inundación, antes y
+	después de abrir paredes'''
+	generador = random.Random(SEMILLA)
+	for modulo in (cuad, exa):
+		for filas, columnas in ((9, 11), (1, 6), (5, 1)):
+			for fraccion in (0.3, 0.6, 1.0):
+				grilla = modulo.Grilla(filas, columnas)
+				capa = pasable(grilla, fraccion, generador)
+				calculadas = regiones.Regiones(grilla, "abiertas")
+
+				esperadas = inundar(grilla, capa)
+				assert particion(calculadas) == esperadas, (modulo.__name__, filas, columnas, fraccion)
+				assert calculadas.cantidad == len(esperadas)
+
+				# Las etiquetas siguen el orden del índice de la primera
+				# celda de cada región
+				primeras = sorted(min(grilla.indice_celda(pos) for pos in region) for region in esperadas)
+				assert [calculadas.etiqueta(grilla.posicion_celda(i)) for i in primeras] == range(len(esperadas))
+				for region in esperadas:
+					etiqueta = calculadas.etiqueta(next(iter(region)))
+					assert calculadas.tamano(etiqueta) == len(region)
+					assert set(calculadas.celdas(etiqueta)) == region
+
+				# Se abren las paredes cerradas de a pocas
+				cerradas = [int(i) for i in grilla.paredes_array().ravel() if capa.datos[i] == 0]
+				generador.shuffle(cerradas)
+				while cerradas:
+					abrir, cerradas = cerradas[:3], cerradas[3:]
+					capa.datos[abrir] = 1
+					calculadas.abrir(abrir)
+					esperadas = inundar(grilla, capa)
+					assert particion(calculadas) == esperadas, (modulo.__name__, filas, columnas, fraccion)
+					assert calculadas.cantidad == len(esperadas)
+					assert sum(calculadas.tamano(calculadas.etiqueta(next(iter(region)))) for region in esperadas) == grilla.cant_celdas
+				assert calculadas.cantidad == 1
+
+def medir(modulo, lado, fraccion):
+	'''Mide el etiquetado y la unión incremental en una grilla del lado
+	indicado'''
+	generador = random.Random(SEMILLA)
+	grilla = modulo.Grilla(lado, lado, lazy=True)
+	capa = pasable(grilla, fraccion, generador)
+
+	inicio = time.time()
+	calculadas = regiones.Regiones(grilla, "abiertas")
+	etiquetado = time.time() - inicio
+
+	# El relleno por inundación se mide sobre una grilla más chica,
+	# que recorre los objetos de todas las celdas
+	chico = modulo.Grilla(lado // 4, lado // 4)
+	capa_chica = pasable(chico, fraccion, generador)
+	inicio = time.time()
+	inundar(chico, capa_chica)
+	inundacion = time.time() - inicio
+
+	cerradas = numpy.flatnonzero(capa.datos[grilla.paredes_array().ravel()] == 0)
+	abrir = numpy.unique(grilla.paredes_array().ravel()[cerradas])[:CAMBIOS]
+	capa.datos[abrir] = 1
+	inicio = time.time()
+	calculadas.abrir([int(i) for i in abrir])
+	union = time.time() - inicio
+
+	print("%-5s %dx%d  inundación: %8.0f celdas/ms  Regiones: %8.0f celdas/ms  abrir %d paredes: %7.2f ms" % (
+		modulo.__name__, lado, lado, chico.cant_celdas / (inundacion * 1e3), grilla.cant_celdas / (etiquetado * 1e3), len(abrir), union * 1e3))
+
+if __name__ == "__main__":
+	lado = int(sys.argv[1]) if len(sys.argv) > 1 else LADO
+	fraccion = float(sys.argv[2]) if len(sys.argv) > 2 else CERRADAS
+	comprobar()
+
+	for modulo in (cuad, exa):
+		medir(modulo, lado, fraccion)
@@ -0,0 +1,156 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark de regresión para las consultas de vecindad. Recorre 
+todas las celdas de grillas de distinto tamaño pidiendo sus vecinas y
+verifica que el tiempo por celda se mantenga constante, es decir que
+el recorrido completo escale linealmente con el tamaño de la grilla.
+
+Uso: python bench_vecinas.py [lado1 lado2 ...]
+
+También compara, en la grilla más grande, el recorrido pidiendo
+vecinas() y una pared con get_pared() con y sin las tablas de
+adyacencia.
+
+Termina con código de error 1 si el tiempo por celda de la grilla más
+grande supera en más de TOLERANCIA veces al de la más chica, o si con
+las tablas de adyacencia el recorrido no es más rápido.
+
+Antes comprueba en grillas chicas que todos los modos de
+almacenamiento (compacta, lazy, con caché, con teselas, memorizando y
+con tablas de adyacencia) devuelven las mismas relaciones que la
+grilla común, que las relaciones son simétricas y que
+vecinas_array y paredes_array coinciden con _Celda.vecinas y
+_Celda.paredes.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cuad
+import exa
+
+LADOS = (50, 100, 200, 400)
+TOLERANCIA = 2.0
+
+# Relaciones de cada tipo de elemento
+RELACIONES = {
+	"celda": ("paredes", "vecinas", "vertices"),
+	"pared": ("vertices", "celdas", "continuaciones"),
+	"vertice": ("paredes", "celdas"),
+}
+MODOS = ({"compacta": True}, {"lazy": True}, {"lazy": True, "cache": 5},
+         {"tesela": 3, "cache": 2}, {"memorizar": True}, {"adyacencias": True},
+         {"compacta": True, "adyacencias": True})
+
+def recorrer(grilla):
+	'''Pide las vecinas de todas las celdas de la grilla y retorna el
+	tiempo por celda en microsegundos'''
+	celdas = [grilla.get_celda(pos) for pos in grilla.index_celdas()]
+	inicio = time.time()
+	for celda in celdas:
+		celda.vecinas()
+	return (time.time() - inicio) * 1e6 / len(celdas)
+
+def recorrer_paredes(grilla):
+	'''Pide las vecinas y la primera pared de todas las celdas de la
+	grilla y retorna el tiempo por celda en microsegundos'''
+	celdas = [grilla.get_celda(pos) for pos in grilla.index_celdas()]
+	lugar = "N"
+	inicio = time.time()
+	for celda in celdas:
+		celda.vecinas()
+		celda.get_pared(lugar)
+	return (time.time() - inicio) * 1e6 / len(celdas)
+
+def relaciones(grilla):
+	'''Retorna un diccionario con las relaciones de todos los
+	elementos de grilla, con los elementos reemplazados por su índice
+	lineal'''
+	res = {}
+	for tipo, coleccion in (("celda", grilla._celdas), ("pared", grilla._paredes), ("vertice", grilla._vertices)):
+		for pos in list(coleccion):
+			elemento = coleccion[pos]
+			for relacion in RELACIONES[tipo]:
+				res[(tipo, pos, relacion)] = dict((k, None if v is None else v.indice) for k, v in getattr(elemento, relacion)().items())
+	return res
+
+def comprobar():
+	'''Compara las relaciones de cada modo de almacenamiento con las de
+	la grilla común y verifica las operaciones en bloque'''
+	for modulo in (cuad, exa):
+		for filas, columnas in ((7, 8), (1, 5), (4, 1)):
+			comun = modulo.Grilla(filas, columnas)
+			esperadas = relaciones(comun)
+
+			# Cada vecina lo es a través de la misma pared en ambos sentidos
+			for celda in comun._celdas.values():
+				paredes = celda.paredes()
+				for lugar, vecina in celda.vecinas().items():
+					if vecina is not None:
+						assert paredes[lugar] in vecina.paredes().values(), (modulo.__name__, celda.posicion, lugar)
+						assert celda in paredes[lugar].celdas().values()
+
+			for modo in MODOS:
+				opciones = dict(modo)
+				adyacencias = opciones.pop("adyacencias", False)
+				grilla = modulo.Grilla(filas, columnas, **opciones)
+				if adyacencias:
+					grilla.construir_adyacencias()
+				assert relaciones(grilla) == esperadas, (modulo.__name__, filas, columnas, modo)
+				for existe, coleccion in ((grilla.existe_celda, comun._celdas), (grilla.existe_pared, comun._paredes), (grilla.existe_vertice, comun._vertices)):
+					assert all(existe(pos) for pos in coleccion)
+
+			vecinas = comun.vecinas_array()
+			paredes = comun.paredes_array()
+			lugares = ("N", "E", "S", "O") if modulo is cuad else ("NO", "N", "NE", "SE", "S", "SO")
+			for celda in comun._celdas.values():
+				esperada = celda.vecinas()
+				assert [-1 if esperada[k] is None else esperada[k].indice for k in lugares] == vecinas[celda.indice].tolist()
+				assert [celda.paredes()[k].indice for k in lugares] == paredes[celda.indice].tolist()
+			assert (comun.vecinas_array(1, filas) == vecinas[columnas:]).all()
+
+def medir(modulo, lados, compacta):
+	'''Mide el recorrido para cada lado y retorna True si escala 
+	linealmente'''
+	tiempos = []
+	for lado in lados:
+		grilla = modulo.Grilla(lado, lado, compacta=compacta)
+		tiempos.append(recorrer(grilla))
+		print("%-5s compacta=%-5s %5dx%-5d %8.3f us/celda" % (modulo.__name__, compacta, lado, lado, tiempos[-1]))
+
+	return tiempos[-1] <= TOLERANCIA * tiempos[0]
+
+def medir_tablas(modulo, lado):
+	'''Mide el recorrido de vecinas y paredes con y sin tablas de
+	adyacencia y retorna True si las tablas son más rápidas'''
+	grilla = modulo.Grilla(lado, lado)
+	sin_tablas = recorrer_paredes(grilla)
+	grilla.construir_adyacencias(["celda_vecinas", "celda_paredes"])
+	con_tablas = recorrer_paredes(grilla)
+	print("%-5s %5dx%-5d sin tablas: %8.3f us/celda  con tablas: %8.3f us/celda" % (modulo.__name__, lado, lado, sin_tablas, con_tablas))
+
+	return con_tablas < sin_tablas
+
+if __name__ == "__main__":
+	lados = [int(x) for x in sys.argv[1:]] or LADOS
+	comprobar()
+
+	lineal = True
+	for modulo in (cuad, exa):
+		for compacta in (False, True):
+			if not medir(modulo, lados, compacta):
+				print("%s compacta=%s no escala linealmente" % (modulo.__name__, compacta))
+				lineal = False
+		if not medir_tablas(modulo, lados[-1]):
+			print("%s las tablas de adyacencia no aceleran el recorrido" % modulo.__name__)
+			lineal = False
+
+	sys.exit(0 if lineal else 1)
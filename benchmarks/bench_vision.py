@@ -0,0 +1,180 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Benchmark del campo de visión. Mide los milisegundos por consulta de
+radio 50 sobre grillas cuadradas y hexagonales, sin paredes opacas y
+con una fracción de paredes opacas al azar, y los compara en la
+grilla cuadrada con lanzar un rayo hasta cada celda recorriendo las
+paredes con _Celda.get_pared.
+Antes comprueba que los anillos y rangos de coordenadas tienen 6r y
+3r(r+1)+1 celdas y coinciden con las distancias de una búsqueda en
+anchura sobre _Celda.vecinas, que coordenadas.linea no depende de dónde
+está el segmento y que el campo de visión hexagonal coincide con el de
+seguir coordenadas.linea hasta cada celda.
+
+Uso: python bench_vision.py [radio] [fraccion]
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+
+import numpy
+
+import coordenadas
+import cuad
+import exa
+import vision
+
+RADIO = 50
+FRACCION = 0.1
+CONSULTAS = 20
+
+def con_rayos(grilla, capa, pos, radio):
+	'''Celdas visibles lanzando un rayo desde el centro de pos hasta el
+	centro de cada celda del radio, que se corta en la primera pared
+	opaca que cruza'''
+	f0, c0 = pos
+	res = set([pos])
+	for f in xrange(max(0, f0-radio), min(grilla.cant_filas, f0+radio+1)):
+		for c in xrange(max(0, c0-radio), min(grilla.cant_columnas, c0+radio+1)):
+			if (f-f0)**2 + (c-c0)**2 > radio*radio or (f, c) == pos:
+				continue
+			pasos = 2 * max(abs(f-f0), abs(c-c0))
+			actual = grilla.get_celda(pos)
+			for k in xrange(1, pasos+1):
+				t = float(k) / pasos
+				siguiente = (int(round(f0 + (f-f0)*t)), int(round(c0 + (c-c0)*t)))
+				if siguiente == actual.posicion:
+					continue
+				df, dc = siguiente[0] - actual.posicion[0], siguiente[1] - actual.posicion[1]
+				if df and dc:
+					break  # Pasa por una esquina
+				pared = actual.get_pared({(-1, 0): "N", (1, 0): "S", (0, -1): "O", (0, 1): "E"}[(df, dc)])
+				if capa[pared]:
+					break
+				actual = grilla.get_celda(siguiente)
+			else:
+				res.add((f, c))
+	return res
+
+def con_lineas(grilla, capa, pos, radio):
+	'''Celdas visibles de una grilla hexagonal siguiendo
+	coordenadas.linea desde pos hasta cada celda del radio, que se
+	corta en la primera pared opaca que cruza'''
+	res = numpy.zeros(grilla.cant_celdas, dtype=bool)
+	for destino in coordenadas.rango(pos, radio, grilla):
+		linea = coordenadas.linea(pos, destino)
+		for a, b in zip(linea, linea[1:]):
+			if not grilla.existe_celda(b):
+				break
+			celda = grilla.get_celda(a)
+			direccion = [k for k, vecina in celda.vecinas().items() if vecina is not None and vecina.posicion == b][0]
+			if capa[celda.get_pared(direccion)]:
+				break
+		else:
+			res[grilla.indice_celda(destino)] = True
+	return res
+
+def distancias(grilla, centro):
+	'''Distancia desde la celda de centro hasta cada celda de grilla,
+	con una búsqueda en anchura sobre _Celda.vecinas'''
+	res = {centro: 0}
+	pendientes = [centro]
+	for pos in pendientes:
+		for vecina in grilla.get_celda(pos).vecinas().values():
+			if vecina is not None and not vecina.posicion in res:
+				res[vecina.posicion] = res[pos] + 1
+				pendientes.append(vecina.posicion)
+	return res
+
+def comprobar():
+	'''Comprueba los anillos y rangos de coordenadas, la invariancia
+	de coordenadas.linea y el campo de visión hexagonal en grillas
+	chicas con paredes opacas al azar'''
+	azar = random.Random(0)
+	grilla = exa.Grilla(15, 16)
+	for centro in ((7, 7), (7, 8), (0, 0), (14, 15), (3, 12)):
+		esperadas = distancias(grilla, centro)
+		for radio in xrange(8):
+			# Sin grilla los anillos y rangos están completos
+			anillo = list(coordenadas.anillo(centro, radio))
+			rango = list(coordenadas.rango(centro, radio))
+			assert len(anillo) == len(set(anillo)) == (6*radio if radio else 1), (centro, radio)
+			assert len(rango) == len(set(rango)) == 3*radio*(radio + 1) + 1, (centro, radio)
+			assert all(coordenadas.distancia(centro, pos) == radio for pos in anillo)
+			assert radio == 0 or all(coordenadas.distancia(anillo[k - 1], anillo[k]) == 1 for k in xrange(len(anillo)))  # Cerrado
+			assert sorted(coordenadas.espiral(centro, radio)) == sorted(rango)
+			for lista, arreglos in ((anillo, coordenadas.anillo_array(centro, radio)), (rango, coordenadas.rango_array(centro, radio)), (list(coordenadas.espiral(centro, radio)), coordenadas.espiral_array(centro, radio))):
+				assert lista == zip(arreglos[0].tolist(), arreglos[1].tolist()), (centro, radio)
+
+			# Con grilla son las celdas a esa distancia en la grilla
+			assert sorted(coordenadas.anillo(centro, radio, grilla)) == sorted(pos for pos, d in esperadas.items() if d == radio), (centro, radio)
+			assert sorted(coordenadas.rango(centro, radio, grilla)) == sorted(pos for pos, d in esperadas.items() if d <= radio), (centro, radio)
+			filas, columnas = coordenadas.rango_array(centro, radio, grilla)
+			assert sorted(zip(filas.tolist(), columnas.tolist())) == sorted(coordenadas.rango(centro, radio, grilla))
+
+		for pos, d in esperadas.items():
+			assert coordenadas.distancia(centro, pos) == d, (centro, pos)
+			assert coordenadas.desde_cubo(coordenadas.a_cubo(pos)) == pos
+			assert coordenadas.desde_axial(coordenadas.a_axial(pos)) == pos
+			assert coordenadas.rotar(pos, centro, 6) == pos
+			assert coordenadas.distancia(centro, coordenadas.rotar(pos, centro, azar.randint(-5, 5))) == d
+		for lugar, vecina in grilla.get_celda(centro).vecinas().items():
+			if vecina is not None:
+				assert coordenadas.vecina(centro, lugar) == vecina.posicion, (centro, lugar)
+
+	for _ in xrange(2000):
+		a = (azar.randint(-20, 20), azar.randint(-20, 20))
+		b = (azar.randint(-20, 20), azar.randint(-20, 20))
+		df, dc = azar.randint(-10, 10), 2*azar.randint(-10, 10)  # Mantiene la paridad
+		linea = coordenadas.linea(a, b)
+		movida = coordenadas.linea((a[0] + df, a[1] + dc), (b[0] + df, b[1] + dc))
+		assert movida == [(f + df, c + dc) for f, c in linea], (a, b)
+
+	for _ in xrange(30):
+		grilla = exa.Grilla(12, 13)
+		capa = grilla.agregar_capa("opacas", "pared", "int8")
+		capa.datos[:] = numpy.random.rand(len(capa.datos)) < 0.15
+		pos = (azar.randrange(12), azar.randrange(13))
+		radio = azar.choice((2, 5, 12))
+		assert (vision.Vision(grilla, capa).visibles(pos, radio) == con_lineas(grilla, capa, pos, radio)).all(), (pos, radio)
+
+def milisegundos(funcion, veces=CONSULTAS):
+	'''Retorna los milisegundos por llamada de llamar veces a funcion'''
+	inicio = time.time()
+	for _ in xrange(veces):
+		funcion()
+	return (time.time() - inicio) * 1000 / veces
+
+if __name__ == "__main__":
+	radio = int(sys.argv[1]) if len(sys.argv) > 1 else RADIO
+	fraccion = float(sys.argv[2]) if len(sys.argv) > 2 else FRACCION
+	lado = 2*radio + 3
+	centro = (lado // 2, lado // 2)
+
+	numpy.random.seed(0)
+	comprobar()
+	for modulo in (cuad, exa):
+		grilla = modulo.Grilla(lado, lado, compacta=True)
+		capa = grilla.agregar_capa("opacas", "pared", "int8")
+		motor = vision.Vision(grilla, capa)
+		motor.visibles(centro, radio)  # Prepara el árbol de líneas
+		abierta = milisegundos(lambda: motor.visibles(centro, radio))
+
+		capa.datos[:] = numpy.random.rand(len(capa.datos)) < fraccion
+		motor.actualizar()
+		muros = milisegundos(lambda: motor.visibles(centro, radio))
+
+		linea = "%-5s abierta: %7.2f ms  %.0f%% opacas: %7.2f ms" % (modulo.__name__, abierta, fraccion*100, muros)
+		if modulo is cuad:
+			linea += "  rayos con get_pared: %7.0f ms" % milisegundos(lambda: con_rayos(grilla, capa, centro, radio), 1)
+		print(linea)
@@ -0,0 +1,396 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para buscar caminos entre celdas de una grilla cuadrada o
+hexagonal. La búsqueda trabaja directamente sobre los índices lineales
+de la grilla, sin crear los objetos de las celdas, y puede respetar
+una capa de paredes que indique cuáles se pueden atravesar y una capa
+de celdas con el costo de entrar en cada una.
+Se implementan los algoritmos A*, que usa como heurística la distancia
+de la grilla (Manhattan para las cuadradas y cúbica para las
+hexagonales), y Dijkstra.
+También se puede calcular un campo de distancias, con el costo desde
+cada celda de la grilla hasta el más cercano de un conjunto de
+destinos, que se mantiene al día cuando cambian algunas paredes sin
+volver a calcularlo completo.
+
+Para hacer muchas búsquedas sobre la misma grilla conviene crear un
+Buscador y reutilizarlo, ya que al crearlo se preparan los arreglos
+con la topología de la grilla:
+
+>>> buscador = Buscador(grilla, pasable="abiertas")
+>>> camino = buscador.a_estrella((0, 0), (10, 25))
+
+Las paredes de un laberinto generado con el módulo laberintos se
+indican como cerradas:
+
+>>> buscador = Buscador(grilla, cerradas=laberintos.generar(grilla))
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import heapq
+from array import array
+from collections import deque
+
+import almacen
+import capas
+
+class Buscador(object):
+	"""Buscador de caminos entre las celdas de una grilla"""
+	def __init__(self, grilla, pasable=None, costo=None, cerradas=None):
+		'''Prepara la búsqueda de caminos en grilla. pasable es una
+		capa de paredes (o su nombre) en la que un valor distinto de
+		cero indica que la pared se puede atravesar; si es None se
+		pueden atravesar todas. costo es una capa de celdas (o su
+		nombre) con el costo, mayor que cero, de entrar en cada
+		celda; si es None todas cuestan 1. cerradas se puede usar en
+		lugar de pasable con una capa en la que un valor distinto de
+		cero indica que la pared no se puede atravesar, como la capa de
+		bits de laberintos.generar'''
+		almacen.requiere_numpy()
+
+		self._grilla = grilla
+		self._pasable = capas.obtener_pasable(grilla, pasable, cerradas)
+		self._costo = capas.obtener(grilla, costo, "celda")
+
+		self._vecinas = grilla.vecinas_array()
+		self._paredes = grilla.paredes_array()
+		self._grado = self._vecinas.shape[1]
+
+		self.actualizar()
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla en la que se buscan los caminos'''
+		return self._grilla
+
+	def actualizar(self):
+		'''Vuelve a leer las capas pasable y costo. Se debe llamar
+		después de modificarlas para que las búsquedas siguientes
+		tengan en cuenta los cambios'''
+		numpy = almacen.requiere_numpy()
+
+		# Para cada celda y posición relativa se guarda el índice de
+		# la vecina a la que se puede pasar, o -1 si es un borde o la
+		# pared está cerrada
+		if self._pasable is None:
+			salidas = self._vecinas
+		else:
+			abiertas = self._pasable.datos[self._paredes] != 0
+			salidas = numpy.where(abiertas, self._vecinas, -1)
+		self._salidas = almacen.plano(salidas)
+
+		if self._costo is None:
+			self._costos = None
+			self._costo_minimo = 1
+		else:
+			if len(self._costo.datos) and self._costo.datos.min() <= 0:
+				raise ValueError("Los costos de las celdas deben ser mayores que cero")
+			self._costos = almacen.plano(self._costo.datos, 'd')
+			self._costo_minimo = min(self._costos) if len(self._costos) else 1
+
+	def a_estrella(self, origen, destino):
+		'''Retorna el camino de menor costo entre las celdas de las
+		posiciones origen y destino, usando el algoritmo A*. El
+		camino es una lista de posiciones de celdas que empieza en
+		origen y termina en destino, o None si no hay camino'''
+		return self._buscar(origen, destino, True)
+
+	def dijkstra(self, origen, destino):
+		'''Retorna el camino de menor costo entre las celdas de las
+		posiciones origen y destino, usando el algoritmo de Dijkstra.
+		El camino es una lista de posiciones de celdas que empieza en
+		origen y termina en destino, o None si no hay camino'''
+		return self._buscar(origen, destino, False)
+
+	def actualizar_paredes(self, paredes):
+		'''Vuelve a leer de la capa pasable solo las paredes indicadas,
+		que pueden ser posiciones, paredes o índices lineales. Es más
+		rápido que actualizar cuando cambian pocas paredes. Retorna
+		una lista de tuplas (i, j, abierta) con los pasos entre celdas
+		vecinas que se leyeron, en ambos sentidos'''
+
+		if self._pasable is None:
+			return []
+
+		grilla = self._grilla
+		grado = self._grado
+		pasos = []
+		for pared in paredes:
+			p = self._pasable.indice(pared)
+			abierta = self._pasable[p]
+			for celda in grilla.get_pared_indice(p).celdas().values():
+				if celda is None:  # La pared es un borde
+					continue
+				i = celda.indice
+				for k in xrange(grado):
+					j = int(self._vecinas[i, k])
+					if j >= 0 and self._paredes[i, k] == p:
+						self._salidas[i*grado + k] = j if abierta else -1
+						pasos.append((i, j, abierta))
+		return pasos
+
+	def _buscar(self, origen, destino, heuristica):
+		'''Búsqueda de A* o, si heuristica es False, de Dijkstra'''
+
+		grilla = self._grilla
+		inicio = grilla.indice_celda(origen)
+		fin = grilla.indice_celda(destino)
+
+		columnas = grilla.cant_columnas
+		grado = self._grado
+		salidas = self._salidas
+		costos = self._costos
+		distancia = grilla.distancia
+
+		# La heurística se multiplica por el costo mínimo para que
+		# nunca sobreestime el costo real
+		factor = self._costo_minimo if heuristica else 0
+
+		costo = {inicio: 0}  # Menor costo conocido desde el origen
+		padre = {inicio: None}
+		cerradas = set()
+
+		# Las entradas son (costo + heurística, heurística, índice),
+		# para desempatar a favor de las celdas más cercanas al
+		# destino
+		h = factor * distancia(origen, destino)
+		abiertas = [(h, h, inicio)]
+
+		while abiertas:
+			_, _, i = heapq.heappop(abiertas)
+			if i == fin:
+				return self._reconstruir(padre, fin)
+			if i in cerradas:  # Entrada vieja de una celda ya resuelta
+				continue
+			cerradas.add(i)
+
+			costo_i = costo[i]
+			for k in xrange(i*grado, (i+1)*grado):
+				j = salidas[k]
+				if j < 0 or j in cerradas:  # Borde, pared cerrada o celda resuelta
+					continue
+
+				costo_j = costo_i + (costos[j] if costos is not None else 1)
+				if costo_j < costo.get(j, costo_j + 1):
+					costo[j] = costo_j
+					padre[j] = i
+					h = factor * distancia(divmod(j, columnas), destino) if factor else 0
+					heapq.heappush(abiertas, (costo_j + h, h, j))
+
+		return None
+
+	def _reconstruir(self, padre, fin):
+		'''Arma la lista de posiciones del camino que termina en fin'''
+		camino = []
+		i = fin
+		while i is not None:
+			camino.append(self._grilla.posicion_celda(i))
+			i = padre[i]
+		camino.reverse()
+		return camino
+
+class CampoDistancias(object):
+	"""Campo con el costo desde cada celda de una grilla hasta el más
+	cercano de un conjunto de celdas destino. Las distancias se guardan
+	en un arreglo contiguo indexado por el índice lineal de la celda, y
+	para cada celda se guarda también la siguiente en el camino hacia
+	el destino, lo que permite mover agentes siguiendo el campo y
+	actualizarlo cuando cambian pocas paredes"""
+	def __init__(self, grilla, destinos, pasable=None, costo=None, cerradas=None):
+		'''Calcula el campo hacia las celdas de las posiciones destinos.
+		pasable, costo y cerradas tienen el mismo significado que en
+		Buscador;
+		pasar de una celda a otra cuesta el costo de la celda a la que
+		se entra. Sin costos el campo se calcula con una búsqueda en
+		anchura desde todos los destinos a la vez, y con costos con
+		Dijkstra'''
+
+		self._buscador = Buscador(grilla, pasable, costo, cerradas)
+		self._destinos = set(grilla.indice_celda(pos) for pos in destinos)
+
+		self._distancias = array('d', [float("inf")]) * grilla.rango_celdas
+		self._siguientes = array('l', [-1]) * grilla.rango_celdas
+
+		self._calcular()
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla sobre la que se calcula el campo'''
+		return self._buscador.grilla
+
+	@property
+	def distancias(self):
+		'''Devuelve un arreglo de numpy con la distancia de cada celda,
+		indexado por índice lineal. Las celdas desde las que no se
+		llega a ningún destino, y los huecos de la numeración, tienen
+		distancia infinita. El arreglo comparte la memoria del campo,
+		por lo que refleja las actualizaciones'''
+		numpy = almacen.requiere_numpy()
+		return numpy.frombuffer(self._distancias, dtype=numpy.float64)
+
+	def get_distancia(self, pos):
+		'''Retorna la distancia de la celda de la posición pos'''
+		return self._distancias[self.grilla.indice_celda(pos)]
+
+	def siguiente(self, pos):
+		'''Retorna la posición de la celda a la que hay que moverse
+		desde la de pos para acercarse al destino más cercano, o None
+		si pos es un destino o no se llega a ninguno'''
+		j = self._siguientes[self.grilla.indice_celda(pos)]
+		if j < 0:
+			return None
+		return self.grilla.posicion_celda(j)
+
+	def calcular(self):
+		'''Vuelve a leer las capas pasable y costo y calcula el campo
+		completo. Se debe llamar después de cambiar muchas paredes o
+		cualquier costo'''
+		self._buscador.actualizar()
+		self._calcular()
+
+	def actualizar(self, paredes):
+		'''Actualiza el campo después de cambiar en la capa pasable los
+		valores de las paredes indicadas, que pueden ser posiciones,
+		paredes o índices lineales. Solo se recalculan las celdas cuya
+		distancia puede haber cambiado: las que llegaban al destino por
+		una pared que se cerró y las que se acercan a él por una que se
+		abrió'''
+
+		pasos = self._buscador.actualizar_paredes(paredes)
+
+		grado = self._buscador._grado
+		vecinas = self._buscador._vecinas
+		salidas = self._buscador._salidas
+		costos = self._buscador._costos
+		distancias = self._distancias
+		siguientes = self._siguientes
+		infinito = float("inf")
+
+		# Las celdas que pasaban por un paso que se cerró, y todas las
+		# que llegaban al destino a través de ellas, pierden su distancia
+		invalidas = set()
+		pendientes = [i for i, j, abierta in pasos if not abierta and siguientes[i] == j]
+		while pendientes:
+			i = pendientes.pop()
+			if i in invalidas:
+				continue
+			invalidas.add(i)
+			distancias[i] = infinito
+			siguientes[i] = -1
+			for k in xrange(grado):
+				j = int(vecinas[i, k])
+				if j >= 0 and siguientes[j] == i:
+					pendientes.append(j)
+
+		# Se les busca el mejor paso hacia las celdas que conservan su
+		# distancia, y se propaga desde ellas y desde los pasos abiertos
+		inicios = []
+		for i in invalidas:
+			for k in xrange(i*grado, (i+1)*grado):
+				j = salidas[k]
+				if j >= 0 and not j in invalidas:
+					d = distancias[j] + (costos[j] if costos is not None else 1)
+					if d < distancias[i]:
+						distancias[i] = d
+						siguientes[i] = j
+			if distancias[i] < infinito:
+				inicios.append((distancias[i], i))
+
+		for i, j, abierta in pasos:
+			if abierta:
+				d = distancias[j] + (costos[j] if costos is not None else 1)
+				if d < distancias[i]:
+					distancias[i] = d
+					siguientes[i] = j
+					inicios.append((d, i))
+
+		self._propagar(inicios)
+
+	def _calcular(self):
+		'''Calcula el campo completo con las salidas ya leídas'''
+
+		distancias = self._distancias
+		siguientes = self._siguientes
+		distancias[:] = array('d', [float("inf")]) * len(distancias)
+		siguientes[:] = array('l', [-1]) * len(siguientes)
+		for i in self._destinos:
+			distancias[i] = 0
+
+		if self._buscador._costos is None:
+			self._anchura()
+		else:
+			self._propagar([(0, i) for i in self._destinos])
+
+	def _anchura(self):
+		'''Búsqueda en anchura desde todos los destinos a la vez, para
+		cuando todas las celdas cuestan 1'''
+
+		grado = self._buscador._grado
+		salidas = self._buscador._salidas
+		distancias = self._distancias
+		siguientes = self._siguientes
+		infinito = float("inf")
+
+		cola = deque(self._destinos)
+		while cola:
+			i = cola.popleft()
+			d = distancias[i] + 1
+			for k in xrange(i*grado, (i+1)*grado):
+				j = salidas[k]
+				if j >= 0 and distancias[j] == infinito:
+					distancias[j] = d
+					siguientes[j] = i
+					cola.append(j)
+
+	def _propagar(self, inicios):
+		'''Dijkstra desde las celdas de inicios, una lista de tuplas
+		(distancia, índice) con las distancias ya asignadas en el campo.
+		Como se propaga desde el destino hacia afuera, pasar de i a j
+		cuesta lo que cuesta entrar en i'''
+
+		grado = self._buscador._grado
+		salidas = self._buscador._salidas
+		costos = self._buscador._costos
+		distancias = self._distancias
+		siguientes = self._siguientes
+
+		abiertas = inicios
+		heapq.heapify(abiertas)
+		while abiertas:
+			d, i = heapq.heappop(abiertas)
+			if d > distancias[i]:  # Entrada vieja de una celda ya mejorada
+				continue
+
+			d += costos[i] if costos is not None else 1
+			for k in xrange(i*grado, (i+1)*grado):
+				j = salidas[k]
+				if j >= 0 and d < distancias[j]:
+					distancias[j] = d
+					siguientes[j] = i
+					heapq.heappush(abiertas, (d, j))
+
+def a_estrella(grilla, origen, destino, pasable=None, costo=None, cerradas=None):
+	'''Retorna el camino de menor costo entre origen y destino usando
+	A*. Ver Buscador para el significado de los parámetros. Para hacer
+	muchas búsquedas sobre la misma grilla conviene usar un Buscador'''
+	return Buscador(grilla, pasable, costo, cerradas).a_estrella(origen, destino)
+
+def dijkstra(grilla, origen, destino, pasable=None, costo=None, cerradas=None):
+	'''Retorna el camino de menor costo entre origen y destino usando
+	Dijkstra. Ver Buscador para el significado de los parámetros. Para
+	hacer muchas búsquedas sobre la misma grilla conviene usar un
+	Buscador'''
+	return Buscador(grilla, pasable, costo, cerradas).dijkstra(origen, destino)
+
+def campo_distancias(grilla, destinos, pasable=None, costo=None, cerradas=None):
+	'''Retorna un arreglo de numpy con la distancia desde cada celda
+	hasta el más cercano de los destinos, indexado por índice lineal.
+	Ver CampoDistancias para el significado de los parámetros y para
+	mantener el campo al día cuando cambian las paredes'''
+	return CampoDistancias(grilla, destinos, pasable, costo, cerradas).distancias
@@ -0,0 +1,583 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para implementar capas de datos sobre una grilla. Una capa
+asocia un valor a cada celda, pared o vértice de la grilla, y lo
+guarda en un arreglo contiguo de numpy indexado por el índice lineal
+del elemento. De esta forma se puede operar sobre la capa completa con
+numpy sin recorrer los objetos de la grilla, y también leer y escribir
+valores individuales a partir de la posición o del elemento.
+Las capas se crean desde la grilla con el método agregar_capa.
+Una capa también puede guardar sus valores en un archivo mapeado en
+memoria, para trabajar con capas más grandes que la memoria o 
+compartirlas entre procesos sin copiarlas:
+
+>>> alturas = grilla.agregar_capa("alturas", archivo="alturas.dat", modo="r")
+
+En las grillas divididas en teselas las capas sin archivo guardan los
+valores de cada tesela por separado (ver CapaTeselada).
+
+Los estados booleanos, como las paredes abiertas o cerradas, se pueden
+guardar en una capa de bits empaquetados con agregar_bits (ver
+CapaBits), que ocupa un bit por elemento y opera sobre muchos
+elementos a la vez:
+
+>>> cerradas = grilla.agregar_bits("cerradas", "pared", True)
+>>> cerradas.quitar(indices)
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import os
+from numbers import Integral
+
+import almacen
+
+TIPOS = ("celda", "pared", "vertice")
+
+class Capa(object):
+	"""Capa de datos sobre los elementos de un tipo de una grilla"""
+	def __init__(self, grilla, nombre, tipo="celda", dtype="float64", valor=0, archivo=None, modo=None, desplazamiento=0):
+		'''Define la capa. grilla es la grilla a la que pertenece,
+		nombre el nombre con el que se identifica y tipo el tipo de
+		elemento al que se asocia cada valor ("celda", "pared" o
+		"vertice"). dtype es el tipo de dato de numpy de los valores
+		y valor el valor inicial de todos ellos.
+		Si archivo es un nombre de archivo, los valores se guardan en
+		él y se acceden con numpy.memmap: el sistema operativo carga 
+		solo las partes del archivo que se usan, y varios procesos 
+		pueden mapear el mismo archivo sin copiarlo. modo es el modo
+		de numpy.memmap:
+
+		"w+" --> crea el archivo con todos los valores en valor
+		"r+" --> abre un archivo existente para leer y escribir
+		"r"  --> abre un archivo existente solo para leer
+		"c"  --> abre un archivo existente, y los cambios quedan en 
+		         memoria sin escribirse en el archivo
+
+		Si modo es None se usa "r+" si el archivo existe y "w+" si no.
+		Al abrir un archivo existente valor no se usa. desplazamiento
+		es la posición en bytes del archivo donde empiezan los valores,
+		para guardar varias capas en el mismo archivo.'''
+		numpy = almacen.requiere_numpy()
+
+		if not tipo in TIPOS:
+			raise ValueError("Tipo de elemento desconocido: " + str(tipo))
+
+		self._grilla = grilla
+		self._nombre = nombre
+		self._tipo = tipo
+
+		if tipo == "celda":
+			cantidad = grilla.rango_celdas
+			self._indice_pos = grilla.indice_celda
+		elif tipo == "pared":
+			cantidad = grilla.rango_paredes
+			self._indice_pos = grilla.indice_pared
+		else:
+			cantidad = grilla.rango_vertices
+			self._indice_pos = grilla.indice_vertice
+
+		self._archivo = archivo
+		self._modo = None
+		self._desplazamiento = 0
+		if archivo is None:
+			self.datos = numpy.empty(cantidad, dtype=dtype)
+			self.datos.fill(valor)
+			return
+
+		if modo is None:
+			modo = "r+" if os.path.exists(archivo) else "w+"
+		if modo != "w+" and os.path.getsize(archivo) < desplazamiento + cantidad * numpy.dtype(dtype).itemsize:
+			raise ValueError("El archivo " + str(archivo) + " es más chico que la capa " + str(nombre))
+		self._modo = modo
+		self._desplazamiento = desplazamiento
+
+		if cantidad:
+			self.datos = numpy.memmap(archivo, dtype=dtype, mode=modo, offset=desplazamiento, shape=(cantidad,))
+		else:  # No se puede mapear un archivo vacío
+			self.datos = numpy.empty(0, dtype=dtype)
+		if modo == "w+":
+			self.datos.fill(valor)
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla a la que pertenece la capa'''
+		return self._grilla
+
+	@property
+	def nombre(self):
+		'''Devuelve el nombre de la capa. Solo lectura'''
+		return self._nombre
+
+	@property
+	def tipo(self):
+		'''Devuelve el tipo de elemento de la capa. Solo lectura'''
+		return self._tipo
+
+	@property
+	def dtype(self):
+		'''Devuelve el tipo de dato de los valores. Solo lectura'''
+		return self.datos.dtype
+
+	@property
+	def archivo(self):
+		'''Devuelve el nombre del archivo mapeado en memoria donde se 
+		guardan los valores, o None si están en memoria. Solo lectura'''
+		return self._archivo
+
+	@property
+	def modo(self):
+		'''Devuelve el modo con el que se mapeó el archivo, o None si
+		los valores están en memoria. Solo lectura'''
+		return self._modo
+
+	@property
+	def desplazamiento(self):
+		'''Devuelve la posición en bytes del archivo mapeado donde 
+		empiezan los valores. Solo lectura'''
+		return self._desplazamiento
+
+	def __str__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ")"
+		return msg
+
+	def __repr__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ")"
+		return msg
+
+	def __len__(self):
+		return len(self.datos)
+
+	def __getitem__(self, clave):
+		'''Retorna el valor del elemento indicado en clave. Ver el
+		método indice para las claves posibles'''
+		return self.datos[self.indice(clave)]
+
+	def __setitem__(self, clave, valor):
+		'''Asigna valor al elemento indicado en clave. Ver el método
+		indice para las claves posibles'''
+		self.datos[self.indice(clave)] = valor
+
+	def indice(self, clave):
+		'''Convierte clave en un índice del arreglo de datos. clave
+		puede ser:
+
+		- la posición del elemento en la grilla (una tupla)
+		- el elemento mismo (celda, pared o vértice)
+		- un índice lineal, o un slice o arreglo de índices lineales,
+		  que se usan sin convertir'''
+
+		if isinstance(clave, tuple):
+			return self._indice_pos(clave)
+		if isinstance(clave, Integral) or isinstance(clave, slice) or hasattr(clave, "__array__"):
+			return clave
+		return clave.indice
+
+	def llenar(self, valor):
+		'''Asigna valor a todos los elementos de la capa'''
+		self.datos.fill(valor)
+
+	def sincronizar(self):
+		'''Escribe en el archivo los cambios de una capa mapeada en
+		memoria. En las capas en memoria no hace nada'''
+		if hasattr(self.datos, "flush"):
+			self.datos.flush()
+
+	def __reduce__(self):
+		# Los datos de la capa se guardan con la grilla, al restaurar
+		# se la pide por nombre
+		return (_capa_de, (self._grilla, self._nombre))
+
+class CapaTeselada(object):
+	"""Capa de datos de una grilla dividida en teselas. Cada tesela
+	guarda los valores de sus elementos en un arreglo propio, que se
+	crea con la tesela y se descarta con ella, por lo que la capa ocupa
+	memoria solo por las teselas cargadas. Si la grilla tiene
+	directorio, el arreglo de cada tesela descartada se guarda en un
+	archivo de ese directorio y se vuelve a cargar en el próximo acceso;
+	si no, los valores de la tesela vuelven al valor inicial.
+	No tiene un arreglo con todos los valores, por lo que no sirve para
+	los algoritmos que usan Capa.datos"""
+	def __init__(self, grilla, nombre, tipo="celda", dtype="float64", valor=0):
+		'''Define la capa. Los parámetros son los mismos que en Capa'''
+		numpy = almacen.requiere_numpy()
+
+		if not tipo in TIPOS:
+			raise ValueError("Tipo de elemento desconocido: " + str(tipo))
+
+		self._grilla = grilla
+		self._nombre = nombre
+		self._tipo = tipo
+		self._dtype = numpy.dtype(dtype)
+		self._valor = valor
+
+		if tipo == "celda":
+			self._cantidad = grilla._plantilla.rango_celdas
+			self._existe, self._posicion = grilla.existe_celda, grilla.posicion_celda
+		elif tipo == "pared":
+			self._cantidad = grilla._plantilla.rango_paredes
+			self._existe, self._posicion = grilla.existe_pared, grilla.posicion_pared
+		else:
+			self._cantidad = grilla._plantilla.rango_vertices
+			self._existe, self._posicion = grilla.existe_vertice, grilla.posicion_vertice
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla a la que pertenece la capa'''
+		return self._grilla
+
+	@property
+	def nombre(self):
+		'''Devuelve el nombre de la capa. Solo lectura'''
+		return self._nombre
+
+	@property
+	def tipo(self):
+		'''Devuelve el tipo de elemento de la capa. Solo lectura'''
+		return self._tipo
+
+	@property
+	def dtype(self):
+		'''Devuelve el tipo de dato de los valores. Solo lectura'''
+		return self._dtype
+
+	@property
+	def valor(self):
+		'''Devuelve el valor inicial de los elementos. Solo lectura'''
+		return self._valor
+
+	def __str__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ", por teselas)"
+		return msg
+
+	def __repr__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ", por teselas)"
+		return msg
+
+	def __getitem__(self, clave):
+		'''Retorna el valor del elemento indicado en clave, que puede
+		ser su posición, el elemento mismo o su índice lineal'''
+		tesela, i = self.ubicar(clave)
+		return self.tesela(tesela)[i]
+
+	def __setitem__(self, clave, valor):
+		'''Asigna valor al elemento indicado en clave. Ver
+		__getitem__'''
+		tesela, i = self.ubicar(clave)
+		self.tesela(tesela)[i] = valor
+
+	def ubicar(self, clave):
+		'''Retorna la clave de la tesela del elemento indicado en clave
+		y su índice en el arreglo de la tesela'''
+		if isinstance(clave, Integral):
+			pos = self._posicion(clave)
+		elif isinstance(clave, tuple):
+			pos = clave
+		else:
+			pos = self._posicion(clave.indice)
+		if not self._existe(pos):
+			raise KeyError(pos)
+		return self._grilla._ubicar(self._tipo, pos)
+
+	def tesela(self, clave):
+		'''Retorna el arreglo de numpy con los valores de la tesela de
+		clave, cargándola si hace falta. Los elementos de la tesela se
+		ubican en el arreglo por su índice lineal dentro de la tesela'''
+		tesela = self._grilla._teselas.obtener(clave)
+		datos = tesela.datos.get(self)
+		if datos is None:
+			datos = tesela.datos[self] = self._cargar(clave)
+		return datos
+
+	def llenar(self, valor):
+		'''Asigna valor a todos los elementos de la capa, incluso a los
+		de las teselas que no están cargadas'''
+		self._valor = valor
+		for tesela in self._grilla._teselas:
+			tesela.datos.pop(self, None)
+		carpeta = self._carpeta()
+		if carpeta is not None and os.path.isdir(carpeta):
+			for archivo in os.listdir(carpeta):
+				os.remove(os.path.join(carpeta, archivo))
+
+	def sincronizar(self):
+		'''Guarda en el directorio de la grilla los valores de las
+		teselas cargadas. Si la grilla no tiene directorio no hace
+		nada'''
+		for tesela in self._grilla._teselas:
+			if self in tesela.datos:
+				self.descargar(tesela.clave, tesela.datos[self])
+
+	def descargar(self, clave, datos):
+		'''Recibe los valores de la tesela de clave cuando se la
+		descarta, y los guarda si la grilla tiene directorio'''
+		carpeta = self._carpeta()
+		if carpeta is None:
+			return
+		if not os.path.isdir(carpeta):
+			os.makedirs(carpeta)
+		almacen.requiere_numpy().save(self._archivo(clave), datos)
+
+	def _cargar(self, clave):
+		'''Retorna los valores de la tesela de clave, leídos del
+		directorio de la grilla o con el valor inicial'''
+		numpy = almacen.requiere_numpy()
+		carpeta = self._carpeta()
+		if carpeta is not None and os.path.exists(self._archivo(clave)):
+			return numpy.load(self._archivo(clave))
+		datos = numpy.empty(self._cantidad, dtype=self._dtype)
+		datos.fill(self._valor)
+		return datos
+
+	def _carpeta(self):
+		'''Carpeta donde se guardan las teselas de la capa, o None si la
+		grilla no tiene directorio'''
+		if self._grilla.directorio is None:
+			return None
+		return os.path.join(self._grilla.directorio, str(self._nombre))
+
+	def _archivo(self, clave):
+		'''Archivo donde se guardan los valores de la tesela de clave'''
+		return os.path.join(self._carpeta(), "%d_%d.npy" % clave)
+
+	def __reduce__(self):
+		return (_capa_de, (self._grilla, self._nombre))
+
+class CapaBits(object):
+	"""Capa de valores booleanos sobre los elementos de un tipo de una
+	grilla, guardados como bits empaquetados en un objeto almacen.Bits
+	indexado por índice lineal. Los índices que no corresponden a ningún
+	elemento, como los de los bordes de las paredes hexagonales, quedan
+	siempre apagados.
+	Las paredes se numeran por planos de la misma orientación (ver
+	planos_paredes de la grilla), y contar e indices aceptan el nombre
+	de un plano para limitarse a sus paredes.
+	No tiene un arreglo con un valor por elemento; desempaquetar
+	devuelve uno, y los algoritmos que solo leen la capa (caminos,
+	regiones, visión) la desempaquetan al actualizarse"""
+	def __init__(self, grilla, nombre, tipo="pared", valor=False):
+		'''Define la capa. grilla es la grilla a la que pertenece,
+		nombre el nombre con el que se identifica, tipo el tipo de
+		elemento al que se asocia cada bit ("celda", "pared" o
+		"vertice") y valor el valor inicial de todos ellos'''
+		if not tipo in TIPOS:
+			raise ValueError("Tipo de elemento desconocido: " + str(tipo))
+
+		self._grilla = grilla
+		self._nombre = nombre
+		self._tipo = tipo
+
+		if tipo == "celda":
+			cantidad, elementos = grilla.rango_celdas, grilla.cant_celdas
+			self._indice_pos = grilla.indice_celda
+		elif tipo == "pared":
+			cantidad, elementos = grilla.rango_paredes, grilla.cant_paredes
+			self._indice_pos = grilla.indice_pared
+		else:
+			cantidad, elementos = grilla.rango_vertices, grilla.cant_vertices
+			self._indice_pos = grilla.indice_vertice
+
+		self.bits = almacen.Bits(cantidad)
+		self._existentes = None  # Bits de los índices con elemento
+		if cantidad != elementos:
+			if tipo == "pared":
+				self._existentes = almacen.Bits(cantidad)
+				self._existentes.poner(grilla.paredes_array())
+			else:
+				self._existentes = almacen.Bits.desde_arreglo(almacen.requiere_numpy().array([grilla.existe_vertice(grilla._posicion_vertice(i)) for i in xrange(cantidad)]))
+		if valor:
+			self.llenar(True)
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla a la que pertenece la capa'''
+		return self._grilla
+
+	@property
+	def nombre(self):
+		'''Devuelve el nombre de la capa. Solo lectura'''
+		return self._nombre
+
+	@property
+	def tipo(self):
+		'''Devuelve el tipo de elemento de la capa. Solo lectura'''
+		return self._tipo
+
+	def __str__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ", bits)"
+		return msg
+
+	def __repr__(self):
+		msg = "Capa " + str(self.nombre) + " (" + self.tipo + ", bits)"
+		return msg
+
+	def __len__(self):
+		return len(self.bits)
+
+	def __getitem__(self, clave):
+		'''Indica si está encendido el bit del elemento indicado en
+		clave. Ver Capa.indice para las claves posibles; con un arreglo
+		de índices devuelve un arreglo de valores booleanos'''
+		i = self.indice(clave)
+		if isinstance(i, Integral):
+			return self.bits[i]
+		return self.bits.probar(self._desplegar(i))
+
+	def __setitem__(self, clave, valor):
+		'''Enciende el bit del elemento indicado en clave si valor es
+		verdadero, o lo apaga si no. Ver Capa.indice para las claves
+		posibles'''
+		i = self.indice(clave)
+		if isinstance(i, Integral):
+			self.bits[i] = valor and (self._existentes is None or self._existentes[i])
+		elif valor:
+			self.poner(self._desplegar(i))
+		else:
+			self.quitar(self._desplegar(i))
+
+	indice = Capa.__dict__["indice"]  # Las mismas claves que Capa
+
+	def poner(self, indices):
+		'''Enciende los bits de la secuencia o arreglo de índices
+		lineales. Los índices que no corresponden a ningún elemento
+		quedan apagados'''
+		self.bits.poner(indices)
+		self._recortar()
+
+	def quitar(self, indices):
+		'''Apaga los bits de la secuencia o arreglo de índices lineales'''
+		self.bits.quitar(indices)
+
+	def invertir(self, indices=None):
+		'''Invierte los bits de la secuencia o arreglo de índices
+		lineales, o los de todos los elementos si es None'''
+		self.bits.invertir(indices)
+		self._recortar()
+
+	def probar(self, indices):
+		'''Retorna un arreglo de numpy de valores booleanos que indica
+		si está encendido el bit de cada índice lineal de la secuencia o
+		arreglo indices'''
+		return self.bits.probar(indices)
+
+	def llenar(self, valor):
+		'''Asigna valor a todos los elementos de la capa, sin reemplazar
+		el objeto bits'''
+		self.bits.llenar(valor)
+		if valor:
+			self._recortar()
+
+	def contar(self, plano=None):
+		'''Retorna la cantidad de elementos encendidos, o solo la de las
+		paredes del plano indicado'''
+		return self.bits.contar(*self._rango(plano))
+
+	def indices(self, plano=None):
+		'''Retorna un arreglo de numpy con los índices lineales de los
+		elementos encendidos, o solo los de las paredes del plano
+		indicado, en orden'''
+		return self.bits.indices(*self._rango(plano))
+
+	def desempaquetar(self):
+		'''Retorna un arreglo de numpy de valores booleanos con el valor
+		de cada índice lineal'''
+		return self.bits.desempaquetar()
+
+	def _rango(self, plano):
+		'''Retorna el rango de índices del plano de paredes, o el de
+		toda la capa si es None'''
+		if plano is None:
+			return 0, len(self.bits)
+		if self._tipo != "pared":
+			raise ValueError("Solo las capas de paredes tienen planos")
+		for nombre, inicio, fin in self._grilla.planos_paredes():
+			if nombre == plano:
+				return inicio, fin
+		raise ValueError("Plano de paredes desconocido: " + str(plano))
+
+	def _recortar(self):
+		'''Apaga los bits de los índices que no corresponden a ningún
+		elemento'''
+		if self._existentes is not None:
+			self.bits &= self._existentes
+
+	def _desplegar(self, i):
+		'''Convierte un slice de índices en un arreglo'''
+		if isinstance(i, slice):
+			return almacen.requiere_numpy().arange(*i.indices(len(self.bits)))
+		return i
+
+	def __reduce__(self):
+		return (_capa_de, (self._grilla, self._nombre))
+
+def _capa_de(grilla, nombre):
+	'''Retorna la capa nombre de grilla. Se usa al restaurar con pickle
+	las capas sueltas'''
+	return grilla.get_capa(nombre)
+
+class _Lectura(object):
+	"""Vista de solo lectura de una capa de bits, o de una capa con los
+	valores negados, con un arreglo datos como el de Capa. El arreglo se
+	calcula cada vez que se lo pide, por lo que refleja los cambios de
+	la capa original"""
+	def __init__(self, capa, invertir):
+		self._capa = capa
+		self._invertir = invertir
+
+	@property
+	def nombre(self):
+		return self._capa.nombre
+
+	@property
+	def tipo(self):
+		return self._capa.tipo
+
+	@property
+	def datos(self):
+		'''Devuelve un arreglo de numpy con el valor de cada índice
+		lineal'''
+		if isinstance(self._capa, CapaBits):
+			datos = self._capa.desempaquetar()
+		else:
+			datos = self._capa.datos != 0
+		if self._invertir:
+			datos = ~datos
+		return datos
+
+	def __getitem__(self, clave):
+		return bool(self._capa[clave]) != self._invertir
+
+	def indice(self, clave):
+		return self._capa.indice(clave)
+
+def obtener(grilla, capa, tipo, invertir=False):
+	'''Retorna la capa de grilla indicada, que puede ser la capa misma,
+	su nombre o None, verificando que sea del tipo de elemento pedido y
+	que tenga todos sus valores en un arreglo. Las capas de bits, y
+	cualquier capa si invertir es verdadero, se devuelven en una vista
+	de solo lectura con valores booleanos, negados si invertir es
+	verdadero'''
+	if capa is None:
+		return None
+	if not isinstance(capa, (Capa, CapaTeselada, CapaBits)):
+		capa = grilla.get_capa(capa)
+	if isinstance(capa, CapaTeselada):  # Las capas por tesela no tienen datos
+		raise TypeError("La capa " + str(capa.nombre) + " guarda sus valores por tesela")
+	if capa.tipo != tipo:
+		raise ValueError("La capa " + str(capa.nombre) + " debe ser de tipo " + tipo)
+	if invertir or isinstance(capa, CapaBits):
+		return _Lectura(capa, invertir)
+	return capa
+
+def obtener_pasable(grilla, pasable, cerradas):
+	'''Retorna la capa de paredes pasables indicada con pasable, o la
+	negación de la capa de paredes cerradas, para los algoritmos que
+	aceptan cualquiera de las dos'''
+	if cerradas is None:
+		return obtener(grilla, pasable, "pared")
+	if pasable is not None:
+		raise ValueError("Se debe indicar pasable o cerradas, no las dos")
+	return obtener(grilla, cerradas, "pared", True)
@@ -0,0 +1,234 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para compartir una grilla entre procesos sin copiarla. La
+grilla se publica una vez en un segmento de memoria compartida, con
+sus capas de datos y sus tablas de adyacencia, y los demás procesos se
+adjuntan al segmento por su nombre y obtienen una grilla compacta cuyas
+capas y tablas leen directamente de la memoria compartida:
+
+>>> segmento = publicar(grilla)
+>>> pool.map(simular, [segmento] * 8)  # Cada proceso se adjunta solo
+
+Las grillas compactas no guardan elementos, así que la topología se
+reconstruye aritméticamente a partir de las dimensiones, y lo único que
+ocupa memoria son las capas y las tablas, que quedan compartidas. Los
+cambios que un proceso hace en las capas los ven todos los demás.
+
+El segmento es un archivo en /dev/shm (o en el directorio temporal si
+no existe), mapeado en memoria por cada proceso. Solo el proceso que lo
+publicó lo borra, al llamar a destruir, al salir de un bloque with o al
+terminar el programa. Borrarlo no afecta a los procesos que ya están
+adjuntos, que lo siguen usando hasta que lo cierran.
+
+Requiere numpy si la grilla tiene capas de datos.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import atexit
+import ctypes
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import uuid
+from array import array
+
+import cuad
+import exa
+import almacen
+import capas
+
+MAGIA = b"GRSH"
+VERSION = 2
+
+DIRECTORIO = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+PREFIJO = "grilla-"
+
+# Clase de grilla de cada código de topología
+TOPOLOGIAS = (cuad.Grilla, exa.Grilla)
+
+_ENCABEZADO = struct.Struct("<4sHQQ")
+_ALINEACION = 64  # Cada bloque de datos empieza en un múltiplo de este valor
+
+# Tipo de ctypes de cada typecode de los arreglos de las tablas
+_CTIPOS = {'l': ctypes.c_long}
+
+class Segmento(object):
+	"""Grilla publicada en memoria compartida. Se obtiene con publicar,
+	en el proceso que crea el segmento, o con adjuntar, en los demás"""
+	def __init__(self, nombre, duenio=False):
+		'''Se adjunta al segmento nombre. duenio indica si este proceso
+		es el que lo creó y por lo tanto el que debe borrarlo. Conviene
+		usar las funciones publicar y adjuntar en lugar de crearlo
+		directamente'''
+
+		self._nombre = nombre
+		self._ruta = _ruta(nombre)
+		self._duenio = os.getpid() if duenio else None
+
+		with open(self._ruta, "r+b") as archivo:
+			memoria = mmap.mmap(archivo.fileno(), 0)
+
+		magia, version, inicio, largo = _ENCABEZADO.unpack_from(memoria, 0)
+		if magia != MAGIA:
+			raise ValueError("El segmento " + nombre + " no es una grilla compartida")
+		if version != VERSION:
+			raise ValueError("Versión de segmento no soportada: " + str(version))
+		descripcion = pickle.loads(memoria[inicio:inicio + largo])
+
+		clase = TOPOLOGIAS[descripcion["topologia"]]
+		self._grilla = grilla = clase(descripcion["filas"], descripcion["columnas"], compacta=True)
+
+		# Las tablas se leen con arreglos de ctypes sobre el mapeo, que
+		# no copian los datos y devuelven enteros de python
+		for nombre_tabla, claves, arreglos in descripcion["adyacencias"]:
+			inicio, indices = [(_CTIPOS[tipo] * cantidad).from_buffer(memoria, desplazamiento) for tipo, desplazamiento, cantidad in arreglos]
+			grilla._adyacencias[nombre_tabla] = almacen.TablaCSR.desde_arreglos(claves, inicio, indices)
+
+		for nombre_capa, tipo, dtype, desplazamiento in descripcion["capas"]:
+			grilla.agregar_capa(nombre_capa, tipo, dtype, archivo=self._ruta, modo="r+", desplazamiento=desplazamiento)
+
+		if self._duenio is not None:
+			atexit.register(_borrar, self._ruta, self._duenio)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, tipo, valor, traza):
+		if self._duenio is not None:
+			self.destruir()
+		else:
+			self.cerrar()
+
+	def __reduce__(self):
+		# Al pasarlo a otro proceso se adjunta al mismo segmento, sin
+		# ser su dueño
+		return (adjuntar, (self._nombre,))
+
+	def __str__(self):
+		msg = "Segmento " + self._nombre
+		return msg
+
+	def __repr__(self):
+		msg = "Segmento " + self._nombre
+		return msg
+
+	@property
+	def nombre(self):
+		'''Devuelve el nombre del segmento, con el que otros procesos
+		se pueden adjuntar. Solo lectura'''
+		return self._nombre
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla compacta que lee del segmento'''
+		if self._grilla is None:
+			raise ValueError("El segmento " + self._nombre + " está cerrado")
+		return self._grilla
+
+	@property
+	def duenio(self):
+		'''Indica si este proceso creó el segmento. Solo lectura'''
+		return self._duenio == os.getpid()
+
+	def cerrar(self):
+		'''Suelta la grilla del segmento. La memoria se libera cuando
+		no quedan referencias a la grilla ni a sus capas'''
+		self._grilla = None
+
+	def destruir(self):
+		'''Cierra el segmento y, si este proceso es su dueño, borra el
+		archivo. Los procesos ya adjuntos lo pueden seguir usando, pero
+		ya no se puede adjuntar ninguno nuevo'''
+		self.cerrar()
+		if self.duenio:
+			_borrar(self._ruta, self._duenio)
+
+def publicar(grilla, nombre=None):
+	'''Copia las capas y tablas de adyacencia de grilla a un segmento
+	de memoria compartida nuevo y retorna el Segmento del que este
+	proceso es dueño. nombre es el nombre del segmento; si es None se
+	genera uno único. La grilla original no se modifica: los cambios
+	compartidos se hacen sobre la grilla del segmento'''
+
+	if nombre is None:
+		nombre = PREFIJO + str(os.getpid()) + "-" + uuid.uuid4().hex[:8]
+
+	topologia = [k for k, clase in enumerate(TOPOLOGIAS) if isinstance(grilla, clase)]
+	if not topologia:
+		raise TypeError("No es una grilla: " + repr(grilla))
+	if grilla.tesela is not None:
+		raise ValueError("Las grillas divididas en teselas no se pueden publicar")
+	if any(isinstance(capa, capas.CapaBits) for capa in grilla._capas.values()):
+		raise ValueError("Las capas de bits no se pueden publicar")
+
+	# Los bloques de datos van después del encabezado, alineados, y la
+	# descripción al final, cuando ya se conocen sus desplazamientos
+	bloques = []
+	posicion = _alinear(_ENCABEZADO.size)
+
+	adyacencias = []
+	for nombre_tabla in sorted(grilla._adyacencias):
+		tabla = grilla._adyacencias[nombre_tabla]
+		arreglos = []
+		for arreglo in (tabla.inicio, tabla.indices):
+			arreglos.append((arreglo.typecode, posicion, len(arreglo)))
+			bloques.append((posicion, arreglo))
+			posicion = _alinear(posicion + len(arreglo) * arreglo.itemsize)
+		adyacencias.append((nombre_tabla, tabla.claves, arreglos))
+
+	descritas = []
+	for capa in grilla._capas.values():
+		descritas.append((capa.nombre, capa.tipo, capa.dtype.str, posicion))
+		bloques.append((posicion, capa.datos))
+		posicion = _alinear(posicion + capa.datos.nbytes)
+
+	descripcion = pickle.dumps({"topologia": topologia[0], "filas": grilla.cant_filas, "columnas": grilla.cant_columnas, "adyacencias": adyacencias, "capas": descritas}, 2)
+
+	ruta = _ruta(nombre)
+	descriptor = os.open(ruta, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0600)
+	try:
+		with os.fdopen(descriptor, "w+b") as archivo:
+			archivo.write(_ENCABEZADO.pack(MAGIA, VERSION, posicion, len(descripcion)))
+			for desplazamiento, bloque in bloques:
+				archivo.seek(desplazamiento)
+				if isinstance(bloque, array):
+					archivo.write(bloque.tostring())
+				else:
+					archivo.write(almacen.requiere_numpy().ascontiguousarray(bloque).data)
+			archivo.seek(posicion)
+			archivo.write(descripcion)
+		return Segmento(nombre, duenio=True)
+	except:
+		_borrar(ruta, os.getpid())
+		raise
+
+def adjuntar(nombre):
+	'''Retorna el Segmento con nombre, publicado por otro proceso'''
+	return Segmento(nombre)
+
+def _ruta(nombre):
+	'''Retorna la ruta del archivo del segmento nombre'''
+	if os.sep in nombre:
+		raise ValueError("Nombre de segmento inválido: " + nombre)
+	return os.path.join(DIRECTORIO, nombre)
+
+def _alinear(posicion):
+	'''Redondea posicion hacia arriba al múltiplo de _ALINEACION'''
+	return -(-posicion // _ALINEACION) * _ALINEACION
+
+def _borrar(ruta, duenio):
+	'''Borra el archivo de un segmento si este proceso es su dueño. Los
+	procesos hijos heredan los registros de atexit, por eso se verifica
+	el proceso'''
+	if os.getpid() != duenio:
+		return
+	try:
+		os.unlink(ruta)
+	except OSError:  # Ya se había borrado
+		pass
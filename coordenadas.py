@@ -0,0 +1,219 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo de coordenadas para las grillas hexagonales. Las celdas de
+exa.Grilla se identifican por (fila, columna), con las columnas
+impares desplazadas media celda hacia abajo. En esas coordenadas las
+distancias, los anillos y las rotaciones dependen de la paridad de la
+columna, mientras que en coordenadas cúbicas (x, y, z), con
+x + y + z = 0, son simples operaciones aritméticas:
+
+    x = columna
+    z = fila - (columna - (columna & 1)) // 2
+    y = -x - z
+
+Las coordenadas axiales (q, r) son las cúbicas sin la redundante y:
+q = x y r = z.
+
+Las funciones de conversión, distancia, vecina y rotación aceptan
+tanto enteros como arreglos de numpy de enteros, en cuyo caso operan
+sobre todos los elementos de una vez:
+
+>>> x, y, z = a_cubo((filas, columnas))
+>>> distancia((filas, columnas), (10, 10))
+
+Los anillos, espirales y rangos alrededor de una celda se pueden
+recorrer con generadores de posiciones o pedir de una vez como
+arreglos (filas, columnas) con las funciones terminadas en _array,
+que requieren numpy. Si se indica una grilla, se omiten las celdas
+que quedan fuera de ella.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import almacen
+
+# Posiciones relativas de las vecinas, como en exa._Celda.vecinas, y
+# sus direcciones en coordenadas cúbicas, en el orden de
+# exa.Grilla.vecinas_array
+NOMBRES = ("NO", "N", "NE", "SE", "S", "SO")
+DIRECCIONES = ((-1, 1, 0), (0, 1, -1), (1, 0, -1), (1, -1, 0), (0, -1, 1), (-1, 0, 1))
+
+def a_cubo(pos):
+	'''Retorna las coordenadas cúbicas (x, y, z) de la celda de
+	posición pos = (fila, columna)'''
+	f, c = pos
+	z = f - (c - (c & 1)) // 2
+	return (c, -c - z, z)
+
+def a_axial(pos):
+	'''Retorna las coordenadas axiales (q, r) de la celda de posición
+	pos = (fila, columna)'''
+	x, _, z = a_cubo(pos)
+	return (x, z)
+
+def desde_cubo(cubo):
+	'''Retorna la posición (fila, columna) de la celda de coordenadas
+	cúbicas cubo = (x, y, z)'''
+	x, _, z = cubo
+	return (z + (x - (x & 1)) // 2, x)
+
+def desde_axial(axial):
+	'''Retorna la posición (fila, columna) de la celda de coordenadas
+	axiales axial = (q, r)'''
+	q, r = axial
+	return desde_cubo((q, -q - r, r))
+
+def distancia(pos1, pos2):
+	'''Retorna la distancia entre las celdas de las posiciones pos1 y
+	pos2, medida en cantidad de pasos entre celdas vecinas'''
+	x1, _, z1 = a_cubo(pos1)
+	x2, _, z2 = a_cubo(pos2)
+	dx = x1 - x2
+	dz = z1 - z2
+	return _mayor(abs(dx), abs(dz), abs(dx + dz))
+
+def vecina(pos, direccion, pasos=1):
+	'''Retorna la posición de la celda que está pasos celdas hacia
+	direccion desde la celda de pos. direccion es una de las
+	posiciones relativas de NOMBRES'''
+	dx, dy, dz = DIRECCIONES[NOMBRES.index(direccion)]
+	x, y, z = a_cubo(pos)
+	return desde_cubo((x + dx*pasos, y + dy*pasos, z + dz*pasos))
+
+def rotar(pos, centro, pasos=1):
+	'''Retorna la posición de la celda de pos rotada alrededor de la
+	celda de centro pasos sextos de vuelta en el sentido de las
+	agujas del reloj, o en el contrario si pasos es negativo'''
+	x, y, z = a_cubo(pos)
+	cx, cy, cz = a_cubo(centro)
+	x, y, z = x - cx, y - cy, z - cz
+	for _ in xrange(pasos % 6):
+		x, y, z = -z, -x, -y
+	return desde_cubo((x + cx, y + cy, z + cz))
+
+def redondear(cubo):
+	'''Retorna las coordenadas cúbicas enteras de la celda que contiene
+	el punto de coordenadas cúbicas cubo, que pueden ser fraccionarias'''
+	x, y, z = [int(round(v)) for v in cubo]
+	dx, dy, dz = [abs(r - v) for r, v in zip((x, y, z), cubo)]
+	if dx > dy and dx > dz:
+		x = -y - z
+	elif dy > dz:
+		y = -x - z
+	else:
+		z = -x - y
+	return (x, y, z)
+
+def linea(pos1, pos2):
+	'''Retorna la lista de posiciones de las celdas que atraviesa el
+	segmento entre los centros de las celdas de pos1 y pos2, incluidas
+	ambas. El segmento se desplaza un poco para que no pase
+	exactamente por los vértices, donde la línea sería ambigua. Se
+	interpola el desplazamiento desde pos1, por lo que la forma de la
+	línea no depende de dónde está el segmento'''
+	x1, y1, z1 = a_cubo(pos1)
+	x2, y2, z2 = a_cubo(pos2)
+	dx, dy, dz = x2 - x1, y2 - y1, z2 - z1
+	n = distancia(pos1, pos2)
+	res = []
+	for paso in xrange(n+1):
+		t = float(paso) / n if n else 0.0
+		x, y, z = redondear((dx*t + 1e-6, dy*t + 1e-6, dz*t - 2e-6))
+		res.append(desde_cubo((x1 + x, y1 + y, z1 + z)))
+	return res
+
+def anillo(centro, radio, grilla=None):
+	'''Generador de las posiciones de las celdas a distancia radio de
+	la celda de centro, en el sentido de las agujas del reloj desde la
+	que está al sur. Si se indica grilla se omiten las celdas que no
+	pertenecen a ella'''
+	if radio == 0:
+		if grilla is None or grilla.existe_celda(centro):
+			yield centro
+		return
+
+	x, y, z = a_cubo(centro)
+	dx, dy, dz = DIRECCIONES[4]
+	x, y, z = x + dx*radio, y + dy*radio, z + dz*radio
+	for dx, dy, dz in DIRECCIONES:
+		for _ in xrange(radio):
+			pos = desde_cubo((x, y, z))
+			if grilla is None or grilla.existe_celda(pos):
+				yield pos
+			x, y, z = x + dx, y + dy, z + dz
+
+def espiral(centro, radio, grilla=None):
+	'''Generador de las posiciones de las celdas a distancia radio o
+	menor de la celda de centro, por anillos desde el centro hacia
+	afuera. Si se indica grilla se omiten las celdas que no pertenecen
+	a ella'''
+	for r in xrange(radio+1):
+		for pos in anillo(centro, r, grilla):
+			yield pos
+
+def rango(centro, radio, grilla=None):
+	'''Generador de las posiciones de las celdas a distancia radio o
+	menor de la celda de centro, por columnas de izquierda a derecha y
+	de arriba hacia abajo dentro de cada columna. Si se indica grilla
+	se omiten las celdas que no pertenecen a ella'''
+	cx, _, cz = a_cubo(centro)
+	for dx in xrange(-radio, radio+1):
+		for dz in xrange(max(-radio, -dx-radio), min(radio, -dx+radio)+1):
+			pos = desde_cubo((cx + dx, -cx - dx - cz - dz, cz + dz))
+			if grilla is None or grilla.existe_celda(pos):
+				yield pos
+
+def anillo_array(centro, radio, grilla=None):
+	'''Retorna dos arreglos de numpy (filas, columnas) con las
+	posiciones del anillo de radio alrededor de la celda de centro, en
+	el orden de anillo. Requiere numpy.'''
+	numpy = almacen.requiere_numpy()
+	if radio == 0:
+		return _desde_desplazamientos(centro, numpy.zeros((1, 3), dtype=int), grilla)
+
+	# Cada lado del anillo empieza en una esquina y avanza en una
+	# dirección; la primera esquina es la del sur
+	direcciones = numpy.array(DIRECCIONES)
+	esquinas = radio * (direcciones[4] + numpy.cumsum(direcciones, axis=0) - direcciones)
+	pasos = numpy.arange(radio).reshape(1, radio, 1)
+	cubos = esquinas.reshape(6, 1, 3) + pasos * direcciones.reshape(6, 1, 3)
+	return _desde_desplazamientos(centro, cubos.reshape(6*radio, 3), grilla)
+
+def espiral_array(centro, radio, grilla=None):
+	'''Retorna dos arreglos de numpy (filas, columnas) con las
+	posiciones de la espiral de radio alrededor de la celda de centro,
+	en el orden de espiral. Requiere numpy.'''
+	numpy = almacen.requiere_numpy()
+	anillos = [anillo_array(centro, r, grilla) for r in xrange(radio+1)]
+	return (numpy.concatenate([f for f, _ in anillos]), numpy.concatenate([c for _, c in anillos]))
+
+def rango_array(centro, radio, grilla=None):
+	'''Retorna dos arreglos de numpy (filas, columnas) con las
+	posiciones del rango de radio alrededor de la celda de centro, en
+	el orden de rango. Requiere numpy.'''
+	numpy = almacen.requiere_numpy()
+	dx, dz = numpy.meshgrid(numpy.arange(-radio, radio+1), numpy.arange(-radio, radio+1), indexing="ij")
+	dentro = abs(dx + dz) <= radio
+	dx, dz = dx[dentro], dz[dentro]
+	return _desde_desplazamientos(centro, numpy.column_stack((dx, -dx - dz, dz)), grilla)
+
+def _desde_desplazamientos(centro, cubos, grilla):
+	'''Retorna los arreglos (filas, columnas) de las celdas desplazadas
+	de la celda de centro según las filas del arreglo de cubos de
+	forma (n, 3), sin las que no pertenecen a grilla si se indica'''
+	x, y, z = a_cubo(centro)
+	f, c = desde_cubo((x + cubos[:, 0], y + cubos[:, 1], z + cubos[:, 2]))
+	if grilla is not None:
+		existe = (f >= 0) & (f < grilla.cant_filas) & (c >= 0) & (c < grilla.cant_columnas)
+		f, c = f[existe], c[existe]
+	return (f, c)
+
+def _mayor(a, b, c):
+	'''Retorna el mayor de a, b y c, elemento a elemento si son
+	arreglos de numpy'''
+	if almacen.numpy is not None and any(isinstance(v, almacen.numpy.ndarray) for v in (a, b, c)):
+		return almacen.numpy.maximum(almacen.numpy.maximum(a, b), c)
+	return max(a, b, c)
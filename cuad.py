@@ -10,136 +10,32 @@ Este módulo solo define y gestiona estos objetos, pero no toma partido
 en cuanto a dimensiones ni propiedades gráficas. Para poder dibujar
 una grilla se debe extender estos objetos agregando las propiedades 
 que definen las dimensiones y los métodos y funciones que permitan 
-graficarla
+graficarla, y asignar las subclases a los atributos clase_celda, 
+clase_pared y clase_vertice de una subclase de Grilla
 
 
 Autor: Martín S. López Paglione
 e-mail: martincholp@hotmail.com
 '''
-class Grilla(object):
-	"""Grilla de celdas cuadradas"""
-	def __init__(self, filas, columnas):
-		'''Grilla de celdas cuadradas 
-		Los parámetros filas y columnas me dan la dimensión de la 
-		grilla. 
-		'''
-		self._filas = filas
-		self._columnas = columnas
+import almacen
 
-		self._celdas = {}  #  (f, c)
-		self._paredes = {}  #  ((f, c), "N|O")
-		self._vertices = {}  #  (f, c)
-
-		# Para crear la grilla debemos ir creando cada elemento
-		# individualmente y almacenarlos en la posición que
-		# corresponde
-
-		for f in xrange(0, filas):
-			for c in xrange(0, columnas):
-
-				# Verifico que la celda no exista
-				if not (f, c) in self._celdas: 
-
-					# Creo la celda
-					new_celda = _Celda((f, c))
-
-					# La vinculo a la grilla padre
-					new_celda._Celda__grid = self  
-												  
-					# Agrego la celda al diccionario
-					self._celdas[(f, c)] = new_celda
-
-
-					# Creo las paredes
-
-					# Indice de las paredes
-					# N
-					pos_pared_N = ((f, c), "N")
-
-					# E 
-					pos_pared_E = ((f, c+1), "O")
-
-					# S
-					pos_pared_S = ((f+1, c), "N")
-
-					# O
-					pos_pared_O = ((f,c), "O")
-
-
-					pos_paredes = (pos_pared_N, pos_pared_E, pos_pared_S, pos_pared_O)
-
-					for cur_pos_pared in pos_paredes:
-
-						# Verifico si existe o no cada pared
-						if not cur_pos_pared in self._paredes:
-
-							# Creo la pared
-							new_pared = _Pared(cur_pos_pared)
-
-							# La vinculo a la grilla padre
-							new_pared._Pared__grid = self  
-														  
-							# Agrego la pared al diccionario
-							self._paredes[cur_pos_pared] = new_pared
-
-
-					# Creo los vértices
-
-					# Indice de los vértices
-					
-					# NO
-					pos_vertice_NO = (f, c)
-
-					# NE
-					pos_vertice_NE = (f, c+1)
-
-					# SE
-					pos_vertice_SE = (f+1, c+1)
-
-					# SO
-					pos_vertice_SO = (f+1, c)
-
-
-					pos_vertices = (pos_vertice_NO, pos_vertice_NE, pos_vertice_SE, pos_vertice_SO)
-
-					for cur_pos_vertice in pos_vertices:
-
-						# Verifico si existe o no cada vértice
-						if not cur_pos_vertice in self._vertices:
-
-							# Creo el vértice
-							new_vertice = _Vertice(cur_pos_vertice)
-
-							# Lo vinculo a la grilla padre
-							new_vertice._Vertice__grid = self  
-														  
-							# Agrego el vértice al diccionario
-							self._vertices[cur_pos_vertice] = new_vertice
-
-	@property
-	def cant_filas(self):
-		'''Cantidad de filas de la grilla. Solo lectura.'''
-		return self._filas
-
-	@property
-	def cant_columnas(self):
-		'''Cantidad de columnas de la grilla. Solo lectura.'''
-		return self._columnas
+class Grilla(almacen.GrillaBase):
+	"""Grilla de celdas cuadradas. Las paredes se indican con 
+	((f, c), "N|O") y los vértices con (f, c). Ver almacen.GrillaBase"""
 
 	@property
-	def cant_celdas(self):
-		'''Cantidad de celdas de la grilla. Solo lectura.'''
-		return len(self._celdas)
+	def rango_paredes(self):
+		'''Cantidad de índices lineales de paredes. Solo lectura.'''
+		if not (self._filas and self._columnas):
+			return 0
+		return (self._filas+1)*self._columnas + self._filas*(self._columnas+1)
 
 	@property
-	def cant_paredes(self):
-		'''Cantidad de paredes de la grilla. Solo lectura.'''
-		return len(self._paredes)
-
-	@property
-	def cant_vertices(self):
-		'''Cantidad de vértices de la grilla. Solo lectura.'''
-		return len(self._vertices)
+	def rango_vertices(self):
+		'''Cantidad de índices lineales de vértices. Solo lectura.'''
+		if not (self._filas and self._columnas):
+			return 0
+		return (self._filas+1)*(self._columnas+1)
 
 	def __str__(self):
 		msg = "Grilla cuadrada de " + str(self.cant_filas) + " filas y " + str(self.cant_columnas) + " columnas"
@@ -149,63 +45,211 @@ class Grilla(object):
 		msg = "Grilla cuadrada de " + str(self.cant_filas) + " filas y " + str(self.cant_columnas) + " columnas"
 		return msg
 
-	def __getitem__(self, pos):
-		'''Retorna la celda indicada en fila,columna'''
-		return self._celdas[pos]
-
-	def __len__(self):
-		'''Cantidad de celdas de la grilla'''
-		return self.cant_celdas()
-
-	def get_celda(self, pos):
-		'''Retorna la celda indicada en pos'''
-		return self._celdas[pos]
-
-	def get_pared(self, pos):
-		'''Retorna la pared indicada en pos'''
-		return self._paredes[pos]
-		
-	def get_vertice(self, pos):
-		'''Retorna el vertice indicado en pos'''
-		return self._vertices[pos]
-		
-	def get_columna(self, numCol):
-		'''Retorna una lista con las celdas que pertenecen a la 
-		columna numCol, ordenadas por fila'''
-		col = [celda for celda in self._celdas.values() if celda.columna == numCol]
-		col.sort(key= lambda c:c.fila)
-		return col
-
-	def get_fila(self, numFil):
-		'''Retorna una lista con las celdas que pertenecen a la fila
-		numFil, ordenadas por columna'''
-		fil = [celda for celda in self._celdas.values() if celda.fila == numFil]
-		fil.sort(key= lambda c:c.columna)
-		return fil	
-
-	def index_celdas(self):
-		'''Retorna una lista con todos los indices de las celdas de 
-		la grilla'''
-		return self._celdas.keys()
-
-	def index_paredes(self):
-		'''Retorna una lista con todos los indices de las paredes de 
-		la grilla'''
-		return self._paredes.keys()
-		
-	def index_vertices(self):
-		'''Retorna una lista con todos los indices de los vértices de 
-		la grilla'''
-		return self._vertices.keys()
+	def existe_pared(self, pos):
+		'''Indica si la pared indicada en pos pertenece a la grilla'''
+		try:
+			(f, c), p = pos
+		except (TypeError, ValueError):
+			return False
+		if not (self._filas and self._columnas):
+			return False
+		if p == "N":
+			return 0 <= f <= self._filas and 0 <= c < self._columnas
+		elif p == "O":
+			return 0 <= f < self._filas and 0 <= c <= self._columnas
+		return False
+
+	def existe_vertice(self, pos):
+		'''Indica si el vértice indicado en pos pertenece a la grilla'''
+		try:
+			f, c = pos
+		except (TypeError, ValueError):
+			return False
+		if not (self._filas and self._columnas):
+			return False
+		return 0 <= f <= self._filas and 0 <= c <= self._columnas
+
+	def indice_pared(self, pos):
+		'''Retorna el índice lineal de la pared indicada en pos. Se
+		numeran primero las paredes "N", por filas, y luego las "O"'''
+		if not self.existe_pared(pos):
+			raise KeyError(pos)
+		return self._indice_pared(pos)
+
+	def posicion_pared(self, indice):
+		'''Retorna la posición de la pared con índice lineal indice'''
+		if not 0 <= indice < self.rango_paredes:
+			raise KeyError(indice)
+		return self._posicion_pared(indice)
+
+	def indice_vertice(self, pos):
+		'''Retorna el índice lineal del vértice indicado en pos. Los
+		vértices se numeran por filas'''
+		if not self.existe_vertice(pos):
+			raise KeyError(pos)
+		return self._indice_vertice(pos)
+
+	def posicion_vertice(self, indice):
+		'''Retorna la posición del vértice con índice lineal indice'''
+		if not 0 <= indice < self.rango_vertices:
+			raise KeyError(indice)
+		return self._posicion_vertice(indice)
+
+	def _indice_pared(self, pos):
+		'''Índice lineal de la pared pos, sin verificar que exista'''
+		(f, c), p = pos
+		if p == "N":
+			return f*self._columnas + c
+		else:
+			return (self._filas+1)*self._columnas + f*(self._columnas+1) + c
+
+	def _posicion_pared(self, indice):
+		'''Posición de la pared indice, sin verificar que exista'''
+		inicio_O = (self._filas+1)*self._columnas
+		if indice < inicio_O:
+			return (divmod(indice, self._columnas), "N")
+		else:
+			return (divmod(indice - inicio_O, self._columnas+1), "O")
+
+	def _indice_vertice(self, pos):
+		'''Índice lineal del vértice pos, sin verificar que exista'''
+		return pos[0]*(self._columnas+1) + pos[1]
+
+	def _posicion_vertice(self, indice):
+		'''Posición del vértice indice, sin verificar que exista'''
+		return divmod(indice, self._columnas+1)
+
+	def vecinas_array(self, f0=0, f1=None):
+		'''Retorna un arreglo de numpy de forma (cant_celdas, 4) con 
+		los índices lineales de las vecinas de todas las celdas. La 
+		fila i corresponde a la celda de índice i, y las columnas a 
+		las vecinas N, E, S y O, en ese orden. Las vecinas que no
+		existen (bordes) se indican con -1. Si se indican f0 y f1 solo
+		se incluyen las celdas de las filas f0 a f1-1, en el mismo orden.
+		Requiere numpy.'''
+		numpy = almacen.requiere_numpy()
+
+		F, C = self._filas, self._columnas
+		if f1 is None:
+			f1 = F
+		f = numpy.arange(f0, f1).reshape(-1, 1)
+		c = numpy.arange(C).reshape(1, C)
+
+		res = numpy.empty((f1-f0, C, 4), dtype=numpy.intp)
+		desplazamientos = ((-1, 0), (0, 1), (1, 0), (0, -1))  # N, E, S, O
+		for k, (df, dc) in enumerate(desplazamientos):
+			fv = f + df
+			cv = c + dc
+			existe = (fv >= 0) & (fv < F) & (cv >= 0) & (cv < C)
+			res[:, :, k] = numpy.where(existe, fv*C + cv, -1)
+
+		return res.reshape((f1-f0)*C, 4)
+
+	def paredes_array(self):
+		'''Retorna un arreglo de numpy de forma (cant_celdas, 4) con 
+		los índices lineales de las paredes de todas las celdas. La 
+		fila i corresponde a la celda de índice i, y las columnas a 
+		las paredes N, E, S y O, en ese orden, de modo que la pared 
+		de la columna k separa a la celda de la vecina de la misma 
+		columna en vecinas_array. Requiere numpy.'''
+		numpy = almacen.requiere_numpy()
+
+		F, C = self._filas, self._columnas
+		f = numpy.arange(F).reshape(F, 1)
+		c = numpy.arange(C).reshape(1, C)
+		inicio_O = (F+1)*C
+
+		res = numpy.empty((F, C, 4), dtype=numpy.intp)
+		res[:, :, 0] = f*C + c  # N
+		res[:, :, 1] = inicio_O + f*(C+1) + c+1  # E
+		res[:, :, 2] = (f+1)*C + c  # S
+		res[:, :, 3] = inicio_O + f*(C+1) + c  # O
+
+		return res.reshape(F*C, 4)
+
+	def planos_paredes(self):
+		'''Retorna una lista de tuplas (plano, inicio, fin) con los
+		rangos de índices lineales de las paredes de cada orientación:
+		"N" para las horizontales y "O" para las verticales'''
+		if not (self._filas and self._columnas):
+			return [("N", 0, 0), ("O", 0, 0)]
+		inicio_O = (self._filas+1)*self._columnas
+		return [("N", 0, inicio_O), ("O", inicio_O, self.rango_paredes)]
+
+	def distancia(self, pos1, pos2):
+		'''Retorna la distancia entre las celdas de las posiciones 
+		pos1 y pos2, medida en cantidad de pasos entre celdas vecinas
+		(distancia Manhattan)'''
+		return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+	def _elementos(self):
+		'''Clases por omisión de las celdas, paredes y vértices'''
+		return _Celda, _Pared, _Vertice
+
+	def _relaciones(self):
+		'''Relaciones entre los elementos de la grilla (ver 
+		_RELACIONES)'''
+		return _RELACIONES
+
+	def _cantidades(self):
+		'''Cantidades de paredes y vértices de la grilla compacta, que
+		coinciden con sus rangos de índices'''
+		return self.rango_paredes, self.rango_vertices
+
+	def _nueva_plantilla(self, filas, columnas):
+		'''Grilla compacta de filas por columnas con la misma 
+		numeración que esta, sin las clases de elementos propias'''
+		return Grilla(filas, columnas, compacta=True)
+
+	def _celda_de(self, tipo, pos):
+		'''Posición de la celda de referencia del elemento pos de tipo: 
+		la de la posición de la pared, o la celda de la que el vértice
+		es la esquina NO'''
+		return pos[0] if tipo == "pared" else pos
+
+	def _trasladar(self, tipo, pos, df, dc):
+		'''Posición del elemento pos de tipo con su celda de referencia
+		desplazada df filas hacia arriba y dc columnas a la izquierda'''
+		if tipo == "pared":
+			(f, c), p = pos
+			return ((f-df, c-dc), p)
+		return (pos[0]-df, pos[1]-dc)
+
+	def _posiciones_paredes(self):
+		'''Iterador con las posiciones de las paredes, ordenadas por
+		índice lineal. Se enumeran directamente, sin repetir ninguna'''
+		F, C = self._filas, self._columnas
+		if not (F and C):
+			return
+
+		for f in xrange(F+1):
+			for c in xrange(C):
+				yield ((f, c), "N")
+		for f in xrange(F):
+			for c in xrange(C+1):
+				yield ((f, c), "O")
+
+	def _posiciones_vertices(self):
+		'''Iterador con las posiciones de los vértices, ordenadas por
+		índice lineal. Se enumeran directamente, sin repetir ninguno'''
+		F, C = self._filas, self._columnas
+		if not (F and C):
+			return
+
+		for f in xrange(F+1):
+			for c in xrange(C+1):
+				yield (f, c)
 
 class _Celda(object):
 	"""Celda cuadrada"""
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 		'''Define una celda cuadrada. El parámetro pos es una
 		tupla que indica la fila y columna de la celda.'''
 
 		self._pos = pos  # Coordenadas en la grilla
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -227,6 +271,11 @@ class _Celda(object):
 		'''Devuelve la columna de la celda. Solo lectura'''
 		return self._pos[1]
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal de la celda. Solo lectura'''
+		return self.__grid._indice_celda(self._pos)
+
 	def __str__(self):
 		msg = "Celda " + str(self.posicion)
 		return msg
@@ -234,7 +283,22 @@ class _Celda(object):
 	def __repr__(self):
 		msg = "Celda " + str(self.posicion)
 		return msg
+
+	def __eq__(self, otro):
+		return isinstance(otro, _Celda) and self._pos == otro._pos and self.__grid is otro._Celda__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "celda", self._pos))
 	
+	@almacen.memorizada("celda_paredes")
 	def paredes(self):
 		'''Devuelve un diccionario con las paredes de la celda. La 
 		clave del diccionario es la posición relativa, y el valor la 
@@ -251,28 +315,13 @@ class _Celda(object):
 
 		>>> pared_Norte = objCelda.paredes()["N"]'''
 
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
 
 		# Las paredes se extraen del conjunto de paredes de la grilla
 		# padre
-		
-		# Indice de las paredes
-	
-		# N
-		pos_pared_N = ((f, c), "N")
-
-		# E 
-		pos_pared_E = ((f, c+1), "O")
-
-		# S
-		pos_pared_S = ((f+1, c), "N")
-
-		# O
-		pos_pared_O = ((f,c), "O")
-
-
-		pos_paredes = (pos_pared_N, pos_pared_E, pos_pared_S, pos_pared_O)
+		pos_paredes = _paredes_celda(self._pos)
 		posRel = ("N", "E", "S", "O")
 
 		res_paredes = {}
@@ -291,8 +340,15 @@ class _Celda(object):
 		"S"  --> pared sur
 		"O"  --> pared oeste'''
 
-		return self.paredes()[posRel]
+		tabla = self.__grid.adyacencia("celda_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
+
+		# Se toma la pared pedida por su lugar en la tupla
+		pos_pared = _paredes_celda(self._pos)[_lugar("celda_paredes", posRel)]
+		return self.__grid.get_pared(pos_pared)
 		
+	@almacen.memorizada("celda_vecinas")
 	def vecinas(self):
 		'''Devuelve un diccionario con las celdas vecinas. La clave
 		del diccionario es la posición relativa, y el valor la celda 
@@ -305,35 +361,18 @@ class _Celda(object):
 		"S"  --> vecina sur
 		"O"  --> vecina oeste'''
 
-
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_vecinas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
 
 		# Las celdas vecinas se extraen del conjunto de celdas de la 
 		# grilla padre.
-		
-		# Índice de las vecinas
-		
-		# N
-		pos_vecina_N = (f-1, c)
-
-		# E 
-		pos_vecina_E = (f, c+1)
-
-		# S
-		pos_vecina_S = (f+1, c)
-
-		# O
-		pos_vecina_O = (f, c-1)
-
-
-		pos_vecinas = (pos_vecina_N, pos_vecina_E, pos_vecina_S, pos_vecina_O)
+		pos_vecinas = _vecinas_celda(self._pos)
 		posRel = ("N", "E", "S", "O")
 
 		res_vecinas = {}
-		indice_celdas = self.__grid.index_celdas()
 		for k in xrange(0,4):
-			if pos_vecinas[k] in indice_celdas:  # Verifico que la celda exista
+			if self.__grid.existe_celda(pos_vecinas[k]):  # Verifico que la celda exista
 				res_vecinas[posRel[k]] = self.__grid.get_celda(pos_vecinas[k])
 			else:  # Si no existe entonces es un borde y no hay vecina
 				res_vecinas[posRel[k]] = None
@@ -349,9 +388,18 @@ class _Celda(object):
 		"E"  --> vecina este
 		"S"  --> vecina sur
 		"O"  --> vecina oeste'''
-		
-		return self.vecinas()[posRel]
 
+		tabla = self.__grid.adyacencia("celda_vecinas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
+
+		# Se toma la vecina pedida por su lugar en la tupla
+		pos_vecina = _vecinas_celda(self._pos)[_lugar("celda_vecinas", posRel)]
+		if self.__grid.existe_celda(pos_vecina):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_vecina)
+		return None
+
+	@almacen.memorizada("celda_vertices")
 	def vertices(self):
 		'''Devuelve un diccionario con los vértices de la celda. 
 		La clave del diccionario es la posición relativa, y el valor 
@@ -364,31 +412,16 @@ class _Celda(object):
 		"SE"  --> vertice sur
 		"SO"  --> vertice oeste'''
 
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[2])
 
 		# Los vértices se extraen del conjunto de vértices de la 
 		# grilla padre.
-		
-		# Índice de los vértices
-		
-		# NO
-		pos_vertice_NO = (f, c)
-
-		# NE 
-		pos_vertice_NE = (f, c+1)
-
-		# SE
-		pos_vertice_SE = (f+1, c+1)
-
-		# SO
-		pos_vertice_SO = (f+1, c)
-
-		pos_vertices = (pos_vertice_NO, pos_vertice_NE, pos_vertice_SE, pos_vertice_SO)
+		pos_vertices = _vertices_celda(self._pos)
 		posRel = ("NO", "NE", "SE", "SO")
 
 		res_vertices = {}
-		
 		for k in xrange(0,4):
 			res_vertices[posRel[k]] = self.__grid.get_vertice(pos_vertices[k])
 
@@ -404,7 +437,13 @@ class _Celda(object):
 		"SE"  --> vertice sur
 		"SO"  --> vertice oeste'''
 
-		return self.vertices()[posRel]
+		tabla = self.__grid.adyacencia("celda_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[2])
+
+		# Se toma el vértice pedido por su lugar en la tupla
+		pos_vertice = _vertices_celda(self._pos)[_lugar("celda_vertices", posRel)]
+		return self.__grid.get_vertice(pos_vertice)
 	
 class _Pared(object):
 	"""Pared de la celda. El parámetro pos es una tupla	que indica la
@@ -431,10 +470,12 @@ class _Pared(object):
 	que menciona no existe. En el caso de la pared O de una celda de 
 	la columna 0, la pared sería nombrada referida a una columna con
 	índice negativo."""
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 
 		self._pos = pos
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -447,6 +488,11 @@ class _Pared(object):
 		lectura'''
 		return self._pos
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal de la pared. Solo lectura'''
+		return self.__grid._indice_pared(self._pos)
+
 	def __str__(self):
 		msg = "Pared " + str(self.id)
 		return msg
@@ -455,6 +501,21 @@ class _Pared(object):
 		msg = "Pared " + str(self.id)
 		return msg
 
+	def __eq__(self, otro):
+		return isinstance(otro, _Pared) and self._pos == otro._pos and self.__grid is otro._Pared__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "pared", self._pos))
+
+	@almacen.memorizada("pared_vertices")
 	def vertices(self):
 		'''Devuelve un diccionario con los vértices de la pared. 
 		La clave del diccionario es la posición relativa, y el valor 
@@ -462,21 +523,14 @@ class _Pared(object):
 		vértice superior de una pared vertical, o si la pared es 
 		horizontal es el vértice izquierdo. La posición B es el otro
 		vértice (el inferior o el derecho, según sea el caso)'''
-		
-		# Cada pared tiene 2 vértices, y obtenerlos depende de la
-		# posición relativa en su id
-
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
 
-		if p == "N":
-			pos_A = (f  , c  )
-			pos_B = (f  , c+1)
-
-		elif p == "O":
-			pos_A = (f  , c)
-			pos_B = (f+1 , c)
+		tabla = self.__grid.adyacencia("pared_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[2])
 
+		# Cada pared tiene 2 vértices, y obtenerlos depende de la
+		# posición relativa en su id
+		pos_A, pos_B = _vertices_pared(self.id)
 
 		res_vertices = {"A":self.__grid.get_vertice(pos_A), "B":self.__grid.get_vertice(pos_B) }
 
@@ -494,40 +548,36 @@ class _Pared(object):
 		vertical o el izquierdo si es horizontal. El otro vértice se 
 		considera vértice final (o vértice B)'''
 
-		return self.vertices()[posRel]
+		tabla = self.__grid.adyacencia("pared_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[2])
+
+		# Se toma el vértice pedido por su lugar en la tupla
+		pos_vertice = _vertices_pared(self.id)[_lugar("pared_vertices", posRel)]
+		return self.__grid.get_vertice(pos_vertice)
 
+	@almacen.memorizada("pared_celdas")
 	def celdas(self):
 		'''Devuelve un diccionario con las celdas adyacentes. La clave
 		del diccionario es la posición relativa, y el valor la celda 
 		adyacente en cuestión. Si el valor de celda es None entonces
 		la pared es un borde.'''
 
+		tabla = self.__grid.adyacencia("pared_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
+
 		# Cada pared tiene 2 celdas adyacentes, y obtenerlas depende 
 		# de la posición relativa en su id.
+		pos_celdas = _celdas_pared(self.id)
+		posRel = ("A", "B")
 
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
-
-		if p == "N":
-			pos_A = (f-1, c)
-			pos_B = (f  , c)
-
-		elif p == "O":  
-			pos_A = (f  , c-1)
-			pos_B = (f  , c)
-
-
-		indice_celdas = self.__grid.index_celdas()
 		res_celdas = {}
-		if pos_A in indice_celdas:  # Verifico que la celda exista
-			res_celdas['A'] = self.__grid.get_celda(pos_A)
-		else:  # Si no existe entonces es un borde
-			res_celdas['A'] = None
-
-		if pos_B in indice_celdas:  # Verifico que la celda exista
-			res_celdas['B'] = self.__grid.get_celda(pos_B)
-		else:  # Si no existe entonces es un borde
-			res_celdas['B'] = None
+		for k in xrange(0,2):
+			if self.__grid.existe_celda(pos_celdas[k]):  # Verifico que la celda exista
+				res_celdas[posRel[k]] = self.__grid.get_celda(pos_celdas[k])
+			else:  # Si no existe entonces es un borde
+				res_celdas[posRel[k]] = None
 
 		return res_celdas
 
@@ -541,69 +591,39 @@ class _Pared(object):
 
 		La celda A es la superior para una pared horizontal o la 
 		izquierda para una pared vertical. La otra celda se 
-		considera celda B''' 
+		considera celda B'''
+
+		tabla = self.__grid.adyacencia("pared_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
 
-		return self.celdas()[posRel]
+		# Se toma la celda pedida por su lugar en la tupla
+		pos_celda = _celdas_pared(self.id)[_lugar("pared_celdas", posRel)]
+		if self.__grid.existe_celda(pos_celda):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_celda)
+		return None
 	
+	@almacen.memorizada("pared_continuaciones")
 	def continuaciones(self):
 		'''Devuelve un diccionario con las paredes con las que 
 		comparte un vértice. La clave del diccionario es la posición
 		relativa, y el valor la pared en cuestion'''
 
+		tabla = self.__grid.adyacencia("pared_continuaciones")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
+
 		# Cada pared tiene 6 paredes continuaciones, y obtenerlas 
 		# depende de la posición relativa en su id
-
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
-
-		if p == "N":
-			pos_AI = ((f  , c  ), "O")
-			pos_AC = ((f  , c-1), "N")
-			pos_AD = ((f-1, c  ), "O")
-			pos_BI = ((f-1, c+1), "O")
-			pos_BC = ((f  , c+1), "N")
-			pos_BD = ((f  , c+1), "O")
-
-		elif p == "O":  
-			pos_AI = ((f  , c-1), "N")
-			pos_AC = ((f-1, c  ), "O")
-			pos_AD = ((f  , c  ), "N")
-			pos_BI = ((f+1, c  ), "N")
-			pos_BC = ((f+1, c  ), "O")
-			pos_BD = ((f+1, c-1), "N")
+		pos_continuaciones = _continuaciones_pared(self.id)
+		posRel = ("AI", "AC", "AD", "BI", "BC", "BD")
 
 		res_continuaciones = {} 
-		indice_paredes = self.__grid.index_paredes()
-
-		if pos_AI in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["AI"] = self.__grid.get_pared(pos_AI)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["AI"] = None
-
-		if pos_AC in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["AC"] = self.__grid.get_pared(pos_AC)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["AC"] = None
-
-		if pos_AD in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["AD"] = self.__grid.get_pared(pos_AD)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["AD"] = None
-		
-		if pos_BI in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["BI"] = self.__grid.get_pared(pos_BI)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["BI"] = None
-		
-		if pos_BC in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["BC"] = self.__grid.get_pared(pos_BC)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["BC"] = None
-		
-		if pos_BD in indice_paredes:  # Verifico que la pared exista
-			res_continuaciones["BD"] = self.__grid.get_pared(pos_BD)
-		else:  # Si no existe entonces es un borde y no hay continuación
-			res_continuaciones["BD"] = None
+		for k in xrange(0,6):
+			if self.__grid.existe_pared(pos_continuaciones[k]):  # Verifico que la pared exista
+				res_continuaciones[posRel[k]] = self.__grid.get_pared(pos_continuaciones[k])
+			else:  # Si no existe entonces es un borde y no hay continuación
+				res_continuaciones[posRel[k]] = None
 
 		return res_continuaciones
 
@@ -624,8 +644,15 @@ class _Pared(object):
 		nuestras espaldas. Delante nuestro tendremos las 
 		continuaciones izquierda, central y derecha.'''
 
+		tabla = self.__grid.adyacencia("pared_continuaciones")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
 
-		return self.continuaciones()[posRel]
+		# Se toma la continuación pedida por su lugar en la tupla
+		pos_continuacion = _continuaciones_pared(self.id)[_lugar("pared_continuaciones", posRel)]
+		if self.__grid.existe_pared(pos_continuacion):  # Verifico que la pared exista
+			return self.__grid.get_pared(pos_continuacion)
+		return None
 
 class _Vertice(object):
 	"""Vértice de una celda. El id del vértice será el mismo que el
@@ -635,10 +662,12 @@ class _Vertice(object):
 	suponiendo una celda fantasma y nombrando al vértice relativo a
 	ésta. Ésta celda fantasma realmente no existe y sirve solamente 
 	para nombrar el vértice. """
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 		
 		self._pos = pos
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -651,6 +680,11 @@ class _Vertice(object):
 		lectura'''
 		return self._pos
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal del vértice. Solo lectura'''
+		return self.__grid._indice_vertice(self._pos)
+
 	def __str__(self):
 		msg = "Vertice " + str(self.id)
 		return msg
@@ -658,40 +692,40 @@ class _Vertice(object):
 	def __repr__(self):
 		msg = "Vertice " + str(self.id)
 		return msg
+
+	def __eq__(self, otro):
+		return isinstance(otro, _Vertice) and self._pos == otro._pos and self.__grid is otro._Vertice__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "vertice", self._pos))
 	
+	@almacen.memorizada("vertice_paredes")
 	def paredes(self):
 		'''Devuelve un diccionario con las paredes que convergen en el
 		vértice. La clave del diccionario es la posición relativa, y 
 		el valor la pared en cuestión'''
 
-		f, c = self.id  # fila y columna del id del vertice
-		
-		pos_N = ((f-1, c  ), "O")
-		pos_E = ((f  , c  ), "N")
-		pos_S = ((f  , c  ), "O")
-		pos_O = ((f  , c-1), "N")
+		tabla = self.__grid.adyacencia("vertice_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
+
+		pos_paredes = _paredes_vertice(self.id)
+		posRel = ("N", "E", "S", "O")
 
-		indice_paredes = self.__grid.index_paredes()
 		res_paredes = {}
-		if pos_N in indice_paredes:  # Verifico que la pared exista
-			res_paredes['N'] = self.__grid.get_pared(pos_N)
-		else:  # Si no existe entonces es un borde
-			res_paredes['N'] = None
-
-		if pos_E in indice_paredes:  # Verifico que la pared exista
-			res_paredes['E'] = self.__grid.get_pared(pos_E)
-		else:  # Si no existe entonces es un borde
-			res_paredes['E'] = None
-
-		if pos_S in indice_paredes:  # Verifico que la pared exista
-			res_paredes['S'] = self.__grid.get_pared(pos_S)
-		else:  # Si no existe entonces es un borde
-			res_paredes['S'] = None
-
-		if pos_O in indice_paredes:  # Verifico que la pared exista
-			res_paredes['O'] = self.__grid.get_pared(pos_O)
-		else:  # Si no existe entonces es un borde
-			res_paredes['O'] = None
+		for k in xrange(0,4):
+			if self.__grid.existe_pared(pos_paredes[k]):  # Verifico que la pared exista
+				res_paredes[posRel[k]] = self.__grid.get_pared(pos_paredes[k])
+			else:  # Si no existe entonces es un borde
+				res_paredes[posRel[k]] = None
 
 		return res_paredes
 
@@ -709,42 +743,35 @@ class _Vertice(object):
 		las paredes adyacentes será None, indicando que pertenece a
 		una celda fantasma.'''
 
-		return self.paredes()[posRel]
+		tabla = self.__grid.adyacencia("vertice_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
 
+		# Se toma la pared pedida por su lugar en la tupla
+		pos_pared = _paredes_vertice(self.id)[_lugar("vertice_paredes", posRel)]
+		if self.__grid.existe_pared(pos_pared):  # Verifico que la pared exista
+			return self.__grid.get_pared(pos_pared)
+		return None
+
+	@almacen.memorizada("vertice_celdas")
 	def celdas(self):
 		'''Devuelve un diccionario con las celdas adyacentes. La clave
 		del diccionario es la posición relativa, y el valor la celda 
 		adyacente en cuestión'''
 
-		f, c = self.id[0]  # fila y columna del id del vertice
+		tabla = self.__grid.adyacencia("vertice_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
 
-		pos_NO = (f-1, c-1)
-		pos_NE = (f-1, c  )
-		pos_SE = (f  , c  )
-		pos_SO = (f  , c-1)
+		pos_celdas = _celdas_vertice(self.id)
+		posRel = ("NO", "NE", "SE", "SO")
 
-		indice_celdas = self.__grid.index_celdas()
 		res_celdas = {}
-
-		if pos_NO in indice_celdas:  # Verifico que la celda exista
-			res_celdas['NO'] = self.__grid.get_celda(pos_NO)
-		else:  # Si no existe entonces es un borde
-			res_celdas['NO'] = None
-
-		if pos_NE in indice_celdas:  # Verifico que la celda exista
-			res_celdas['NE'] = self.__grid.get_celda(pos_NE)
-		else:  # Si no existe entonces es un borde
-			res_celdas['NE'] = None
-
-		if pos_SE in indice_celdas:  # Verifico que la celda exista
-			res_celdas['SE'] = self.__grid.get_celda(pos_SE)
-		else:  # Si no existe entonces es un borde
-			res_celdas['SE'] = None
-
-		if pos_SO in indice_celdas:  # Verifico que la celda exista
-			res_celdas['SO'] = self.__grid.get_celda(pos_SO)
-		else:  # Si no existe entonces es un borde
-			res_celdas['SO'] = None
+		for k in xrange(0,4):
+			if self.__grid.existe_celda(pos_celdas[k]):  # Verifico que la celda exista
+				res_celdas[posRel[k]] = self.__grid.get_celda(pos_celdas[k])
+			else:  # Si no existe entonces es un borde
+				res_celdas[posRel[k]] = None
 
 		return res_celdas
 	
@@ -762,5 +789,118 @@ class _Vertice(object):
 		las celdas adyacentes será None, indicando que ésta es una 
 		celda fantasma'''
 
-		return self.celdas()[posRel]
-
+		tabla = self.__grid.adyacencia("vertice_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
+
+		# Se toma la celda pedida por su lugar en la tupla
+		pos_celda = _celdas_vertice(self.id)[_lugar("vertice_celdas", posRel)]
+		if self.__grid.existe_celda(pos_celda):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_celda)
+		return None
+
+
+# Posiciones relativas de cada relación, en el orden de las posiciones
+# que devuelve su función, y lugar de cada una
+_CLAVES = {
+	"celda_paredes": ("N", "E", "S", "O"),
+	"celda_vecinas": ("N", "E", "S", "O"),
+	"celda_vertices": ("NO", "NE", "SE", "SO"),
+	"pared_vertices": ("A", "B"),
+	"pared_celdas": ("A", "B"),
+	"pared_continuaciones": ("AI", "AC", "AD", "BI", "BC", "BD"),
+	"vertice_paredes": ("N", "E", "S", "O"),
+	"vertice_celdas": ("NO", "NE", "SE", "SO"),
+}
+_LUGARES = dict((relacion, dict((clave, k) for k, clave in enumerate(claves))) for relacion, claves in _CLAVES.items())
+
+def _lugar(relacion, posRel):
+	'''Devuelve el lugar de la posición relativa posRel entre las
+	posiciones de relacion. Si posRel no es una de ellas se produce
+	KeyError'''
+
+	lugar = _LUGARES[relacion].get(posRel)
+	if lugar is None:
+		raise KeyError("Posición relativa desconocida: " + str(posRel))
+	return lugar
+
+def _paredes_celda(pos):
+	'''Devuelve las posiciones de las paredes N, E, S y O de la celda 
+	pos'''
+
+	f, c = pos
+	return ((f, c), "N"), ((f, c+1), "O"), ((f+1, c), "N"), ((f, c), "O")
+
+def _vecinas_celda(pos):
+	'''Devuelve las posiciones de las celdas vecinas N, E, S y O de la
+	celda pos, existan o no en la grilla'''
+
+	f, c = pos
+	return (f-1, c), (f, c+1), (f+1, c), (f, c-1)
+
+def _vertices_celda(pos):
+	'''Devuelve las posiciones de los vértices NO, NE, SE y SO de la 
+	celda pos'''
+
+	f, c = pos
+	return (f, c), (f, c+1), (f+1, c+1), (f+1, c)
+
+def _vertices_pared(pos):
+	'''Devuelve las posiciones de los vértices A y B de la pared pos'''
+
+	(f, c), p = pos
+	if p == "N":
+		return (f, c), (f, c+1)
+	elif p == "O":
+		return (f, c), (f+1, c)
+
+def _celdas_pared(pos):
+	'''Devuelve las posiciones de las celdas A y B adyacentes a la 
+	pared pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "N":
+		return (f-1, c), (f, c)
+	elif p == "O":
+		return (f, c-1), (f, c)
+
+def _continuaciones_pared(pos):
+	'''Devuelve las posiciones de las continuaciones AI, AC, AD, BI, 
+	BC y BD de la pared pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "N":
+		return (((f  , c  ), "O"), ((f  , c-1), "N"), ((f-1, c  ), "O"),
+				((f-1, c+1), "O"), ((f  , c+1), "N"), ((f  , c+1), "O"))
+	elif p == "O":
+		return (((f  , c-1), "N"), ((f-1, c  ), "O"), ((f  , c  ), "N"),
+				((f+1, c  ), "N"), ((f+1, c  ), "O"), ((f+1, c-1), "N"))
+
+def _paredes_vertice(pos):
+	'''Devuelve las posiciones de las paredes N, E, S y O que convergen
+	en el vértice pos, existan o no en la grilla'''
+
+	f, c = pos
+	return ((f-1, c), "O"), ((f, c), "N"), ((f, c), "O"), ((f, c-1), "N")
+
+def _celdas_vertice(pos):
+	'''Devuelve las posiciones de las celdas NO, NE, SE y SO 
+	adyacentes al vértice pos, existan o no en la grilla'''
+
+	f, c = pos
+	return (f-1, c-1), (f-1, c), (f, c), (f, c-1)
+
+# Para cada relación: posiciones relativas, tipo de elemento de origen,
+# tipo de elemento relacionado y función que calcula las posiciones
+# relacionadas. Con ellas almacen.GrillaBase construye las tablas de
+# adyacencia
+_RELACIONES = {
+	"celda_paredes": (_CLAVES["celda_paredes"], "celda", "pared", _paredes_celda),
+	"celda_vecinas": (_CLAVES["celda_vecinas"], "celda", "celda", _vecinas_celda),
+	"celda_vertices": (_CLAVES["celda_vertices"], "celda", "vertice", _vertices_celda),
+	"pared_vertices": (_CLAVES["pared_vertices"], "pared", "vertice", _vertices_pared),
+	"pared_celdas": (_CLAVES["pared_celdas"], "pared", "celda", _celdas_pared),
+	"pared_continuaciones": (_CLAVES["pared_continuaciones"], "pared", "pared", _continuaciones_pared),
+	"vertice_paredes": (_CLAVES["vertice_paredes"], "vertice", "pared", _paredes_vertice),
+	"vertice_celdas": (_CLAVES["vertice_celdas"], "vertice", "celda", _celdas_vertice),
+}
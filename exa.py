@@ -10,191 +10,39 @@ Este módulo solo define y gestiona estos objetos, pero no toma partido
 en cuanto a dimensiones ni propiedades gráficas. Para poder dibujar
 una grilla se debe extender estos objetos agregando las propiedades 
 que definen las dimensiones y los métodos y funciones que permitan 
-graficarla
+graficarla, y asignar las subclases a los atributos clase_celda, 
+clase_pared y clase_vertice de una subclase de Grilla
 
 
 Autor: Martín S. López Paglione
 e-mail: martincholp@hotmail.com
 '''
-class Grilla(object):
-	"""Grilla de celdas hexagonales"""
-	def __init__(self, filas, columnas):
-		'''Grilla de celdas hexagonales (tipo panal de abejas)
-		Los parámetros filas y columnas me dan la dimensión de la 
-		grilla. 
-		La forma de las celdas serán hexágonos horizontales, y las 
-		columnas impares estarán más bajas que las pares.'''
-		self._filas = filas
-		self._columnas = columnas
+import almacen
+import coordenadas
 
-		self._celdas = {}  #  (f, c)
-		self._paredes = {}  #  ((f, c), "NO|N|NE")
-		self._vertices = {}  #  ((f, c), "O|E")
-
-		# Para crear la grilla debemos ir creando cada elemento
-		# individualmente y almacenarlos en la posición que
-		# corresponde
-
-		for f in xrange(0, filas):
-			for c in xrange(0, columnas):
-
-				# Verifico que la celda no exista
-				if not (f, c) in self._celdas: 
-
-					# Creo la celda
-					new_celda = _Celda((f, c))
-
-					# La vinculo a la grilla padre
-					new_celda._Celda__grid = self  
-												  
-					# Agrego la celda al diccionario
-					self._celdas[(f, c)] = new_celda
-
-
-					# Creo las paredes
-					# Las paredes pueden depender de si la columna es
-					# par o impar
-
-					# Indice de las paredes
-					if not c%2:  # Si es par 
-						# NO
-						pos_pared_NO = ((f, c), "NO")
-
-						# N 
-						pos_pared_N = ((f, c), "N")
-
-						# NE
-						pos_pared_NE = ((f, c), "NE")
-
-						# SE
-						pos_pared_SE = ((f,c+1), "NO")
-
-						# S
-						pos_pared_S = ((f+1,c), "N")
-
-						# SO
-						pos_pared_SO = ((f,c-1), "NE")
-
-					else:  # Si es impar
-						# NO
-						pos_pared_NO = ((f, c), "NO")
-
-						# N 
-						pos_pared_N = ((f, c), "N")
-
-						# NE
-						pos_pared_NE = ((f, c), "NE")
-
-						# SE
-						pos_pared_SE = ((f+1,c+1), "NO")
-
-						# S
-						pos_pared_S = ((f+1,c), "N")
-
-						# SO
-						pos_pared_SO = ((f+1,c-1), "NE")
-
-					pos_paredes = (pos_pared_NO, pos_pared_N, pos_pared_NE, pos_pared_SE, pos_pared_S, pos_pared_SO)
-
-					for cur_pos_pared in pos_paredes:
-
-						# Verifico si existe o no cada pared
-						if not cur_pos_pared in self._paredes:
-
-							# Creo la pared
-							new_pared = _Pared(cur_pos_pared)
-
-							# La vinculo a la grilla padre
-							new_pared._Pared__grid = self  
-														  
-							# Agrego la pared al diccionario
-							self._paredes[cur_pos_pared] = new_pared
-
-
-					# Creo los vértices
-					# Los vértices pueden depender de si la columna es
-					# par o impar
-
-					# Indice de los vértices
-					if not c%2:  # Si es par 
-						# NO
-						pos_vertice_NO = ((f-1, c-1), "E")
-
-						# NE
-						pos_vertice_NE = ((f-1, c+1), "O")
-
-						# E
-						pos_vertice_E = ((f, c), "E")
-
-						# SE
-						pos_vertice_SE = ((f, c+1), "O")
-
-						# SO
-						pos_vertice_SO = ((f, c-1), "E")
-
-						# O
-						pos_vertice_O = ((f, c), "O")
-
-					else:  # Si es impar
-						# NO
-						pos_vertice_NO = ((f, c-1), "E")
-
-						# NE
-						pos_vertice_NE = ((f, c+1), "O")
-
-						# E
-						pos_vertice_E = ((f, c), "E")
-
-						# SE
-						pos_vertice_SE = ((f+1, c+1), "O")
-
-						# SO
-						pos_vertice_SO = ((f+1, c-1), "E")
-
-						# O
-						pos_vertice_O = ((f, c), "O")
-
-
-					pos_vertices = (pos_vertice_NO, pos_vertice_NE, pos_vertice_E, pos_vertice_SE, pos_vertice_SO, pos_vertice_O)
-
-					for cur_pos_vertice in pos_vertices:
-
-						# Verifico si existe o no cada vértice
-						if not cur_pos_vertice in self._vertices:
-
-							# Creo el vértice
-							new_vertice = _Vertice(cur_pos_vertice)
-
-							# Lo vinculo a la grilla padre
-							new_vertice._Vertice__grid = self  
-														  
-							# Agrego el vértice al diccionario
-							self._vertices[cur_pos_vertice] = new_vertice
-
-	@property
-	def cant_filas(self):
-		'''Cantidad de filas de la grilla. Solo lectura.'''
-		return self._filas
-
-	@property
-	def cant_columnas(self):
-		'''Cantidad de columnas de la grilla. Solo lectura.'''
-		return self._columnas
-
-	@property
-	def cant_celdas(self):
-		'''Cantidad de celdas de la grilla. Solo lectura.'''
-		return len(self._celdas)
+class Grilla(almacen.GrillaBase):
+	"""Grilla de celdas hexagonales. La forma de las celdas serán 
+	hexágonos horizontales, y las columnas impares estarán más bajas 
+	que las pares. Las paredes se indican con ((f, c), "NO|N|NE") y 
+	los vértices con ((f, c), "O|E"). Ver almacen.GrillaBase"""
 
 	@property
-	def cant_paredes(self):
-		'''Cantidad de paredes de la grilla. Solo lectura.'''
-		return len(self._paredes)
+	def rango_paredes(self):
+		'''Cantidad de índices lineales de paredes. Algunos índices 
+		de los bordes no corresponden a ninguna pared, por lo que 
+		puede ser mayor que cant_paredes. Solo lectura.'''
+		if not (self._filas and self._columnas):
+			return 0
+		return (self._filas+1)*(3*self._columnas+2)
 
 	@property
-	def cant_vertices(self):
-		'''Cantidad de vértices de la grilla. Solo lectura.'''
-		return len(self._vertices)
+	def rango_vertices(self):
+		'''Cantidad de índices lineales de vértices. Algunos índices 
+		de los bordes no corresponden a ningún vértice, por lo que 
+		puede ser mayor que cant_vertices. Solo lectura.'''
+		if not (self._filas and self._columnas):
+			return 0
+		return 2*(self._filas+2)*(self._columnas+1)
 
 	def __str__(self):
 		msg = "Grilla hexagonal de " + str(self.cant_filas) + " filas y " + str(self.cant_columnas) + " columnas"
@@ -204,63 +52,288 @@ class Grilla(object):
 		msg = "Grilla hexagonal de " + str(self.cant_filas) + " filas y " + str(self.cant_columnas) + " columnas"
 		return msg
 
-	def __getitem__(self, pos):
-		'''Retorna la celda indicada en pos'''
-		return self._celdas[pos]
-
-	def __len__(self):
-		'''Cantidad de celdas de la grilla'''
-		return self.cant_celdas()
-
-	def get_celda(self, pos):
-		'''Retorna la celda indicada en pos'''
-		return self._celdas[pos]
-
-	def get_pared(self, pos):
-		'''Retorna la pared indicada en pos'''
-		return self._paredes[pos]
-		
-	def get_vertice(self, pos):
-		'''Retorna el vertice indicado en pos'''
-		return self._vertices[pos]
-		
-	def get_columna(self, numCol):
-		'''Retorna una lista con las celdas que pertenecen a la 
-		columna numCol, ordenadas por fila'''
-		col = [celda for celda in self._celdas.values() if celda.columna == numCol]
-		col.sort(key= lambda c:c.fila)
-		return col
-
-	def get_fila(self, numFil):
-		'''Retorna una lista con las celdas que pertenecen a la fila
-		numFil, ordenadas por columna'''
-		fil = [celda for celda in self._celdas.values() if celda.fila == numFil]
-		fil.sort(key= lambda c:c.columna)
-		return fil	
-
-	def index_celdas(self):
-		'''Retorna una lista con todos los indices de las celdas de 
-		la grilla'''
-		return self._celdas.keys()
-
-	def index_paredes(self):
-		'''Retorna una lista con todos los indices de las paredes de 
-		la grilla'''
-		return self._paredes.keys()
-		
-	def index_vertices(self):
-		'''Retorna una lista con todos los indices de los vértices de 
-		la grilla'''
-		return self._vertices.keys()
+	def existe_pared(self, pos):
+		'''Indica si la pared indicada en pos pertenece a la grilla. 
+		Una pared existe si existe alguna de sus celdas adyacentes'''
+		try:
+			(f, c), p = pos
+		except (TypeError, ValueError):
+			return False
+		if not p in ("NO", "N", "NE"):
+			return False
+		pos_A, pos_B = _celdas_pared(pos)
+		return self.existe_celda(pos_A) or self.existe_celda(pos_B)
+
+	def existe_vertice(self, pos):
+		'''Indica si el vértice indicado en pos pertenece a la 
+		grilla. Un vértice existe si existe alguna de sus celdas
+		adyacentes'''
+		try:
+			(f, c), p = pos
+		except (TypeError, ValueError):
+			return False
+		if not p in ("O", "E"):
+			return False
+		pos_A, pos_B, pos_C = _celdas_vertice(pos)
+		return self.existe_celda(pos_A) or self.existe_celda(pos_B) or self.existe_celda(pos_C)
+
+	def indice_pared(self, pos):
+		'''Retorna el índice lineal de la pared indicada en pos. Se
+		numeran primero las paredes "NO", luego las "N" y por último
+		las "NE", cada grupo por filas y contando las columnas 
+		fantasma de los bordes'''
+		if not self.existe_pared(pos):
+			raise KeyError(pos)
+		return self._indice_pared(pos)
+
+	def posicion_pared(self, indice):
+		'''Retorna la posición de la pared con índice lineal indice'''
+		if not 0 <= indice < self.rango_paredes:
+			raise KeyError(indice)
+		pos = self._posicion_pared(indice)
+		if not self.existe_pared(pos):  # Es un índice sin pared
+			raise KeyError(indice)
+		return pos
+
+	def indice_vertice(self, pos):
+		'''Retorna el índice lineal del vértice indicado en pos. Se 
+		numeran primero los vértices "O" y luego los "E", cada grupo
+		por filas y contando las filas y columnas fantasma de los 
+		bordes'''
+		if not self.existe_vertice(pos):
+			raise KeyError(pos)
+		return self._indice_vertice(pos)
+
+	def posicion_vertice(self, indice):
+		'''Retorna la posición del vértice con índice lineal indice'''
+		if not 0 <= indice < self.rango_vertices:
+			raise KeyError(indice)
+		pos = self._posicion_vertice(indice)
+		if not self.existe_vertice(pos):  # Es un índice sin vértice
+			raise KeyError(indice)
+		return pos
+
+	def _indice_pared(self, pos):
+		'''Índice lineal de la pared pos, sin verificar que exista'''
+		(f, c), p = pos
+		F, C = self._filas, self._columnas
+		if p == "NO":
+			return f*(C+1) + c
+		elif p == "N":
+			return (F+1)*(C+1) + f*C + c
+		else:
+			return (F+1)*(2*C+1) + f*(C+1) + c+1
+
+	def _posicion_pared(self, indice):
+		'''Posición de la pared indice, sin verificar que exista'''
+		F, C = self._filas, self._columnas
+		if indice < (F+1)*(C+1):
+			return (divmod(indice, C+1), "NO")
+		elif indice < (F+1)*(2*C+1):
+			return (divmod(indice - (F+1)*(C+1), C), "N")
+		else:
+			f, c = divmod(indice - (F+1)*(2*C+1), C+1)
+			return ((f, c-1), "NE")
+
+	def _indice_vertice(self, pos):
+		'''Índice lineal del vértice pos, sin verificar que exista'''
+		(f, c), p = pos
+		F, C = self._filas, self._columnas
+		if p == "O":
+			return (f+1)*(C+1) + c
+		else:
+			return (F+2)*(C+1) + (f+1)*(C+1) + c+1
+
+	def _posicion_vertice(self, indice):
+		'''Posición del vértice indice, sin verificar que exista'''
+		F, C = self._filas, self._columnas
+		if indice < (F+2)*(C+1):
+			f, c = divmod(indice, C+1)
+			return ((f-1, c), "O")
+		else:
+			f, c = divmod(indice - (F+2)*(C+1), C+1)
+			return ((f-1, c-1), "E")
+
+	def vecinas_array(self, f0=0, f1=None):
+		'''Retorna un arreglo de numpy de forma (cant_celdas, 6) con 
+		los índices lineales de las vecinas de todas las celdas. La 
+		fila i corresponde a la celda de índice i, y las columnas a 
+		las vecinas NO, N, NE, SE, S y SO, en ese orden. Las vecinas
+		que no existen (bordes) se indican con -1. Si se indican f0 y
+		f1 solo se incluyen las celdas de las filas f0 a f1-1, en el
+		mismo orden. Requiere numpy.'''
+		numpy = almacen.requiere_numpy()
+
+		F, C = self._filas, self._columnas
+		if f1 is None:
+			f1 = F
+		f = numpy.arange(f0, f1).reshape(-1, 1)
+		c = numpy.arange(C).reshape(1, C)
+
+		# Las vecinas diagonales de las columnas impares están una 
+		# fila más abajo que las de las columnas pares
+		impar = c % 2
+
+		res = numpy.empty((f1-f0, C, 6), dtype=numpy.intp)
+		desplazamientos = ((-1 + impar, -1), (-1, 0), (-1 + impar, 1),  # NO, N, NE
+		                   (impar, 1), (1, 0), (impar, -1))  # SE, S, SO
+		for k, (df, dc) in enumerate(desplazamientos):
+			fv = f + df
+			cv = c + dc
+			existe = (fv >= 0) & (fv < F) & (cv >= 0) & (cv < C)
+			res[:, :, k] = numpy.where(existe, fv*C + cv, -1)
+
+		return res.reshape((f1-f0)*C, 6)
+
+	def paredes_array(self):
+		'''Retorna un arreglo de numpy de forma (cant_celdas, 6) con 
+		los índices lineales de las paredes de todas las celdas. La 
+		fila i corresponde a la celda de índice i, y las columnas a 
+		las paredes NO, N, NE, SE, S y SO, en ese orden, de modo que
+		la pared de la columna k separa a la celda de la vecina de la
+		misma columna en vecinas_array. Requiere numpy.'''
+		numpy = almacen.requiere_numpy()
+
+		F, C = self._filas, self._columnas
+		f = numpy.arange(F).reshape(F, 1)
+		c = numpy.arange(C).reshape(1, C)
+		impar = c % 2
+		inicio_N = (F+1)*(C+1)
+		inicio_NE = (F+1)*(2*C+1)
+
+		res = numpy.empty((F, C, 6), dtype=numpy.intp)
+		res[:, :, 0] = f*(C+1) + c  # NO
+		res[:, :, 1] = inicio_N + f*C + c  # N
+		res[:, :, 2] = inicio_NE + f*(C+1) + c+1  # NE
+		res[:, :, 3] = (f+impar)*(C+1) + c+1  # SE, que es NO de la celda de la derecha
+		res[:, :, 4] = inicio_N + (f+1)*C + c  # S, que es N de la celda de abajo
+		res[:, :, 5] = inicio_NE + (f+impar)*(C+1) + c  # SO, que es NE de la celda de la izquierda
+
+		return res.reshape(F*C, 6)
+
+	def planos_paredes(self):
+		'''Retorna una lista de tuplas (plano, inicio, fin) con los
+		rangos de índices lineales de las paredes de cada orientación,
+		"NO", "N" y "NE", incluidos los índices de los bordes que no
+		corresponden a ninguna pared'''
+		if not (self._filas and self._columnas):
+			return [("NO", 0, 0), ("N", 0, 0), ("NE", 0, 0)]
+		F, C = self._filas, self._columnas
+		inicio_N = (F+1)*(C+1)
+		inicio_NE = (F+1)*(2*C+1)
+		return [("NO", 0, inicio_N), ("N", inicio_N, inicio_NE), ("NE", inicio_NE, self.rango_paredes)]
+
+	def distancia(self, pos1, pos2):
+		'''Retorna la distancia entre las celdas de las posiciones 
+		pos1 y pos2, medida en cantidad de pasos entre celdas 
+		vecinas. Se calcula pasando ambas posiciones a coordenadas
+		cúbicas (ver coordenadas.distancia)'''
+		return coordenadas.distancia(pos1, pos2)
+
+	def _elementos(self):
+		'''Clases por omisión de las celdas, paredes y vértices'''
+		return _Celda, _Pared, _Vertice
+
+	def _relaciones(self):
+		'''Relaciones entre los elementos de la grilla (ver 
+		_RELACIONES)'''
+		return _RELACIONES
+
+	def _cantidades(self):
+		'''Cantidades de paredes y vértices de la grilla compacta. 
+		Dependen de cuántas columnas pares quedan en los bordes'''
+		filas, columnas = self._filas, self._columnas
+		return (filas+1)*columnas + 2*(columnas+1)*filas + (columnas-1)//2 + columnas//2, 2*(columnas*(filas+1) + filas)
+
+	def _nueva_plantilla(self, filas, columnas):
+		'''Grilla compacta de filas por columnas con la misma 
+		numeración que esta, sin las clases de elementos propias'''
+		return Grilla(filas, columnas, compacta=True)
+
+	def _celda_de(self, tipo, pos):
+		'''Posición de la celda de referencia del elemento pos de tipo: 
+		la de la posición de la pared o del vértice'''
+		return pos if tipo == "celda" else pos[0]
+
+	def _trasladar(self, tipo, pos, df, dc):
+		'''Posición del elemento pos de tipo con su celda de referencia
+		desplazada df filas hacia arriba y dc columnas a la izquierda'''
+		if tipo == "celda":
+			return (pos[0]-df, pos[1]-dc)
+		(f, c), p = pos
+		return ((f-df, c-dc), p)
+
+	def _posiciones_paredes(self):
+		'''Iterador con las posiciones de las paredes, ordenadas por
+		índice lineal. Se enumeran directamente, sin repetir ninguna,
+		salteando los índices de los bordes que no tienen pared'''
+		F, C = self._filas, self._columnas
+		if not (F and C):
+			return
+
+		# NO: en la columna fantasma C existen si C es impar o si no 
+		# es la primera fila, y en la fila fantasma F solo en las 
+		# columnas pares desde la 2
+		for f in xrange(F):
+			for c in xrange(C):
+				yield ((f, c), "NO")
+			if C%2 or f:
+				yield ((f, C), "NO")
+		for c in xrange(2, C+1, 2):
+			yield ((F, c), "NO")
+
+		# N: existen todas
+		for f in xrange(F+1):
+			for c in xrange(C):
+				yield ((f, c), "N")
+
+		# NE: en la fila fantasma F solo existen en las columnas pares
+		# que no son la última
+		for f in xrange(F):
+			for c in xrange(-1, C):
+				yield ((f, c), "NE")
+		for c in xrange(0, C-1, 2):
+			yield ((F, c), "NE")
+
+	def _posiciones_vertices(self):
+		'''Iterador con las posiciones de los vértices, ordenadas por
+		índice lineal. Se enumeran directamente, sin repetir ninguno,
+		salteando los índices de los bordes que no tienen vértice'''
+		F, C = self._filas, self._columnas
+		if not (F and C):
+			return
+
+		# O: en la fila fantasma -1 solo existen en las columnas 
+		# impares, y en la fila fantasma F en las pares desde la 2
+		for c in xrange(1, C+1, 2):
+			yield ((-1, c), "O")
+		for f in xrange(F):
+			for c in xrange(C+1):
+				yield ((f, c), "O")
+		for c in xrange(2, C+1, 2):
+			yield ((F, c), "O")
+
+		# E: en la fila fantasma -1 solo existen en las columnas 
+		# impares y en la fila fantasma F en las pares, en ambos casos
+		# sin contar la última columna
+		for c in xrange(-1, C-1, 2):
+			yield ((-1, c), "E")
+		for f in xrange(F):
+			for c in xrange(-1, C):
+				yield ((f, c), "E")
+		for c in xrange(0, C-1, 2):
+			yield ((F, c), "E")
 
 class _Celda(object):
 	"""Celda hexagonal"""
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 		'''Define una celda hexagonal. El parámetro pos es una
 		tupla que indica la fila y columna de la celda.'''
 
 		self._pos = pos  # Coordenadas en la grilla
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -282,6 +355,11 @@ class _Celda(object):
 		'''Devuelve la columna de la celda. Solo lectura'''
 		return self._pos[1]
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal de la celda. Solo lectura'''
+		return self.__grid._indice_celda(self._pos)
+
 	def __str__(self):
 		msg = "Celda " + str(self.posicion)
 		return msg
@@ -289,7 +367,22 @@ class _Celda(object):
 	def __repr__(self):
 		msg = "Celda " + str(self.posicion)
 		return msg
+
+	def __eq__(self, otro):
+		return isinstance(otro, _Celda) and self._pos == otro._pos and self.__grid is otro._Celda__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "celda", self._pos))
 	
+	@almacen.memorizada("celda_paredes")
 	def paredes(self):
 		'''Devuelve un diccionario con las paredes de la celda. La 
 		clave del diccionario es la posición relativa, y el valor la 
@@ -308,52 +401,13 @@ class _Celda(object):
 
 		>>> pared_Norte = objCelda.paredes()["N"]'''
 
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
 
 		# Las paredes se extraen del conjunto de paredes de la grilla
 		# padre, y su índice depende de si la columna es par o impar
-		
-		# Indice de las paredes
-		if not c%2:  # Si es par 
-			# NO
-			pos_pared_NO = ((f, c), "NO")
-
-			# N 
-			pos_pared_N = ((f, c), "N")
-
-			# NE
-			pos_pared_NE = ((f, c), "NE")
-
-			# SE
-			pos_pared_SE = ((f,c+1), "NO")
-
-			# S
-			pos_pared_S = ((f+1,c), "N")
-
-			# SO
-			pos_pared_SO = ((f,c-1), "NE")
-
-		else:  # Si es impar
-			# NO
-			pos_pared_NO = ((f, c), "NO")
-
-			# N 
-			pos_pared_N = ((f, c), "N")
-
-			# NE
-			pos_pared_NE = ((f, c), "NE")
-
-			# SE
-			pos_pared_SE = ((f+1,c+1), "NO")
-
-			# S
-			pos_pared_S = ((f+1,c), "N")
-
-			# SO
-			pos_pared_SO = ((f+1,c-1), "NE")
-
-		pos_paredes = (pos_pared_NO, pos_pared_N, pos_pared_NE, pos_pared_SE, pos_pared_S, pos_pared_SO)
+		pos_paredes = _paredes_celda(self._pos)
 		posRel = ("NO", "N", "NE", "SE", "S", "SO")
 
 		res_paredes = {}
@@ -374,8 +428,15 @@ class _Celda(object):
 		"SO" --> pared sudoeste
 		"NO" --> pared noroeste'''
 
-		return self.paredes()[posRel]
+		tabla = self.__grid.adyacencia("celda_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
+
+		# Se toma la pared pedida por su lugar en la tupla
+		pos_pared = _paredes_celda(self._pos)[_lugar("celda_paredes", posRel)]
+		return self.__grid.get_pared(pos_pared)
 		
+	@almacen.memorizada("celda_vecinas")
 	def vecinas(self):
 		'''Devuelve un diccionario con las celdas vecinas. La clave
 		del diccionario es la posición relativa, y el valor la celda 
@@ -390,60 +451,19 @@ class _Celda(object):
 		"SO" --> vecina sudoeste
 		"NO" --> vecina noroeste'''
 
-
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_vecinas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
 
 		# Las celdas vecinas se extraen del conjunto de celdas de la 
 		# grilla padre, y su índice depende de si la columna es par o
 		# impar
-		
-		# Índice de las vecinas
-		if not c%2:  # Si es par 
-			# NO
-			pos_vecina_NO = (f-1, c-1)
-
-			# N 
-			pos_vecina_N = (f-1, c)
-
-			# NE
-			pos_vecina_NE = (f-1, c+1)
-
-			# SE
-			pos_vecina_SE = (f,c+1)
-
-			# S
-			pos_vecina_S = (f+1,c)
-
-			# SO
-			pos_vecina_SO = (f,c-1)
-
-		else:  # Si es impar
-			# NO
-			pos_vecina_NO = (f, c-1)
-
-			# N 
-			pos_vecina_N = (f-1, c)
-
-			# NE
-			pos_vecina_NE = (f, c+1)
-
-			# SE
-			pos_vecina_SE = (f+1,c+1)
-
-			# S
-			pos_vecina_S = (f+1,c)
-
-			# SO
-			pos_vecina_SO = (f+1,c-1)
-
-		pos_vecinas = (pos_vecina_NO, pos_vecina_N, pos_vecina_NE, pos_vecina_SE, pos_vecina_S, pos_vecina_SO)
+		pos_vecinas = _vecinas_celda(self._pos)
 		posRel = ("NO", "N", "NE", "SE", "S", "SO")
 
 		res_vecinas = {}
-		indice_celdas = self.__grid.index_celdas()
 		for k in xrange(0,6):
-			if pos_vecinas[k] in indice_celdas:  # Verifico que la celda exista
+			if self.__grid.existe_celda(pos_vecinas[k]):  # Verifico que la celda exista
 				res_vecinas[posRel[k]] = self.__grid.get_celda(pos_vecinas[k])
 			else:  # Si no existe entonces es un borde y no hay vecina
 				res_vecinas[posRel[k]] = None
@@ -461,9 +481,18 @@ class _Celda(object):
 		"S"  --> vecina sur
 		"SO" --> vecina sudoeste
 		"NO" --> vecina noroeste'''
-		
-		return self.vecinas()[posRel]
 
+		tabla = self.__grid.adyacencia("celda_vecinas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
+
+		# Se toma la vecina pedida por su lugar en la tupla
+		pos_vecina = _vecinas_celda(self._pos)[_lugar("celda_vecinas", posRel)]
+		if self.__grid.existe_celda(pos_vecina):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_vecina)
+		return None
+
+	@almacen.memorizada("celda_vertices")
 	def vertices(self):
 		'''Devuelve un diccionario con los vértices de la celda. 
 		La clave del diccionario es la posición relativa, y el valor 
@@ -478,57 +507,17 @@ class _Celda(object):
 		"O"  --> vértice oeste
 		"NO" --> vértice noroeste'''
 
-		# Fila y columna de la celda actual
-		f, c = self._pos
+		tabla = self.__grid.adyacencia("celda_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[2])
 
 		# Los vértices se extraen del conjunto de vértices de la 
 		# grilla padre, y su índice depende de si la columna es par o
 		# impar
-		
-		# Índice de los vértices
-		if not c%2:  # Si es par 
-			# NO
-			pos_vertice_NO = ((f-1, c-1), "E")
-
-			# NE
-			pos_vertice_NE = ((f-1, c+1), "O")
-
-			# E
-			pos_vertice_E = ((f, c), "E")
-
-			# SE
-			pos_vertice_SE = ((f, c+1), "O")
-
-			# SO
-			pos_vertice_SO = ((f, c-1), "E")
-
-			# O
-			pos_vertice_O = ((f, c), "O")
-
-		else:  # Si es impar
-			# NO
-			pos_vertice_NO = ((f, c-1), "E")
-
-			# NE 
-			pos_vertice_NE = ((f, c+1), "O")
-
-			# E
-			pos_vertice_E = ((f, c), "E")
-
-			# SE
-			pos_vertice_SE = ((f+1, c+1), "O")
-
-			# SO
-			pos_vertice_SO = ((f+1, c-1), "E")
-
-			# O
-			pos_vertice_O = ((f, c), "O")
-
-		pos_vertices = (pos_vertice_NO, pos_vertice_NE, pos_vertice_E, pos_vertice_SE, pos_vertice_SO, pos_vertice_O)
+		pos_vertices = _vertices_celda(self._pos)
 		posRel = ("NO", "NE", "E", "SE", "SO", "O")
 
 		res_vertices = {}
-		
 		for k in xrange(0,6):
 			res_vertices[posRel[k]] = self.__grid.get_vertice(pos_vertices[k])
 
@@ -546,7 +535,13 @@ class _Celda(object):
 		"O"  --> vertice oeste
 		"NO" --> vertice noroeste'''
 
-		return self.vertices()[posRel]
+		tabla = self.__grid.adyacencia("celda_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[2])
+
+		# Se toma el vértice pedido por su lugar en la tupla
+		pos_vertice = _vertices_celda(self._pos)[_lugar("celda_vertices", posRel)]
+		return self.__grid.get_vertice(pos_vertice)
 	
 class _Pared(object):
 	"""Pared de la celda. El parámetro pos es una tupla	que indica la
@@ -573,10 +568,12 @@ class _Pared(object):
 	que menciona no existe. En el caso de la pared SO de una celda de 
 	la columna 0, la pared sería nombrada referida a una columna con
 	índice negativo."""
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 
 		self._pos = pos
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -589,6 +586,11 @@ class _Pared(object):
 		lectura'''
 		return self._pos
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal de la pared. Solo lectura'''
+		return self.__grid._indice_pared(self._pos)
+
 	def __str__(self):
 		msg = "Pared " + str(self.id)
 		return msg
@@ -597,41 +599,34 @@ class _Pared(object):
 		msg = "Pared " + str(self.id)
 		return msg
 
+	def __eq__(self, otro):
+		return isinstance(otro, _Pared) and self._pos == otro._pos and self.__grid is otro._Pared__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "pared", self._pos))
+
+	@almacen.memorizada("pared_vertices")
 	def vertices(self):
 		'''Devuelve un diccionario con los vértices de la pared. 
 		La clave del diccionario es la posición relativa, y el valor 
 		el vértice en cuestión. '''
-		
+
+		tabla = self.__grid.adyacencia("pared_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[2])
+
 		# Cada pared tiene 2 vértices, y obtenerlos depende de si la
 		# columna de su id es par o impar, y de la posición relativa
 		# en su id
-
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
-
-		if p == "NO":
-			if not c%2:
-				pos_A = ((f  , c  ), "O")
-				pos_B = ((f-1, c-1), "E")
-			else:
-				pos_A = ((f  , c  ), "O")
-				pos_B = ((f  , c-1), "E")
-
-		elif p == "N":
-			if not c%2:
-				pos_A = ((f-1, c-1), "E")
-				pos_B = ((f-1, c+1), "O")
-			else:
-				pos_A = ((f  , c-1), "E")
-				pos_B = ((f  , c+1), "O")
-
-		elif p == "NE":
-			if not c%2:
-				pos_A = ((f-1, c+1), "O")
-				pos_B = ((f  , c  ), "E")
-			else:
-				pos_A = ((f  , c+1), "O")
-				pos_B = ((f  , c  ), "E")
+		pos_A, pos_B = _vertices_pared(self.id)
 
 		res_vertices = {"A":self.__grid.get_vertice(pos_A), "B":self.__grid.get_vertice(pos_B) }
 
@@ -650,57 +645,37 @@ class _Pared(object):
 		izquierda. El otro vértice se considera vértice final (o 
 		vértice B)'''
 
-		return self.vertices()[posRel]
+		tabla = self.__grid.adyacencia("pared_vertices")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[2])
 
+		# Se toma el vértice pedido por su lugar en la tupla
+		pos_vertice = _vertices_pared(self.id)[_lugar("pared_vertices", posRel)]
+		return self.__grid.get_vertice(pos_vertice)
+
+	@almacen.memorizada("pared_celdas")
 	def celdas(self):
 		'''Devuelve un diccionario con las celdas adyacentes. La clave
 		del diccionario es la posición relativa, y el valor la celda 
 		adyacente en cuestión. Si el valor de celda es None entonces
 		la pared es un borde.'''
 
+		tabla = self.__grid.adyacencia("pared_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
+
 		# Cada pared tiene 2 celdas adyacentes, y obtenerlas depende 
 		# de si la columna de su id es par o impar, y de la posición 
 		# relativa en su id
+		pos_celdas = _celdas_pared(self.id)
+		posRel = ("A", "B")
 
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
-
-		if p == "NO":
-			if not c%2:
-				pos_A = (f-1 , c-1)
-				pos_B = (f   , c  )
-			else:
-				pos_A = (f  , c-1)
-				pos_B = (f  , c  )
-
-		elif p == "N":  # no importa si c es par o impar, pero se
-						# mantiene esa misma lógica por consistencia
-			if not c%2:
-				pos_A = (f-1, c)
-				pos_B = (f  , c)
-			else:
-				pos_A = (f-1, c)
-				pos_B = (f  , c)
-
-		elif p == "NE":
-			if not c%2:
-				pos_A = (f-1, c+1)
-				pos_B = (f  , c  )
-			else:
-				pos_A = (f  , c+1)
-				pos_B = (f  , c  )
-
-		indice_celdas = self.__grid.index_celdas()
 		res_celdas = {}
-		if pos_A in indice_celdas:  # Verifico que la celda exista
-			res_celdas['A'] = self.__grid.get_celda(pos_A)
-		else:  # Si no existe entonces es un borde
-			res_celdas['A'] = None
-
-		if pos_B in indice_celdas:  # Verifico que la celda exista
-			res_celdas['B'] = self.__grid.get_celda(pos_B)
-		else:  # Si no existe entonces es un borde
-			res_celdas['B'] = None
+		for k in xrange(0,2):
+			if self.__grid.existe_celda(pos_celdas[k]):  # Verifico que la celda exista
+				res_celdas[posRel[k]] = self.__grid.get_celda(pos_celdas[k])
+			else:  # Si no existe entonces es un borde
+				res_celdas[posRel[k]] = None
 
 		return res_celdas
 
@@ -715,81 +690,40 @@ class _Pared(object):
 		La celda superior (o celda A) es la que tiene la coordenada
 		vertical de menor valor, es decir la que se encuentra por 
 		encima de la pared. La otra celda se considera celda inferior 
-		(o celda B)''' 
+		(o celda B)'''
 
-		return self.celdas()[posRel]
+		tabla = self.__grid.adyacencia("pared_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
+
+		# Se toma la celda pedida por su lugar en la tupla
+		pos_celda = _celdas_pared(self.id)[_lugar("pared_celdas", posRel)]
+		if self.__grid.existe_celda(pos_celda):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_celda)
+		return None
 	
+	@almacen.memorizada("pared_continuaciones")
 	def continuaciones(self):
 		'''Devuelve un diccionario con las paredes con las que 
 		comparte un vértice. La clave del diccionario es la posición
 		relativa, y el valor la pared en cuestion'''
 
+		tabla = self.__grid.adyacencia("pared_continuaciones")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
+
 		# Cada pared tiene 4 paredes continuaciones, y obtenerlas 
 		# depende de si la columna de su id es par o impar, y de la 
 		# posición relativa en su id
+		pos_continuaciones = _continuaciones_pared(self.id)
+		posRel = ("AI", "AD", "BI", "BD")
 
-		f, c = self.id[0]  # fila y columna del id de la pared
-		p = self.id[1]  # posición reltiva del id de la pared
-
-		if p == "NO":
-			if not c%2:
-				pos_AI = ((f  , c-1), "NE")
-				pos_AD = ((f  , c-1), "N")
-				pos_BI = ((f-1, c-1), "NE")
-				pos_BD = ((f  , c  ), "N")
-			else:
-				pos_AI = ((f+1, c-1), "NE")
-				pos_AD = ((f+1, c-1), "N")
-				pos_BI = ((f  , c-1), "NE")
-				pos_BD = ((f  , c  ), "N")
-
-		elif p == "N":  
-
-			if not c%2:
-				pos_AI = ((f  , c  ), "NO")
-				pos_AD = ((f-1, c-1), "NE")
-				pos_BI = ((f-1, c+1), "NO")
-				pos_BD = ((f  , c  ), "NE")
-			else:
-				pos_AI = ((f  , c  ), "NO")
-				pos_AD = ((f  , c-1), "NE")
-				pos_BI = ((f  , c+1), "NO")
-				pos_BD = ((f  , c  ), "NE")
-
-		elif p == "NE":
-			if not c%2:
-				pos_AI = ((f  , c  ), "N")
-				pos_AD = ((f-1, c+1), "NO")
-				pos_BI = ((f  , c+1), "N")
-				pos_BD = ((f  , c+1), "NO")
-			else:
-				pos_AI = ((f  , c  ), "N")
-				pos_AD = ((f  , c+1), "NO")
-				pos_BI = ((f+1, c+1), "N")
-				pos_BD = ((f+1, c+1), "NO")
-
-		res_continuaciones = {} 
-		indice_paredes = self.__grid.index_paredes()
-
-		if pos_AI in indice_paredes:  # Verifico que la celda exista
-			res_continuaciones["AI"] = self.__grid.get_pared(pos_AI)
-		else:  # Si no existe entonces es un borde y no hay vecina
-			res_continuaciones["AI"] = None
-
-		if pos_AD in indice_paredes:  # Verifico que la celda exista
-			res_continuaciones["AD"] = self.__grid.get_pared(pos_AD)
-		else:  # Si no existe entonces es un borde y no hay vecina
-			res_continuaciones["AD"] = None
-		
-		if pos_BI in indice_paredes:  # Verifico que la celda exista
-			res_continuaciones["BI"] = self.__grid.get_pared(pos_BI)
-		else:  # Si no existe entonces es un borde y no hay vecina
-			res_continuaciones["BI"] = None
-		
-		if pos_BD in indice_paredes:  # Verifico que la celda exista
-			res_continuaciones["BD"] = self.__grid.get_pared(pos_BD)
-		else:  # Si no existe entonces es un borde y no hay vecina
-			res_continuaciones["BD"] = None
+		res_continuaciones = {}
+		for k in xrange(0,4):
+			if self.__grid.existe_pared(pos_continuaciones[k]):  # Verifico que la pared exista
+				res_continuaciones[posRel[k]] = self.__grid.get_pared(pos_continuaciones[k])
+			else:  # Si no existe entonces es un borde y no hay continuación
+				res_continuaciones[posRel[k]] = None
 
 		return res_continuaciones
 
@@ -808,8 +742,15 @@ class _Pared(object):
 		espaldas. Delante nuestro tendremos las continuaciones
 		izquierda y derecha'''
 
+		tabla = self.__grid.adyacencia("pared_continuaciones")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
 
-		return self.continuaciones()[posRel]
+		# Se toma la continuación pedida por su lugar en la tupla
+		pos_continuacion = _continuaciones_pared(self.id)[_lugar("pared_continuaciones", posRel)]
+		if self.__grid.existe_pared(pos_continuacion):  # Verifico que la pared exista
+			return self.__grid.get_pared(pos_continuacion)
+		return None
 
 class _Vertice(object):
 	"""Vértice de una celda. El parámetro pos es una tupla que define
@@ -822,10 +763,12 @@ class _Vertice(object):
 	que en el caso de las paredes, suponiendo una celda fantasma y 
 	nombrando al vértice relativo a ésta. Ésta celda fantasma 
 	realmente no existe y sirve solamente para nombrar el vértice. """
+	__slots__ = ("_pos",)
+	__grid = None  # Grilla a la que pertenece, la define la subclase de cada grilla
+
 	def __init__(self, pos):
 		
 		self._pos = pos
-		self.__grid = None  # Grilla a la que pertenece
 
 	@property
 	def grilla(self):
@@ -838,6 +781,11 @@ class _Vertice(object):
 		lectura'''
 		return self._pos
 
+	@property
+	def indice(self):
+		'''Devuelve el índice lineal del vértice. Solo lectura'''
+		return self.__grid._indice_vertice(self._pos)
+
 	def __str__(self):
 		msg = "Vertice " + str(self.id)
 		return msg
@@ -845,53 +793,40 @@ class _Vertice(object):
 	def __repr__(self):
 		msg = "Vertice " + str(self.id)
 		return msg
+
+	def __eq__(self, otro):
+		return isinstance(otro, _Vertice) and self._pos == otro._pos and self.__grid is otro._Vertice__grid
+
+	def __ne__(self, otro):
+		return not self == otro
+
+	def __hash__(self):
+		return hash(self._pos)
+
+	def __reduce__(self):
+		# Se guarda solo la posición; al restaurar se pide el elemento 
+		# a la grilla
+		return (almacen.elemento, (self.__grid, "vertice", self._pos))
 	
+	@almacen.memorizada("vertice_paredes")
 	def paredes(self):
 		'''Devuelve un diccionario con las paredes que convergen en el
 		vértice. La clave del diccionario es la posición relativa, y 
 		el valor la pared en cuestión'''
 
-		f, c = self.id[0]  # fila y columna del id del vertice
-		p = self.id[1]  # posición reltiva del id del vertice
-
-		if p == "E":
-			if not c%2:
-				pos_A = ((f  , c  ), "NE")
-				pos_B = ((f  , c+1), "N")
-				pos_C = ((f  , c+1), "NO")
-			else:
-				pos_A = ((f  , c  ), "NE")
-				pos_B = ((f+1, c+1), "N")
-				pos_C = ((f+1, c+1), "NO")
-
-		elif p == "O":
-			if not c%2:
-				pos_A = ((f  , c  ), "NO")
-				pos_B = ((f  , c-1), "NE")
-				pos_C = ((f  , c-1), "N")
-			else:
-				pos_A = ((f  , c  ), "NO")
-				pos_B = ((f+1, c-1), "NE")
-				pos_C = ((f+1, c-1), "N")
+		tabla = self.__grid.adyacencia("vertice_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[1])
 
+		pos_paredes = _paredes_vertice(self.id)
+		posRel = ("A", "B", "C")
 
-
-		indice_paredes = self.__grid.index_paredes()
 		res_paredes = {}
-		if pos_A in indice_paredes:  # Verifico que la pared exista
-			res_paredes['A'] = self.__grid.get_pared(pos_A)
-		else:  # Si no existe entonces es un borde
-			res_paredes['A'] = None
-
-		if pos_B in indice_paredes:  # Verifico que la pared exista
-			res_paredes['B'] = self.__grid.get_pared(pos_B)
-		else:  # Si no existe entonces es un borde
-			res_paredes['B'] = None
-
-		if pos_C in indice_paredes:  # Verifico que la pared exista
-			res_paredes['C'] = self.__grid.get_pared(pos_C)
-		else:  # Si no existe entonces es un borde
-			res_paredes['C'] = None
+		for k in xrange(0,3):
+			if self.__grid.existe_pared(pos_paredes[k]):  # Verifico que la pared exista
+				res_paredes[posRel[k]] = self.__grid.get_pared(pos_paredes[k])
+			else:  # Si no existe entonces es un borde
+				res_paredes[posRel[k]] = None
 
 		return res_paredes
 
@@ -913,55 +848,35 @@ class _Vertice(object):
 		adyacentes será None, indicando que pertenece a una celda 
 		fantasma'''
 
-		return self.paredes()[posRel]
+		tabla = self.__grid.adyacencia("vertice_paredes")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[1])
+
+		# Se toma la pared pedida por su lugar en la tupla
+		pos_pared = _paredes_vertice(self.id)[_lugar("vertice_paredes", posRel)]
+		if self.__grid.existe_pared(pos_pared):  # Verifico que la pared exista
+			return self.__grid.get_pared(pos_pared)
+		return None
 
+	@almacen.memorizada("vertice_celdas")
 	def celdas(self):
 		'''Devuelve un diccionario con las celdas adyacentes. La clave
 		del diccionario es la posición relativa, y el valor la celda 
 		adyacente en cuestión'''
 
-		f, c = self.id[0]  # fila y columna del id del vertice
-		p = self.id[1]  # posición reltiva del id del vertice
-
-		if p == "E":
-			if not c%2:
-				pos_A = (f  , c  )
-				pos_B = (f-1, c+1)
-				pos_C = (f  , c+1)
-			else:
-				pos_A = (f  , c  )
-				pos_B = (f  , c+1)
-				pos_C = (f+1, c+1)
-
-		elif p == "O":
-			if not c%2:
-				pos_A = (f  , c  )
-				pos_B = (f  , c-1)
-				pos_C = (f-1, c-1)
-			else:
-				pos_A = (f  , c  )
-				pos_B = (f+1, c-1)
-				pos_C = (f  , c-1)
-
+		tabla = self.__grid.adyacencia("vertice_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacion(self.indice, self.__grid._por_indice[0])
 
+		pos_celdas = _celdas_vertice(self.id)
+		posRel = ("A", "B", "C")
 
-		indice_celdas = self.__grid.index_celdas()
 		res_celdas = {}
-
-		if pos_A in indice_celdas:  # Verifico que la celda exista
-			res_celdas['A'] = self.__grid.get_celda(pos_A)
-		else:  # Si no existe entonces es un borde
-			res_celdas['A'] = None
-
-		if pos_B in indice_celdas:  # Verifico que la celda exista
-			res_celdas['B'] = self.__grid.get_celda(pos_B)
-		else:  # Si no existe entonces es un borde
-			res_celdas['B'] = None
-
-		if pos_C in indice_celdas:  # Verifico que la celda exista
-			res_celdas['C'] = self.__grid.get_celda(pos_C)
-		else:  # Si no existe entonces es un borde
-			res_celdas['C'] = None
+		for k in xrange(0,3):
+			if self.__grid.existe_celda(pos_celdas[k]):  # Verifico que la celda exista
+				res_celdas[posRel[k]] = self.__grid.get_celda(pos_celdas[k])
+			else:  # Si no existe entonces es un borde
+				res_celdas[posRel[k]] = None
 
 		return res_celdas
 	
@@ -982,5 +897,185 @@ class _Vertice(object):
 		vértice se encuentra en un borde, alguna de las celdas 
 		adyacentes será None, indicando que ésta es una celda fantasma'''
 
-		return self.celdas()[posRel]
-
+		tabla = self.__grid.adyacencia("vertice_celdas")
+		if tabla is not None:  # Se lee de la tabla de adyacencia
+			return tabla.relacionado(self.indice, posRel, self.__grid._por_indice[0])
+
+		# Se toma la celda pedida por su lugar en la tupla
+		pos_celda = _celdas_vertice(self.id)[_lugar("vertice_celdas", posRel)]
+		if self.__grid.existe_celda(pos_celda):  # Verifico que la celda exista
+			return self.__grid.get_celda(pos_celda)
+		return None
+
+
+# Posiciones relativas de cada relación, en el orden de las posiciones
+# que devuelve su función, y lugar de cada una
+_CLAVES = {
+	"celda_paredes": ("NO", "N", "NE", "SE", "S", "SO"),
+	"celda_vecinas": ("NO", "N", "NE", "SE", "S", "SO"),
+	"celda_vertices": ("NO", "NE", "E", "SE", "SO", "O"),
+	"pared_vertices": ("A", "B"),
+	"pared_celdas": ("A", "B"),
+	"pared_continuaciones": ("AI", "AD", "BI", "BD"),
+	"vertice_paredes": ("A", "B", "C"),
+	"vertice_celdas": ("A", "B", "C"),
+}
+_LUGARES = dict((relacion, dict((clave, k) for k, clave in enumerate(claves))) for relacion, claves in _CLAVES.items())
+
+def _lugar(relacion, posRel):
+	'''Devuelve el lugar de la posición relativa posRel entre las
+	posiciones de relacion. Si posRel no es una de ellas se produce
+	KeyError'''
+
+	lugar = _LUGARES[relacion].get(posRel)
+	if lugar is None:
+		raise KeyError("Posición relativa desconocida: " + str(posRel))
+	return lugar
+
+def _paredes_celda(pos):
+	'''Devuelve las posiciones de las paredes NO, N, NE, SE, S y SO 
+	de la celda pos'''
+
+	f, c = pos
+	if not c%2:  # Si es par 
+		return (((f, c), "NO"), ((f, c), "N"), ((f, c), "NE"),
+				((f, c+1), "NO"), ((f+1, c), "N"), ((f, c-1), "NE"))
+	else:  # Si es impar
+		return (((f, c), "NO"), ((f, c), "N"), ((f, c), "NE"),
+				((f+1, c+1), "NO"), ((f+1, c), "N"), ((f+1, c-1), "NE"))
+
+def _vecinas_celda(pos):
+	'''Devuelve las posiciones de las celdas vecinas NO, N, NE, SE, S
+	y SO de la celda pos, existan o no en la grilla'''
+
+	f, c = pos
+	if not c%2:  # Si es par 
+		return (f-1, c-1), (f-1, c), (f-1, c+1), (f, c+1), (f+1, c), (f, c-1)
+	else:  # Si es impar
+		return (f, c-1), (f-1, c), (f, c+1), (f+1, c+1), (f+1, c), (f+1, c-1)
+
+def _vertices_celda(pos):
+	'''Devuelve las posiciones de los vértices NO, NE, E, SE, SO y O 
+	de la celda pos'''
+
+	f, c = pos
+	if not c%2:  # Si es par 
+		return (((f-1, c-1), "E"), ((f-1, c+1), "O"), ((f, c), "E"),
+				((f, c+1), "O"), ((f, c-1), "E"), ((f, c), "O"))
+	else:  # Si es impar
+		return (((f, c-1), "E"), ((f, c+1), "O"), ((f, c), "E"),
+				((f+1, c+1), "O"), ((f+1, c-1), "E"), ((f, c), "O"))
+
+def _vertices_pared(pos):
+	'''Devuelve las posiciones de los vértices A y B de la pared pos'''
+
+	(f, c), p = pos
+	if p == "NO":
+		if not c%2:
+			return ((f, c), "O"), ((f-1, c-1), "E")
+		else:
+			return ((f, c), "O"), ((f, c-1), "E")
+
+	elif p == "N":
+		if not c%2:
+			return ((f-1, c-1), "E"), ((f-1, c+1), "O")
+		else:
+			return ((f, c-1), "E"), ((f, c+1), "O")
+
+	elif p == "NE":
+		if not c%2:
+			return ((f-1, c+1), "O"), ((f, c), "E")
+		else:
+			return ((f, c+1), "O"), ((f, c), "E")
+
+def _celdas_pared(pos):
+	'''Devuelve las posiciones de las celdas A y B adyacentes a la 
+	pared pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "NO":
+		if not c%2:
+			return (f-1, c-1), (f, c)
+		else:
+			return (f, c-1), (f, c)
+
+	elif p == "N":
+		return (f-1, c), (f, c)
+
+	elif p == "NE":
+		if not c%2:
+			return (f-1, c+1), (f, c)
+		else:
+			return (f, c+1), (f, c)
+
+def _continuaciones_pared(pos):
+	'''Devuelve las posiciones de las continuaciones AI, AD, BI y BD 
+	de la pared pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "NO":
+		if not c%2:
+			return ((f, c-1), "NE"), ((f, c-1), "N"), ((f-1, c-1), "NE"), ((f, c), "N")
+		else:
+			return ((f+1, c-1), "NE"), ((f+1, c-1), "N"), ((f, c-1), "NE"), ((f, c), "N")
+
+	elif p == "N":
+		if not c%2:
+			return ((f, c), "NO"), ((f-1, c-1), "NE"), ((f-1, c+1), "NO"), ((f, c), "NE")
+		else:
+			return ((f, c), "NO"), ((f, c-1), "NE"), ((f, c+1), "NO"), ((f, c), "NE")
+
+	elif p == "NE":
+		if not c%2:
+			return ((f, c), "N"), ((f-1, c+1), "NO"), ((f, c+1), "N"), ((f, c+1), "NO")
+		else:
+			return ((f, c), "N"), ((f, c+1), "NO"), ((f+1, c+1), "N"), ((f+1, c+1), "NO")
+
+def _paredes_vertice(pos):
+	'''Devuelve las posiciones de las paredes A, B y C que convergen 
+	en el vértice pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "E":
+		if not c%2:
+			return ((f, c), "NE"), ((f, c+1), "N"), ((f, c+1), "NO")
+		else:
+			return ((f, c), "NE"), ((f+1, c+1), "N"), ((f+1, c+1), "NO")
+
+	elif p == "O":
+		if not c%2:
+			return ((f, c), "NO"), ((f, c-1), "NE"), ((f, c-1), "N")
+		else:
+			return ((f, c), "NO"), ((f+1, c-1), "NE"), ((f+1, c-1), "N")
+
+def _celdas_vertice(pos):
+	'''Devuelve las posiciones de las celdas A, B y C adyacentes al 
+	vértice pos, existan o no en la grilla'''
+
+	(f, c), p = pos
+	if p == "E":
+		if not c%2:
+			return (f, c), (f-1, c+1), (f, c+1)
+		else:
+			return (f, c), (f, c+1), (f+1, c+1)
+
+	elif p == "O":
+		if not c%2:
+			return (f, c), (f, c-1), (f-1, c-1)
+		else:
+			return (f, c), (f+1, c-1), (f, c-1)
+
+# Para cada relación: posiciones relativas, tipo de elemento de origen,
+# tipo de elemento relacionado y función que calcula las posiciones
+# relacionadas. Con ellas almacen.GrillaBase construye las tablas de
+# adyacencia
+_RELACIONES = {
+	"celda_paredes": (_CLAVES["celda_paredes"], "celda", "pared", _paredes_celda),
+	"celda_vecinas": (_CLAVES["celda_vecinas"], "celda", "celda", _vecinas_celda),
+	"celda_vertices": (_CLAVES["celda_vertices"], "celda", "vertice", _vertices_celda),
+	"pared_vertices": (_CLAVES["pared_vertices"], "pared", "vertice", _vertices_pared),
+	"pared_celdas": (_CLAVES["pared_celdas"], "pared", "celda", _celdas_pared),
+	"pared_continuaciones": (_CLAVES["pared_continuaciones"], "pared", "pared", _continuaciones_pared),
+	"vertice_paredes": (_CLAVES["vertice_paredes"], "vertice", "pared", _paredes_vertice),
+	"vertice_celdas": (_CLAVES["vertice_celdas"], "vertice", "celda", _celdas_vertice),
+}
@@ -0,0 +1,166 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para procesar grillas cuadradas o hexagonales fila por fila,
+sin tener la grilla completa en memoria. Sirve para mapas mucho más
+altos que la memoria, o sin fin, que se leen o se generan de a una
+fila: cada función recibe y devuelve generadores, y guarda a lo sumo
+una ventana de k filas, por lo que la memoria es proporcional al
+ancho por k y no depende de la altura.
+
+filas genera la estructura de cada fila: las posiciones de sus celdas,
+paredes y vértices. Las paredes y vértices pertenecen a la fila de su
+celda de referencia, o a la de la celda más cercana si es una celda
+fantasma de los bordes, igual que en las teselas. Las posiciones son
+las de la grilla de esa altura, por lo que se pueden usar con sus
+capas.
+
+Los valores de las celdas se procesan como una secuencia de arreglos
+de numpy, uno por fila. bloques los agrupa en ventanas de k filas
+centradas en cada fila, para los filtros que leen las vecinas, y
+automata calcula un paso de un autómata celular con las mismas reglas
+que el módulo automata:
+
+>>> estados = leer(capa)
+>>> for nueva in automata(exa.Grilla, columnas, estados, Vida((2,), (3, 4))):
+...     guardar(nueva)
+
+Los pasos se encadenan pasando la salida de automata como entrada de
+otro; cada paso agrega un retraso de una fila y una ventana de tres.
+
+Requiere numpy, salvo filas y ventana.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+from collections import deque
+
+import almacen
+import automata as automata_
+
+class Fila(object):
+	"""Fila de una grilla: su número y las posiciones de sus celdas,
+	paredes y vértices, ordenadas como los índices lineales de la
+	grilla"""
+	__slots__ = ("fila", "celdas", "paredes", "vertices")
+
+	def __init__(self, fila, celdas, paredes, vertices):
+
+		self.fila = fila
+		self.celdas = celdas
+		self.paredes = paredes
+		self.vertices = vertices
+
+	def __repr__(self):
+		return "Fila %d (%d celdas, %d paredes, %d vértices)" % (self.fila, len(self.celdas), len(self.paredes), len(self.vertices))
+
+def filas(clase, columnas, cantidad=None, desde=0):
+	'''Generador de las filas (objetos Fila) de una grilla de clase
+	(cuad.Grilla, exa.Grilla o una subclase) con columnas columnas y
+	cantidad filas, o sin fin si cantidad es None, empezando por la
+	fila desde. Las posiciones se calculan desplazando las de una
+	grilla de pocas filas, por lo que no se crea la grilla'''
+	if cantidad is not None and cantidad < 4:
+		plantilla = clase(cantidad, columnas, compacta=True)
+	else:
+		plantilla = clase(4, columnas, compacta=True)
+	ultima = plantilla.cant_filas - 1
+
+	# Elementos de cada fila de la plantilla, por fila
+	elementos = [([], [], []) for _ in xrange(plantilla.cant_filas)]
+	for f in xrange(plantilla.cant_filas):
+		elementos[f][0].extend((f, c) for c in xrange(columnas))
+	for k, posiciones in ((1, plantilla._posiciones_paredes()), (2, plantilla._posiciones_vertices())):
+		for pos in posiciones:
+			f = pos[0][0] if isinstance(pos[0], tuple) else pos[0]
+			elementos[min(max(f, 0), ultima)][k].append(pos)
+
+	f = desde
+	while cantidad is None or f < cantidad:
+		# La primera y la última fila se toman de las de la plantilla, y
+		# las demás de la segunda, que tiene filas arriba y abajo
+		if f == 0 or (cantidad is not None and cantidad < 4):
+			modelo = f
+		elif cantidad is not None and f == cantidad - 1:
+			modelo = ultima
+		else:
+			modelo = 1
+		d = f - modelo
+		celdas, paredes, vertices = elementos[modelo]
+		yield Fila(f, [(g + d, c) for g, c in celdas], [_desplazar(pos, d) for pos in paredes], [_desplazar(pos, d) for pos in vertices])
+		f += 1
+
+def ventana(secuencia, k, relleno=None):
+	'''Generador de ventanas de k filas (k impar) sobre secuencia, que
+	puede ser cualquier iterable de filas. Para cada fila devuelve una
+	tupla (número de fila, ventana), donde ventana es una tupla con las
+	k filas centradas en ella; las que caen fuera de la secuencia se
+	reemplazan por relleno. Guarda solo k filas'''
+	if k < 1 or k % 2 == 0:
+		raise ValueError("La ventana debe tener una cantidad impar de filas")
+	medio = k // 2
+	filas_ = deque([relleno] * medio, maxlen=k)
+	f = 0
+	for fila in secuencia:
+		filas_.append(fila)
+		if len(filas_) == k:
+			yield f, tuple(filas_)
+			f += 1
+	if len(filas_) <= medio:  # La secuencia estaba vacía
+		return
+	for _ in xrange(medio):
+		filas_.append(relleno)
+		if len(filas_) == k:
+			yield f, tuple(filas_)
+			f += 1
+
+def bloques(datos, k, borde=0):
+	'''Generador de ventanas de k filas sobre datos, un iterable de
+	arreglos de numpy del mismo largo, uno por fila. Para cada fila
+	devuelve una tupla (número de fila, bloque), donde bloque es un
+	arreglo de forma (k, columnas) con las filas centradas en ella; las
+	que caen fuera de la grilla valen borde. Requiere numpy.'''
+	numpy = almacen.requiere_numpy()
+	relleno = None
+	for f, filas_ in ventana(datos, k):
+		if relleno is None:
+			modelo = [fila for fila in filas_ if fila is not None][0]
+			relleno = numpy.empty_like(modelo)
+			relleno.fill(borde)
+		yield f, numpy.stack([relleno if fila is None else fila for fila in filas_])
+
+def automata(clase, columnas, datos, regla, vectorizada=True, borde=0):
+	'''Generador de los estados de las filas de una grilla de clase y
+	columnas columnas después de un paso de un autómata celular. datos
+	es un iterable con el arreglo de numpy de los estados de cada fila,
+	y regla, vectorizada y borde tienen el mismo significado que en
+	automata.Automata. Cada fila nueva se devuelve en cuanto se leyó la
+	siguiente. Requiere numpy.'''
+	numpy = almacen.requiere_numpy()
+
+	# Vecinas de la fila del medio de una grilla de tres filas, que
+	# indexan el bloque aplanado
+	vecinas = clase(3, columnas, compacta=True).vecinas_array(1, 2)
+	for _, bloque in bloques(datos, 3, borde):
+		yield numpy.asarray(automata_._aplicar(regla, vectorizada, borde, bloque[1], bloque.ravel(), vecinas), dtype=bloque.dtype)
+
+def leer(capa, desde=0, hasta=None):
+	'''Generador de las filas desde a hasta-1 de una capa de celdas,
+	como vistas de su arreglo. Con una capa mapeada en memoria solo se
+	leen del archivo las filas que se usan'''
+	if capa.tipo != "celda":
+		raise ValueError("La capa " + str(capa.nombre) + " debe ser de tipo celda")
+	C = capa.grilla.cant_columnas
+	if hasta is None:
+		hasta = capa.grilla.cant_filas
+	for f in xrange(desde, hasta):
+		yield capa.datos[f*C:(f+1)*C]
+
+def _desplazar(pos, d):
+	'''Retorna la posición de pared o vértice pos desplazada d filas'''
+	if isinstance(pos[0], tuple):
+		(f, c), p = pos
+		return ((f + d, c), p)
+	return (pos[0] + d, pos[1])
@@ -0,0 +1,391 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo con la geometría de las grillas cuadradas y hexagonales en
+el plano, para dibujarlas y para ubicar puntos sobre ellas sin recorrer
+las celdas. Las coordenadas son las de la pantalla: x crece hacia la
+derecha y y hacia abajo, igual que las filas.
+
+En las grillas cuadradas cada celda es un rectángulo de ancho por
+alto. En las hexagonales cada celda es un hexágono regular con los
+lados N y S horizontales, de radio (distancia del centro a cada
+vértice) tamano, y las columnas impares están desplazadas media celda
+hacia abajo, como en exa.Grilla. origen es la esquina superior
+izquierda del rectángulo que envuelve a la celda (0, 0):
+
+>>> geometria = Geometria(grilla, 32, origen=(10, 10))
+>>> geometria.celda(x, y)
+(4, 7)
+
+Ubicar la celda de un punto, y la pared o el vértice más cercanos
+dentro de ella, se resuelve con unas pocas operaciones aritméticas: en
+las grillas hexagonales el punto se pasa a coordenadas cúbicas
+fraccionarias y se redondea (ver coordenadas). La celda de muchos
+puntos a la vez y las celdas de un rectángulo se calculan con numpy y
+se devuelven como arreglos de índices lineales.
+
+Para dibujar la grilla, vertices_array calcula de una vez las
+coordenadas de todos los vértices, y poligonos_array y segmentos_array
+los índices de los vértices de los polígonos de las celdas y de los
+segmentos de las paredes, listos para copiar a los buffers de una
+placa de video o para exportar con svg:
+
+>>> coordenadas = geometria.vertices_array()
+>>> visibles = geometria.poligonos_array(geometria.rectangulo(*vista))
+>>> cerradas = geometria.segmentos_array(capa_bits.indices())
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import math
+
+import almacen
+import coordenadas
+import cuad
+import exa
+
+RAIZ3 = math.sqrt(3)
+
+# Lugar en exa._paredes_celda de la pared de cada sexto de vuelta
+# alrededor del centro, desde el este en sentido antihorario, y lugar
+# en exa._vertices_celda del vértice más cercano a cada ángulo múltiplo
+# de 60 grados
+_PAREDES_SECTOR = (2, 1, 0, 5, 4, 3)  # NE, N, NO, SO, S, SE
+_VERTICES_ANGULO = (2, 1, 0, 5, 4, 3)  # E, NE, NO, O, SO, SE
+
+class Geometria(object):
+	"""Geometría en el plano de una grilla cuadrada o hexagonal"""
+	def __init__(self, grilla, tamano=1.0, origen=(0.0, 0.0)):
+		'''Define la geometría de grilla. En una grilla cuadrada tamano
+		es el lado de las celdas, o una tupla (ancho, alto); en una
+		hexagonal es el radio de los hexágonos. origen es el punto
+		(x, y) de la esquina superior izquierda del rectángulo que
+		envuelve a la celda (0, 0)'''
+		almacen.requiere_numpy()
+
+		self._grilla = grilla
+		self._hexagonal = isinstance(grilla, exa.Grilla)
+		self._origen = (float(origen[0]), float(origen[1]))
+		if self._hexagonal:
+			self._tamano = float(tamano)
+			self._ancho = 2*self._tamano
+			self._alto = RAIZ3*self._tamano
+			self._paso = 1.5*self._tamano  # Distancia entre columnas
+		else:
+			ancho, alto = tamano if isinstance(tamano, tuple) else (tamano, tamano)
+			self._tamano = (float(ancho), float(alto))
+			self._ancho, self._alto = self._tamano
+			self._paso = self._ancho
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla de la geometría'''
+		return self._grilla
+
+	@property
+	def tamano(self):
+		'''Devuelve el radio de los hexágonos, o el par (ancho, alto)
+		de las celdas cuadradas. Solo lectura'''
+		return self._tamano
+
+	@property
+	def origen(self):
+		'''Devuelve la esquina superior izquierda de la celda (0, 0).
+		Solo lectura'''
+		return self._origen
+
+	@property
+	def ancho_celda(self):
+		'''Devuelve el ancho del rectángulo que envuelve a una celda'''
+		return self._ancho
+
+	@property
+	def alto_celda(self):
+		'''Devuelve el alto del rectángulo que envuelve a una celda'''
+		return self._alto
+
+	def limites(self):
+		'''Retorna el rectángulo (x0, y0, x1, y1) que envuelve a toda
+		la grilla'''
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		x0, y0 = self._origen
+		if not (F and C):
+			return (x0, y0, x0, y0)
+		if not self._hexagonal:
+			return (x0, y0, x0 + C*self._ancho, y0 + F*self._alto)
+		alto = F*self._alto + (self._alto/2 if C > 1 else 0)
+		return (x0, y0, x0 + (C-1)*self._paso + self._ancho, y0 + alto)
+
+	def centro(self, pos):
+		'''Retorna el centro (x, y) de la celda de pos. La fila y la
+		columna pueden ser arreglos de numpy'''
+		f, c = pos
+		x0, y0 = self._origen
+		x = x0 + self._paso*c + self._ancho/2
+		y = y0 + self._alto*f + self._alto/2
+		if self._hexagonal:
+			y = y + (c & 1)*self._alto/2
+		return (x, y)
+
+	def celda(self, x, y):
+		'''Retorna la posición de la celda que contiene el punto
+		(x, y), o None si está fuera de la grilla'''
+		f, c = self._ubicar(x, y)
+		pos = (int(f), int(c))
+		return pos if self._grilla.existe_celda(pos) else None
+
+	def indices(self, x, y):
+		'''Retorna un arreglo de numpy con el índice lineal de la celda
+		que contiene cada punto de los arreglos x e y, o -1 para los
+		que están fuera de la grilla'''
+		numpy = almacen.requiere_numpy()
+		f, c = self._ubicar(numpy.asarray(x, dtype=float), numpy.asarray(y, dtype=float))
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		dentro = (f >= 0) & (f < F) & (c >= 0) & (c < C)
+		return numpy.where(dentro, f*C + c, -1)
+
+	def pared(self, x, y):
+		'''Retorna la posición de la pared más cercana al punto (x, y)
+		entre las de la celda que lo contiene, o None si está fuera de
+		la grilla'''
+		pos = self.celda(x, y)
+		if pos is None:
+			return None
+		cx, cy = self.centro(pos)
+		dx, dy = x - cx, y - cy
+		if self._hexagonal:
+			sector = int(math.floor(self._angulo(dx, dy) / 60)) % 6
+			return exa._paredes_celda(pos)[_PAREDES_SECTOR[sector]]
+
+		# Distancia a cada lado, en el orden de cuad._paredes_celda
+		ancho, alto = self._tamano
+		distancias = (dy + alto/2, ancho/2 - dx, alto/2 - dy, dx + ancho/2)  # N, E, S, O
+		return cuad._paredes_celda(pos)[distancias.index(min(distancias))]
+
+	def vertice(self, x, y):
+		'''Retorna la posición del vértice más cercano al punto (x, y)
+		entre los de la celda que lo contiene, o None si está fuera de
+		la grilla'''
+		pos = self.celda(x, y)
+		if pos is None:
+			return None
+		cx, cy = self.centro(pos)
+		dx, dy = x - cx, y - cy
+		if self._hexagonal:
+			angulo = int(math.floor(self._angulo(dx, dy) / 60 + 0.5)) % 6
+			return exa._vertices_celda(pos)[_VERTICES_ANGULO[angulo]]
+		if dy < 0:
+			return cuad._vertices_celda(pos)[0 if dx < 0 else 1]  # NO, NE
+		return cuad._vertices_celda(pos)[3 if dx < 0 else 2]  # SO, SE
+
+	def rectangulo(self, x0, y0, x1, y1, centros=False):
+		'''Retorna un arreglo de numpy con los índices lineales, en
+		orden, de las celdas cuyo rectángulo envolvente se superpone con
+		el rectángulo de esquinas (x0, y0) y (x1, y1). Si centros es
+		True se devuelven solo las celdas cuyo centro está dentro del
+		rectángulo'''
+		numpy = almacen.requiere_numpy()
+		x0, x1 = min(x0, x1), max(x0, x1)
+		y0, y1 = min(y0, y1), max(y0, y1)
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		ox, oy = self._origen
+
+		c0, c1 = _rango(ox, self._paso, self._ancho, x0, x1, centros, C)
+		partes = []
+		for paridad in ((0, 1) if self._hexagonal else (None,)):
+			columnas = numpy.arange(c0, c1 + 1)
+			corrimiento = 0.0
+			if paridad is not None:
+				columnas = columnas[columnas % 2 == paridad]
+				corrimiento = paridad*self._alto/2
+			f0, f1 = _rango(oy + corrimiento, self._alto, self._alto, y0, y1, centros, F)
+			filas = numpy.arange(f0, f1 + 1)
+			partes.append((filas.reshape(-1, 1)*C + columnas.reshape(1, -1)).ravel())
+		res = numpy.concatenate(partes)
+		res.sort()
+		return res
+
+	def vertices_array(self, dtype="float32"):
+		'''Retorna un arreglo de numpy de forma (rango_vertices, 2) con
+		las coordenadas (x, y) del vértice de cada índice lineal. Los
+		índices de los bordes que no corresponden a ningún vértice
+		tienen las coordenadas que tendrían si existieran'''
+		numpy = almacen.requiere_numpy()
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		x0, y0 = self._origen
+		res = numpy.empty((self._grilla.rango_vertices, 2), dtype=dtype)
+		if not self._hexagonal:
+			f = numpy.arange(F+1).reshape(-1, 1)
+			c = numpy.arange(C+1).reshape(1, -1)
+			res[:, 0] = (x0 + c*self._ancho + 0*f).ravel()
+			res[:, 1] = (y0 + f*self._alto + 0*c).ravel()
+			return res
+		if not len(res):
+			return res
+
+		# Vértices "O" de las celdas (f, c) y luego "E" de las celdas
+		# (f, c-1), con f de -1 a F y c de 0 a C
+		f = numpy.arange(-1, F+1).reshape(-1, 1)
+		c = numpy.arange(C+1).reshape(1, -1)
+		x = x0 + c*self._paso + 0*f
+		y = y0 + self._alto/2 + f*self._alto + (c & 1)*self._alto/2
+		mitad = (F+2)*(C+1)
+		res[:mitad, 0] = x.ravel()
+		res[:mitad, 1] = y.ravel()
+		x = x0 + (c-1)*self._paso + self._ancho + 0*f
+		y = y0 + self._alto/2 + f*self._alto + ((c-1) & 1)*self._alto/2
+		res[mitad:, 0] = x.ravel()
+		res[mitad:, 1] = y.ravel()
+		return res
+
+	def poligonos_array(self, celdas=None):
+		'''Retorna un arreglo de numpy de forma (n, 4) o (n, 6) con los
+		índices lineales de los vértices de cada celda, en el orden de
+		los vértices de _Celda.vertices() (NO, NE, SE y SO, o NO, NE, E,
+		SE, SO y O), que recorren el polígono en el sentido de las agujas
+		del reloj. celdas es un arreglo con los índices de las celdas, o
+		None para todas'''
+		numpy = almacen.requiere_numpy()
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		if celdas is None:
+			celdas = numpy.arange(F*C)
+		f, c = numpy.divmod(numpy.asarray(celdas, dtype=numpy.intp), C) if C else (celdas, celdas)
+		if not self._hexagonal:
+			no = f*(C+1) + c
+			columnas = (no, no + 1, no + C+2, no + C+1)
+		else:
+			impar = c & 1
+			inicio_E = (F+2)*(C+1)
+			columnas = (inicio_E + (f+impar)*(C+1) + c,  # NO
+			            (f+impar)*(C+1) + c+1,  # NE
+			            inicio_E + (f+1)*(C+1) + c+1,  # E
+			            (f+1+impar)*(C+1) + c+1,  # SE
+			            inicio_E + (f+1+impar)*(C+1) + c,  # SO
+			            (f+1)*(C+1) + c)  # O
+		return numpy.column_stack(columnas).astype(numpy.uint32)
+
+	def segmentos_array(self, paredes=None):
+		'''Retorna un arreglo de numpy de forma (n, 2) con los índices
+		lineales de los vértices A y B de cada pared, como en
+		_Pared.vertices(). paredes es un arreglo con los índices de las
+		paredes, o None para todas las que existen en orden'''
+		numpy = almacen.requiere_numpy()
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		if paredes is None:
+			existe = numpy.zeros(self._grilla.rango_paredes, dtype=bool)
+			existe[self._grilla.paredes_array().ravel()] = True
+			paredes = numpy.flatnonzero(existe)
+		paredes = numpy.asarray(paredes, dtype=numpy.intp)
+		res = numpy.empty((len(paredes), 2), dtype=numpy.uint32)
+		if not len(paredes):
+			return res
+		if not self._hexagonal:
+			inicio_O = (F+1)*C
+			f, c = numpy.divmod(paredes, C)
+			fo, co = numpy.divmod(paredes - inicio_O, C+1)
+			es_N = paredes < inicio_O
+			a = numpy.where(es_N, f*(C+1) + c, fo*(C+1) + co)
+			res[:, 0] = a
+			res[:, 1] = numpy.where(es_N, a + 1, a + C+1)
+			return res
+
+		inicio_E = (F+2)*(C+1)
+		for plano, inicio, fin in self._grilla.planos_paredes():
+			elegidas = (paredes >= inicio) & (paredes < fin)
+			if plano == "N":
+				f, c = numpy.divmod(paredes[elegidas] - inicio, C)
+			else:
+				f, c = numpy.divmod(paredes[elegidas] - inicio, C+1)
+			if plano == "NE":
+				c = c - 1
+			impar = c & 1
+			if plano == "NO":
+				a, b = (f+1)*(C+1) + c, inicio_E + (f+impar)*(C+1) + c
+			elif plano == "N":
+				a, b = inicio_E + (f+impar)*(C+1) + c, (f+impar)*(C+1) + c+1
+			else:
+				a, b = (f+impar)*(C+1) + c+1, inicio_E + (f+1)*(C+1) + c+1
+			res[elegidas, 0] = a
+			res[elegidas, 1] = b
+		return res
+
+	def svg(self, paredes=None, colores=None, grosor=1.0, color="black"):
+		'''Retorna el texto de una imagen SVG con los segmentos de las
+		paredes de índices paredes (None para todas) y, si se indica
+		colores, los polígonos de las celdas rellenos con colores, una
+		secuencia con un color de SVG o None por celda'''
+		numpy = almacen.requiere_numpy()
+		puntos = self.vertices_array("float64")
+		x0, y0, x1, y1 = self.limites()
+		margen = grosor
+		partes = ['<svg xmlns="http://www.w3.org/2000/svg" viewBox="%g %g %g %g">' % (x0 - margen, y0 - margen, x1 - x0 + 2*margen, y1 - y0 + 2*margen)]
+
+		if colores is not None:
+			# Un camino por color, con un polígono por celda
+			grupos = {}
+			for i, relleno in enumerate(colores):
+				if relleno is not None:
+					grupos.setdefault(relleno, []).append(i)
+			for relleno in sorted(grupos):
+				poligonos = puntos[self.poligonos_array(numpy.array(grupos[relleno]))]
+				camino = " ".join("M" + " L".join("%g %g" % tuple(p) for p in poligono) + " Z" for poligono in poligonos)
+				partes.append('<path d="%s" fill="%s" stroke="none"/>' % (camino, relleno))
+
+		segmentos = puntos[self.segmentos_array(paredes)]
+		camino = " ".join("M%g %g L%g %g" % (a[0], a[1], b[0], b[1]) for a, b in segmentos)
+		partes.append('<path d="%s" fill="none" stroke="%s" stroke-width="%g" stroke-linecap="round"/>' % (camino, color, grosor))
+		partes.append('</svg>')
+		return "\n".join(partes)
+
+	def _ubicar(self, x, y):
+		'''Retorna la fila y la columna de la celda que contiene el
+		punto (x, y), exista o no. x e y pueden ser arreglos de numpy'''
+		numpy = almacen.requiere_numpy()
+		x0, y0 = self._origen
+		if not self._hexagonal:
+			return (numpy.floor((y - y0) / self._alto).astype(int), numpy.floor((x - x0) / self._ancho).astype(int))
+
+		# Coordenadas axiales fraccionarias respecto del centro de la
+		# celda (0, 0), que se redondean en coordenadas cúbicas
+		px = (x - x0 - self._tamano) / self._tamano
+		py = (y - y0 - self._alto/2) / self._tamano
+		q = px * 2/3
+		r = py / RAIZ3 - px / 3
+		return coordenadas.desde_cubo(_redondear(q, -q - r, r))
+
+	def _angulo(self, dx, dy):
+		'''Ángulo en grados, de 0 a 360 en sentido antihorario desde el
+		este, del vector (dx, dy) en coordenadas de pantalla'''
+		return math.degrees(math.atan2(-dy, dx)) % 360
+
+def _rango(inicio, paso, ancho, a, b, centros, cantidad):
+	'''Retorna el primer y el último k, entre 0 y cantidad-1, de los
+	intervalos [inicio + paso*k, inicio + paso*k + ancho] que se
+	superponen con [a, b], o cuyo centro está en [a, b] si centros es
+	True'''
+	if centros:
+		k0 = int(math.ceil((a - inicio - ancho/2) / paso))
+		k1 = int(math.floor((b - inicio - ancho/2) / paso))
+	else:
+		k0 = int(math.floor((a - inicio - ancho) / paso)) + 1
+		k1 = int(math.ceil((b - inicio) / paso)) - 1
+	return max(k0, 0), min(k1, cantidad - 1)
+
+def _redondear(x, y, z):
+	'''Redondea las coordenadas cúbicas fraccionarias x, y, z, que
+	pueden ser arreglos de numpy, a las de la celda que las contiene.
+	Ver coordenadas.redondear'''
+	numpy = almacen.requiere_numpy()
+	rx, ry, rz = numpy.floor(x + 0.5), numpy.floor(y + 0.5), numpy.floor(z + 0.5)
+	dx, dy, dz = abs(rx - x), abs(ry - y), abs(rz - z)
+	cambia_x = (dx > dy) & (dx > dz)
+	cambia_y = ~cambia_x & (dy > dz)
+	cambia_z = ~cambia_x & ~cambia_y
+	rx = numpy.where(cambia_x, -ry - rz, rx)
+	ry = numpy.where(cambia_y, -rx - rz, ry)
+	rz = numpy.where(cambia_z, -rx - ry, rz)
+	return rx.astype(int), ry.astype(int), rz.astype(int)
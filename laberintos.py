@@ -0,0 +1,302 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para generar laberintos perfectos sobre una grilla cuadrada o
+hexagonal: laberintos en los que hay exactamente un camino entre cada
+par de celdas. El laberinto se guarda en una capa de bits de paredes
+(ver capas.CapaBits) en la que un bit encendido indica que la pared
+está cerrada; cada generador empieza con todas las paredes cerradas y
+abre las que separan a las celdas que une:
+
+>>> cerradas = kruskal(grilla, "muros", semilla=42)
+>>> cerradas[(3, 4), "N"]
+
+Los generadores recorren las vecinas de las celdas con los arreglos de
+grilla.vecinas_array y grilla.paredes_array, sin crear los objetos de
+la grilla, y abren todas las paredes de una vez al terminar. Con la
+misma semilla generan siempre el mismo laberinto. Los algoritmos son:
+
+kruskal     --> abre las paredes en orden aleatorio si separan dos
+                conjuntos de celdas distintos (union-find)
+prim        --> hace crecer el laberinto desde una celda abriendo una
+                pared al azar de su frontera
+backtracker --> recorrido en profundidad aleatorio con una pila
+                explícita; genera pasillos largos
+wilson      --> caminatas aleatorias sin ciclos hasta el laberinto;
+                genera laberintos uniformes, sin sesgo
+eller       --> fila por fila, guardando solo el conjunto de cada
+                celda de la fila actual
+
+eller_filas genera el algoritmo de Eller como una secuencia de filas
+que no depende de una grilla, con memoria proporcional al ancho, para
+laberintos de cualquier altura, incluso sin fin.
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import random
+
+import almacen
+import capas
+
+def generar(grilla, algoritmo="backtracker", cerradas="laberinto", semilla=None):
+	'''Genera un laberinto en grilla con el algoritmo indicado por su
+	nombre y retorna la capa de bits de paredes cerradas. Ver la
+	función de cada algoritmo'''
+	algoritmos = {"kruskal": kruskal, "prim": prim, "backtracker": backtracker, "wilson": wilson, "eller": eller}
+	if not algoritmo in algoritmos:
+		raise ValueError("Algoritmo desconocido: " + str(algoritmo))
+	return algoritmos[algoritmo](grilla, cerradas, semilla)
+
+def kruskal(grilla, cerradas="laberinto", semilla=None):
+	'''Genera un laberinto con el algoritmo de Kruskal aleatorio y
+	retorna la capa de bits cerradas. cerradas es una capa de bits de
+	paredes o su nombre; si la grilla no tiene una capa con ese nombre
+	se agrega. semilla es la semilla de los números aleatorios, o None
+	para usar una distinta cada vez'''
+	numpy = almacen.requiere_numpy()
+	capa, generador = _preparar(grilla, cerradas, semilla)
+	vecinas, paredes = grilla.vecinas_array(), grilla.paredes_array()
+	n = grilla.rango_celdas
+
+	# Cada par de vecinas aparece una sola vez, desde la celda de menor
+	# índice, y los pares se recorren en orden aleatorio
+	celdas, lugares = numpy.nonzero(vecinas > numpy.arange(n).reshape(-1, 1))
+	orden = numpy.random.RandomState(generador.randrange(2**32)).permutation(len(celdas))
+	celdas, lugares = celdas[orden], lugares[orden]
+	otras = almacen.plano(vecinas[celdas, lugares])
+	entre = almacen.plano(paredes[celdas, lugares])
+	celdas = almacen.plano(celdas)
+
+	padres = almacen.plano(numpy.arange(n))
+	abiertas = []
+	for k in xrange(len(celdas)):
+		i, j = celdas[k], otras[k]
+		while padres[i] != i:
+			padres[i] = padres[padres[i]]  # Compresión por mitades
+			i = padres[i]
+		while padres[j] != j:
+			padres[j] = padres[padres[j]]
+			j = padres[j]
+		if i == j:
+			continue
+		padres[j] = i
+		abiertas.append(entre[k])
+		if len(abiertas) == n - 1:  # Ya están todas unidas
+			break
+
+	capa.quitar(abiertas)
+	return capa
+
+def prim(grilla, cerradas="laberinto", semilla=None):
+	'''Genera un laberinto con el algoritmo de Prim aleatorio y retorna
+	la capa de bits cerradas. Ver kruskal para los parámetros'''
+	capa, generador = _preparar(grilla, cerradas, semilla)
+	n, k, vecinas, paredes = _grafo(grilla)
+	if not n:
+		return capa
+	aleatorio = generador.random
+
+	# La frontera tiene las entradas (celda*k + lugar) de los arreglos
+	# planos que salen del laberinto, y se saca una al azar
+	dentro = bytearray(n)
+	inicio = int(aleatorio() * n)
+	dentro[inicio] = 1
+	frontera = [e for e in xrange(inicio*k, inicio*k + k) if vecinas[e] >= 0]
+	abiertas = []
+	while frontera:
+		m = int(aleatorio() * len(frontera))
+		e = frontera[m]
+		frontera[m] = frontera[-1]
+		frontera.pop()
+		j = vecinas[e]
+		if dentro[j]:
+			continue
+		dentro[j] = 1
+		abiertas.append(paredes[e])
+		frontera.extend(f for f in xrange(j*k, j*k + k) if vecinas[f] >= 0 and not dentro[vecinas[f]])
+
+	capa.quitar(abiertas)
+	return capa
+
+def backtracker(grilla, cerradas="laberinto", semilla=None):
+	'''Genera un laberinto con un recorrido en profundidad aleatorio
+	(recursive backtracker), usando una pila explícita, y retorna la
+	capa de bits cerradas. Ver kruskal para los parámetros'''
+	capa, generador = _preparar(grilla, cerradas, semilla)
+	n, k, vecinas, paredes = _grafo(grilla)
+	if not n:
+		return capa
+	aleatorio = generador.random
+
+	visitada = bytearray(n)
+	inicio = int(aleatorio() * n)
+	visitada[inicio] = 1
+	pila = [inicio]
+	abiertas = []
+	while pila:
+		i = pila[-1]
+		libres = [e for e in xrange(i*k, i*k + k) if vecinas[e] >= 0 and not visitada[vecinas[e]]]
+		if not libres:
+			pila.pop()
+			continue
+		e = libres[int(aleatorio() * len(libres))]
+		j = vecinas[e]
+		visitada[j] = 1
+		abiertas.append(paredes[e])
+		pila.append(j)
+
+	capa.quitar(abiertas)
+	return capa
+
+def wilson(grilla, cerradas="laberinto", semilla=None):
+	'''Genera un laberinto con el algoritmo de Wilson y retorna la capa
+	de bits cerradas. Todos los laberintos posibles son igualmente
+	probables. Ver kruskal para los parámetros'''
+	capa, generador = _preparar(grilla, cerradas, semilla)
+	n, k, vecinas, paredes = _grafo(grilla)
+	if not n:
+		return capa
+	aleatorio = generador.random
+
+	dentro = bytearray(n)
+	dentro[int(aleatorio() * n)] = 1
+	salida = [0] * n  # Última entrada por la que salió la caminata
+	abiertas = []
+	for inicio in xrange(n):
+		# Caminata aleatoria hasta el laberinto. Al volver a pasar por
+		# una celda se pisa su salida, lo que borra el ciclo
+		i = inicio
+		while not dentro[i]:
+			e = i*k + int(aleatorio() * k)
+			while vecinas[e] < 0:  # Los bordes tienen menos vecinas
+				e = i*k + int(aleatorio() * k)
+			salida[i] = e
+			i = vecinas[e]
+
+		# Se agrega el camino sin ciclos siguiendo las salidas
+		i = inicio
+		while not dentro[i]:
+			dentro[i] = 1
+			abiertas.append(paredes[salida[i]])
+			i = vecinas[salida[i]]
+
+	capa.quitar(abiertas)
+	return capa
+
+def eller(grilla, cerradas="laberinto", semilla=None):
+	'''Genera un laberinto con el algoritmo de Eller, fila por fila
+	(ver eller_filas), y retorna la capa de bits cerradas. En las
+	grillas hexagonales las celdas de una fila se unen con la vecina de
+	la columna siguiente, que es la SE en las columnas pares y la NE en
+	las impares, y con la de abajo por la pared S. Ver kruskal para los
+	parámetros'''
+	numpy = almacen.requiere_numpy()
+	capa, generador = _preparar(grilla, cerradas, semilla)
+	F, C = grilla.cant_filas, grilla.cant_columnas
+	n = grilla.rango_celdas
+	if not n:
+		return capa
+	vecinas, paredes = grilla.vecinas_array(), grilla.paredes_array()
+
+	# Pared de cada celda con la vecina de la columna siguiente y con la
+	# de la fila siguiente
+	indices = numpy.arange(n).reshape(-1, 1)
+	derecha = (vecinas == indices + 1) & (indices % C < C - 1)
+	abajo = vecinas == indices + C
+	pared_derecha = numpy.full(n, -1, dtype=paredes.dtype)
+	pared_abajo = numpy.full(n, -1, dtype=paredes.dtype)
+	pared_derecha[numpy.nonzero(derecha)[0]] = paredes[derecha]
+	pared_abajo[numpy.nonzero(abajo)[0]] = paredes[abajo]
+	pared_derecha, pared_abajo = almacen.plano(pared_derecha), almacen.plano(pared_abajo)
+
+	abiertas = []
+	for f, (unidas, bajan) in enumerate(eller_filas(C, F, generador.randrange(2**32))):
+		abiertas.extend(pared_derecha[f*C + c] for c in unidas)
+		abiertas.extend(pared_abajo[f*C + c] for c in bajan)
+
+	capa.quitar(abiertas)
+	return capa
+
+def eller_filas(columnas, filas=None, semilla=None):
+	'''Generador de las filas de un laberinto de Eller de columnas
+	celdas de ancho y filas de alto, o sin fin si filas es None. Para
+	cada fila devuelve una tupla (derecha, abajo) con las listas de las
+	columnas cuya celda está unida con la de la columna siguiente y con
+	la de la fila siguiente. Solo guarda el conjunto de cada celda de
+	la fila actual, por lo que la memoria es proporcional a columnas.
+	La última fila une todos los conjuntos que quedan. Si filas es None
+	las filas no tienen ciclos, pero algunas celdas de las filas ya
+	generadas solo se unen a través de las filas siguientes'''
+	aleatorio = random.Random(semilla).random
+	conjuntos = range(columnas)  # Conjunto de cada celda de la fila
+	nuevo = columnas  # Próximo conjunto sin usar
+
+	f = 0
+	while filas is None or f < filas:
+		ultima = filas is not None and f == filas - 1
+		miembros = {}
+		for c, s in enumerate(conjuntos):
+			miembros.setdefault(s, []).append(c)
+
+		# Se unen celdas vecinas de conjuntos distintos, todas en la
+		# última fila; se renombra el conjunto más chico
+		derecha = []
+		for c in xrange(columnas - 1):
+			a, b = conjuntos[c], conjuntos[c+1]
+			if a == b or not (ultima or aleatorio() < 0.5):
+				continue
+			derecha.append(c)
+			if len(miembros[a]) < len(miembros[b]):
+				a, b = b, a
+			for k in miembros[b]:
+				conjuntos[k] = a
+			miembros[a].extend(miembros.pop(b))
+
+		# Cada conjunto baja por al menos una de sus celdas, y las
+		# celdas de abajo que no se unen empiezan conjuntos nuevos
+		abajo = []
+		if not ultima:
+			siguientes = [-1] * columnas
+			for c in xrange(columnas):
+				s = conjuntos[c]
+				if miembros[s][0] != c:  # Cada conjunto una sola vez
+					continue
+				celdas = miembros[s]
+				bajan = [k for k in celdas if aleatorio() < 0.5] or [celdas[int(aleatorio() * len(celdas))]]
+				for k in bajan:
+					siguientes[k] = s
+				abajo.extend(bajan)
+			abajo.sort()
+			for c in xrange(columnas):
+				if siguientes[c] < 0:
+					siguientes[c] = nuevo
+					nuevo += 1
+			conjuntos = siguientes
+
+		yield derecha, abajo
+		f += 1
+
+def _preparar(grilla, cerradas, semilla):
+	'''Retorna la capa de bits de paredes cerradas, con todas las
+	paredes cerradas, y el generador de números aleatorios'''
+	if not isinstance(cerradas, capas.CapaBits):
+		if cerradas in grilla.index_capas():
+			cerradas = grilla.get_capa(cerradas)
+		else:
+			cerradas = grilla.agregar_bits(cerradas, "pared")
+	if not isinstance(cerradas, capas.CapaBits) or cerradas.tipo != "pared":
+		raise ValueError("La capa " + str(cerradas.nombre) + " debe ser una capa de bits de paredes")
+	cerradas.llenar(True)
+	return cerradas, random.Random(semilla)
+
+def _grafo(grilla):
+	'''Retorna la cantidad de celdas, la cantidad de vecinas por celda
+	y los arreglos planos de vecinas y paredes de grilla, en los que la
+	entrada celda*k + lugar corresponde a la vecina lugar de la celda'''
+	vecinas, paredes = grilla.vecinas_array(), grilla.paredes_array()
+	return grilla.rango_celdas, vecinas.shape[1], almacen.plano(vecinas), almacen.plano(paredes)
@@ -0,0 +1,194 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para guardar y cargar grillas en un formato binario compacto.
+Se guardan la topología (cuadrada o hexagonal), las dimensiones, las
+opciones de almacenamiento, los nombres de las tablas de adyacencia y
+las capas de datos; los elementos no se guardan, ya que se vuelven a
+crear a partir de las dimensiones al cargar la grilla.
+
+>>> guardar(grilla, "mapa.grilla")
+>>> grilla = cargar("mapa.grilla")
+
+El formato empieza con la marca MAGIA y el número de versión, seguidos
+de un encabezado de tamaño fijo y de las tablas y capas. Todos los
+números se guardan en little endian:
+
+encabezado --> marca (4 bytes), versión (H), topología (B), filas (Q),
+               columnas (Q), compacta, lazy y memorizar (B cada uno),
+               máximo de la caché (q, -1 si no tiene), cantidad de
+               tablas de adyacencia (H) y cantidad de capas (H)
+tabla      --> nombre (texto)
+capa       --> nombre (B con 1 si es unicode, y texto), tipo de
+               elemento (B, índice en capas.TIPOS, más 128 si es una
+               capa de bits), tipo de dato de
+               numpy (texto), cantidad de valores (Q) y los valores
+texto      --> largo en bytes (H) y el texto en UTF-8
+
+Las capas mapeadas en memoria se guardan con todos sus valores y al
+cargarlas quedan en memoria. Las capas de bits (ver capas.CapaBits) se
+guardan como capas de bytes con los bits empaquetados, desde la
+versión 2 del formato.
+
+Las grillas divididas en teselas no se guardan en este formato: sus
+capas guardan los valores de cada tesela en el directorio de la grilla,
+y la grilla se puede guardar con pickle.
+
+Las grillas también se pueden guardar con pickle, que usa el mismo
+estado (ver Grilla.__getstate__) y tampoco recorre los elementos.
+
+Cargar capas requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+import struct
+from io import BytesIO
+
+import almacen
+import capas
+import cuad
+import exa
+
+MAGIA = b"GRLL"
+VERSION = 2
+
+# Clase de grilla de cada código de topología
+TOPOLOGIAS = (cuad.Grilla, exa.Grilla)
+
+_ENCABEZADO = struct.Struct("<4sHBQQBBBqHH")
+_LARGO = struct.Struct("<H")
+_BYTE = struct.Struct("<B")
+_CANTIDAD = struct.Struct("<Q")
+_BITS = 128  # Se suma al tipo de elemento de las capas de bits
+
+def guardar(grilla, archivo):
+	'''Guarda grilla en archivo, que puede ser un nombre de archivo o
+	un archivo ya abierto en modo binario'''
+	if not hasattr(archivo, "write"):
+		with open(archivo, "wb") as abierto:
+			return guardar(grilla, abierto)
+
+	topologia = _topologia(type(grilla))
+	if grilla.tesela is not None:
+		raise ValueError("Las grillas divididas en teselas no se pueden guardar en este formato")
+	estado = grilla.__getstate__()
+	cache = estado["cache"] if estado["cache"] is not None else -1
+
+	# Las capas mapeadas en memoria se guardan con sus valores, para
+	# que el archivo no dependa de otros
+	guardadas = estado["capas"] + [(nombre, tipo, grilla.get_capa(nombre).datos) for nombre, tipo, _, _, _, _ in estado["mapeadas"]]
+	bits = [(nombre, tipo, grilla.get_capa(nombre).bits.arreglo()) for nombre, tipo, _ in estado["bits"]]
+
+	archivo.write(_ENCABEZADO.pack(MAGIA, VERSION, topologia, estado["filas"], estado["columnas"], estado["compacta"], estado["lazy"], estado["memorizar"], cache, len(estado["adyacencias"]), len(guardadas) + len(bits)))
+
+	for nombre in estado["adyacencias"]:
+		_escribir_texto(archivo, nombre)
+
+	if guardadas or bits:
+		numpy = almacen.requiere_numpy()
+	for k, (nombre, tipo, datos) in enumerate(guardadas + bits):
+		if not isinstance(nombre, basestring):
+			raise TypeError("Solo se pueden guardar capas con nombres de texto: " + repr(nombre))
+		archivo.write(_BYTE.pack(isinstance(nombre, unicode)))
+		_escribir_texto(archivo, nombre)
+		archivo.write(_BYTE.pack(capas.TIPOS.index(tipo) + (_BITS if k >= len(guardadas) else 0)))
+		_escribir_texto(archivo, datos.dtype.str)
+		archivo.write(_CANTIDAD.pack(len(datos)))
+		archivo.write(numpy.ascontiguousarray(datos).data)
+
+def cargar(archivo, clase=None):
+	'''Carga la grilla guardada en archivo, que puede ser un nombre de
+	archivo o un archivo ya abierto en modo binario. clase es la clase
+	de la grilla a crear, que debe ser de la misma topología que la
+	guardada; si es None se usa cuad.Grilla o exa.Grilla según
+	corresponda. Lanza ValueError si el archivo no tiene el formato o
+	es de una versión posterior'''
+	if not hasattr(archivo, "read"):
+		with open(archivo, "rb") as abierto:
+			return cargar(abierto, clase)
+
+	magia, version, topologia, filas, columnas, compacta, lazy, memorizar, cache, cant_adyacencias, cant_capas = _ENCABEZADO.unpack(_leer(archivo, _ENCABEZADO.size))
+	if magia != MAGIA:
+		raise ValueError("El archivo no es una grilla guardada")
+	if version > VERSION:
+		raise ValueError("Versión de formato no soportada: " + str(version))
+	if not topologia < len(TOPOLOGIAS):
+		raise ValueError("Topología desconocida: " + str(topologia))
+
+	if clase is None:
+		clase = TOPOLOGIAS[topologia]
+	elif _topologia(clase) != topologia:
+		raise ValueError("La grilla guardada no es de la topología de " + clase.__name__)
+
+	estado = {
+		"filas": filas,
+		"columnas": columnas,
+		"compacta": bool(compacta),
+		"lazy": bool(lazy),
+		"cache": cache if cache >= 0 else None,
+		"memorizar": bool(memorizar),
+		"adyacencias": [_leer_texto(archivo) for _ in xrange(cant_adyacencias)],
+		"capas": [],
+		"bits": [],
+	}
+
+	if cant_capas:
+		numpy = almacen.requiere_numpy()
+	for _ in xrange(cant_capas):
+		es_unicode, = _BYTE.unpack(_leer(archivo, _BYTE.size))
+		nombre = _leer_texto(archivo, es_unicode)
+		tipo, = _BYTE.unpack(_leer(archivo, _BYTE.size))
+		dtype = numpy.dtype(_leer_texto(archivo))
+		cantidad, = _CANTIDAD.unpack(_leer(archivo, _CANTIDAD.size))
+		datos = numpy.frombuffer(_leer(archivo, cantidad * dtype.itemsize), dtype)
+		if tipo & _BITS:
+			estado["bits"].append((nombre, capas.TIPOS[tipo & ~_BITS], datos.tobytes()))
+		else:
+			estado["capas"].append((nombre, capas.TIPOS[tipo], datos))
+
+	grilla = clase.__new__(clase)
+	grilla.__setstate__(estado)
+	return grilla
+
+def serializar(grilla):
+	'''Retorna los bytes de grilla en el formato de guardar'''
+	archivo = BytesIO()
+	guardar(grilla, archivo)
+	return archivo.getvalue()
+
+def deserializar(datos, clase=None):
+	'''Retorna la grilla guardada en los bytes datos. Ver cargar'''
+	return cargar(BytesIO(datos), clase)
+
+def _topologia(clase):
+	'''Retorna el código de topología de una clase de grilla'''
+	for codigo, base in enumerate(TOPOLOGIAS):
+		if issubclass(clase, base):
+			return codigo
+	raise TypeError("No es una clase de grilla: " + clase.__name__)
+
+def _leer(archivo, cantidad):
+	'''Lee cantidad bytes de archivo. Lanza ValueError si el archivo
+	termina antes'''
+	datos = archivo.read(cantidad)
+	if len(datos) != cantidad:
+		raise ValueError("El archivo de la grilla está incompleto")
+	return datos
+
+def _escribir_texto(archivo, texto):
+	'''Escribe texto precedido de su largo en bytes'''
+	if isinstance(texto, unicode):
+		texto = texto.encode("utf-8")
+	archivo.write(_LARGO.pack(len(texto)))
+	archivo.write(texto)
+
+def _leer_texto(archivo, es_unicode=False):
+	'''Lee un texto escrito con _escribir_texto'''
+	largo, = _LARGO.unpack(_leer(archivo, _LARGO.size))
+	texto = _leer(archivo, largo)
+	if es_unicode:
+		return texto.decode("utf-8")
+	return texto
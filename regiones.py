@@ -0,0 +1,211 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para separar las celdas de una grilla cuadrada o hexagonal en
+regiones conexas. Dos celdas vecinas están en la misma región si la
+pared que las separa se puede atravesar, según una capa de paredes en
+la que un valor distinto de cero indica que la pared está abierta; así
+se identifican, por ejemplo, las habitaciones cerradas de un mapa.
+
+Las regiones se calculan con una estructura union-find sobre los
+índices lineales de las celdas, en tiempo casi lineal, y quedan en un
+arreglo contiguo con la etiqueta de cada celda:
+
+>>> regiones = Regiones(grilla, pasable="abiertas")
+>>> regiones.etiquetas.reshape(grilla.cant_filas, grilla.cant_columnas)
+
+Cuando se abren paredes las regiones se unen sin volver a calcularlas.
+Cerrar paredes puede partir una región, y en ese caso hay que llamar a
+calcular.
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+from array import array
+from itertools import izip
+
+import almacen
+import capas
+
+class Regiones(object):
+	"""Regiones conexas de las celdas de una grilla"""
+	def __init__(self, grilla, pasable=None, cerradas=None):
+		'''Calcula las regiones de grilla. pasable es una capa de
+		paredes (o su nombre) en la que un valor distinto de cero indica
+		que la pared se puede atravesar; si es None todas las celdas
+		quedan en una misma región. cerradas se puede usar en lugar de
+		pasable con una capa en la que un valor distinto de cero indica
+		que la pared no se puede atravesar (ver caminos.Buscador)'''
+		almacen.requiere_numpy()
+
+		self._grilla = grilla
+		self._pasable = capas.obtener_pasable(grilla, pasable, cerradas)
+
+		self._vecinas = grilla.vecinas_array()
+		self._paredes = grilla.paredes_array()
+
+		self.calcular()
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla de las regiones'''
+		return self._grilla
+
+	@property
+	def etiquetas(self):
+		'''Devuelve un arreglo de numpy con la etiqueta de la región de
+		cada celda, indexado por índice lineal. El arreglo comparte la
+		memoria de las regiones, por lo que refleja las uniones'''
+		numpy = almacen.requiere_numpy()
+		return numpy.frombuffer(self._etiquetas, dtype=self._etiquetas.typecode)
+
+	@property
+	def cantidad(self):
+		'''Devuelve la cantidad de regiones'''
+		return self._cantidad
+
+	def __len__(self):
+		return self._cantidad
+
+	def etiqueta(self, pos):
+		'''Retorna la etiqueta de la región de la celda de pos'''
+		return self._etiquetas[self._grilla.indice_celda(pos)]
+
+	def conectadas(self, pos1, pos2):
+		'''Retorna True si las celdas de pos1 y pos2 están en la misma
+		región'''
+		return self.etiqueta(pos1) == self.etiqueta(pos2)
+
+	def tamano(self, etiqueta):
+		'''Retorna la cantidad de celdas de la región etiqueta, o 0 si
+		la etiqueta ya no se usa porque su región se unió a otra'''
+		return self._tamanos[etiqueta]
+
+	def celdas(self, etiqueta):
+		'''Retorna un iterador con las posiciones de las celdas de la
+		región etiqueta, sin un orden en particular'''
+		primera = self._primeras[etiqueta]
+		if primera < 0:
+			return
+		posicion = self._grilla.posicion_celda
+		i = primera
+		while True:
+			yield posicion(i)
+			i = self._siguientes[i]
+			if i == primera:
+				break
+
+	def calcular(self):
+		'''Vuelve a leer la capa pasable y calcula todas las regiones.
+		Las etiquetas son consecutivas y se numeran en el orden del
+		índice lineal de la primera celda de cada región'''
+		numpy = almacen.requiere_numpy()
+
+		n = self._grilla.rango_celdas
+		padres = array('l', xrange(n))
+		rangos = array('b', [0]) * n
+
+		def raiz(i):
+			while padres[i] != i:
+				padres[i] = padres[padres[i]]  # Compresión por mitades
+				i = padres[i]
+			return i
+
+		# Cada par de vecinas se une una sola vez, desde la celda de
+		# menor índice
+		unir = self._vecinas > numpy.arange(n).reshape(-1, 1)
+		if self._pasable is not None:
+			unir &= self._pasable.datos[self._paredes] != 0
+		celdas, lugares = numpy.nonzero(unir)
+
+		for i, j in izip(almacen.plano(celdas), almacen.plano(self._vecinas[celdas, lugares])):
+			i = raiz(i)
+			j = raiz(j)
+			if i == j:
+				continue
+			if rangos[i] < rangos[j]:  # Unión por rango
+				i, j = j, i
+			padres[j] = i
+			if rangos[i] == rangos[j]:
+				rangos[i] += 1
+
+		# Las celdas de cada región forman una lista circular en
+		# siguientes, que empieza en la primera celda de la región
+		self._etiquetas = etiquetas = array('l', [-1]) * n
+		self._siguientes = siguientes = array('l', xrange(n))
+		self._primeras = primeras = array('l')
+		self._tamanos = tamanos = array('l')
+
+		for i in xrange(n):
+			r = raiz(i)
+			e = etiquetas[r]
+			if e < 0:  # Primera celda de una región nueva
+				e = etiquetas[r] = len(primeras)
+				primeras.append(i)
+				tamanos.append(0)
+			etiquetas[i] = e
+			tamanos[e] += 1
+			if i != primeras[e]:  # Se agrega después de la primera
+				siguientes[i] = siguientes[primeras[e]]
+				siguientes[primeras[e]] = i
+
+		self._cantidad = len(primeras)
+
+	def abrir(self, paredes):
+		'''Une las regiones separadas por las paredes indicadas, que
+		pueden ser posiciones, paredes o índices lineales, después de
+		abrirlas en la capa pasable. Las paredes que la capa indica
+		cerradas se ignoran. Se cambia la etiqueta de las celdas de la
+		región más chica, por lo que cada celda cambia de etiqueta a lo
+		sumo log2(N) veces; la etiqueta de la región más chica deja de
+		usarse'''
+
+		if self._pasable is None:  # Ya están todas unidas
+			return
+
+		grilla = self._grilla
+		etiquetas = self._etiquetas
+		siguientes = self._siguientes
+
+		for pared in paredes:
+			p = self._pasable.indice(pared)
+			if not self._pasable[p]:
+				continue
+
+			celdas = [celda.indice for celda in grilla.get_pared_indice(p).celdas().values() if celda is not None]
+			if len(celdas) < 2:  # La pared es un borde
+				continue
+
+			e1, e2 = etiquetas[celdas[0]], etiquetas[celdas[1]]
+			if e1 == e2:
+				continue
+			if self._tamanos[e1] < self._tamanos[e2]:
+				e1, e2 = e2, e1
+
+			# Se cambian las etiquetas de la región e2 y se empalma su
+			# lista después de la primera celda de e1
+			primera = self._primeras[e2]
+			i = primera
+			while True:
+				etiquetas[i] = e1
+				if siguientes[i] == primera:
+					break
+				i = siguientes[i]
+			cabeza = self._primeras[e1]
+			siguientes[i] = siguientes[cabeza]
+			siguientes[cabeza] = primera
+
+			self._tamanos[e1] += self._tamanos[e2]
+			self._tamanos[e2] = 0
+			self._primeras[e2] = -1
+			self._cantidad -= 1
+
+def regiones(grilla, pasable=None):
+	'''Retorna un arreglo de numpy con la etiqueta de la región de cada
+	celda de grilla, indexado por índice lineal. Ver Regiones para el
+	significado de pasable y para unir regiones al abrir paredes'''
+	return Regiones(grilla, pasable).etiquetas
@@ -0,0 +1,382 @@
+#! /usr/bin/env python
+#-*- coding: UTF-8 -*-
+
+
+'''Módulo para calcular el campo de visión desde una celda de una
+grilla cuadrada o hexagonal. Las paredes son delgadas, entre celdas, y
+una capa de paredes indica cuáles no dejan ver; las celdas no tapan la
+vista. El resultado es un arreglo de numpy de valores booleanos con
+las celdas visibles, indexado por índice lineal:
+
+>>> vision = Vision(grilla, opaca="muros")
+>>> visibles = vision.visibles((10, 10), 50)
+
+En las grillas cuadradas se usa shadowcasting: cada octante se recorre
+por filas desde el observador, manteniendo los intervalos de
+pendientes de los rayos que todavía no cruzaron una pared opaca, y una
+celda es visible si algún rayo de esos intervalos la atraviesa. Se
+recorren solo las celdas alcanzadas por la luz, y las filas que no
+tienen paredes opacas a su alcance, que se detectan con sumas
+acumuladas de la capa, se marcan de una vez sin recorrer sus celdas.
+El radio se mide con la distancia euclídea entre centros.
+
+En las grillas hexagonales una celda es visible si la línea hexagonal
+desde el observador hasta ella (la sucesión de celdas que atraviesa el
+segmento entre los centros) no cruza ninguna pared opaca. Las líneas
+hasta todas las celdas de un radio se calculan una sola vez y se
+guardan como un árbol de prefijos comunes, de modo que cada consulta
+se resuelve con unas pocas operaciones de numpy por nivel del árbol.
+El radio se mide en pasos entre celdas vecinas.
+
+Requiere numpy.
+
+
+Autor: Martín S. López Paglione
+e-mail: martincholp@hotmail.com
+'''
+from array import array
+
+import almacen
+import capas
+import coordenadas
+import exa
+
+# Octantes de las grillas cuadradas: dirección de avance de las filas
+# (profundidad) y dirección lateral dentro de cada fila, como
+# desplazamientos (fila, columna)
+_OCTANTES = (
+	((-1, 0), (0, 1)), ((-1, 0), (0, -1)),
+	((1, 0), (0, 1)), ((1, 0), (0, -1)),
+	((0, 1), (-1, 0)), ((0, 1), (1, 0)),
+	((0, -1), (-1, 0)), ((0, -1), (1, 0)),
+)
+
+# Árboles de líneas hexagonales ya calculados, por radio
+_ARBOLES = {}
+
+class Vision(object):
+	"""Campo de visión sobre las celdas de una grilla"""
+	def __init__(self, grilla, opaca=None):
+		'''Prepara el cálculo de visión en grilla. opaca es una capa de
+		paredes (o su nombre) en la que un valor distinto de cero indica
+		que la pared no deja ver, como la capa de bits de
+		laberintos.generar; si es None todas dejan ver'''
+		almacen.requiere_numpy()
+
+		self._grilla = grilla
+		self._opaca = capas.obtener(grilla, opaca, "pared")
+		self._hexagonal = isinstance(grilla, exa.Grilla)
+		if self._hexagonal:
+			self._paredes = grilla.paredes_array()
+
+		self.actualizar()
+
+	@property
+	def grilla(self):
+		'''Devuelve la grilla del campo de visión'''
+		return self._grilla
+
+	def actualizar(self):
+		'''Vuelve a leer la capa opaca. Se debe llamar después de
+		modificarla para que los cálculos siguientes tengan en cuenta
+		los cambios'''
+		if self._opaca is None:
+			self._opacas = None
+		elif self._hexagonal:
+			self._opacas = self._opaca.datos != 0
+		else:
+			opacas = self._opaca.datos != 0
+			self._opacas = almacen.plano(opacas, 'b')
+
+			# Sumas acumuladas de las paredes opacas de cada plano, a lo
+			# largo de las filas y de las columnas, para saber de una vez
+			# si un tramo de paredes está abierto
+			F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+			N = opacas[:(F+1)*C].reshape(F+1, C)
+			O = opacas[(F+1)*C:].reshape(F, C+1)
+			self._N_filas = _acumular(N, 1)
+			self._N_columnas = _acumular(N, 0)
+			self._O_filas = _acumular(O, 1)
+			self._O_columnas = _acumular(O, 0)
+
+	def visibles(self, pos, radio):
+		'''Retorna un arreglo de numpy de valores booleanos, indexado
+		por índice lineal, que indica las celdas visibles desde la
+		celda de pos hasta la distancia radio. La celda de pos siempre
+		es visible'''
+		numpy = almacen.requiere_numpy()
+
+		grilla = self._grilla
+		res = numpy.zeros(grilla.rango_celdas, dtype=bool)
+		res[grilla.indice_celda(pos)] = True
+		if self._hexagonal:
+			self._lineas(pos, radio, res)
+		else:
+			self._sombras(pos, radio, res)
+		return res
+
+	def celdas(self, pos, radio):
+		'''Retorna una lista con las posiciones de las celdas visibles
+		desde la celda de pos hasta la distancia radio, ordenadas por
+		índice lineal'''
+		numpy = almacen.requiere_numpy()
+		posicion = self._grilla.posicion_celda
+		return [posicion(i) for i in almacen.plano(numpy.flatnonzero(self.visibles(pos, radio)))]
+
+	def _sombras(self, pos, radio, res):
+		'''Marca en res las celdas visibles de una grilla cuadrada, con
+		shadowcasting por octantes'''
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		f0, c0 = pos
+		opacas = self._opacas
+		inicio_O = (F+1)*C
+		radio2 = radio*radio
+
+		def opaca(f, c, df, dc):
+			'''Indica si la pared entre la celda (f, c) y la (f+df, c+dc)
+			no deja ver. Las paredes que dan fuera de la grilla no dejan
+			ver, ya que ningún rayo que sale vuelve a entrar'''
+			f2, c2 = f + df, c + dc
+			if not (0 <= f < F and 0 <= c < C and 0 <= f2 < F and 0 <= c2 < C):
+				return True
+			if opacas is None:
+				return False
+			if df:
+				return opacas[max(f, f2)*C + c]
+			return opacas[inicio_O + f*(C+1) + max(c, c2)]
+
+		def cerrados(fd, cd, pf, pc, lf, lc, primera, ultima_cerca, ultima):
+			'''Cantidad de paredes opacas de la fila cuya celda x = 0 es
+			(fd, cd), entre las cercanas de las celdas primera a
+			ultima_cerca y las laterales de las celdas primera a ultima
+			hacia lf, lc. Retorna None si alguna de esas celdas o la
+			siguiente a ultima está fuera de la grilla'''
+			fa, ca = fd + primera*lf, cd + primera*lc
+			fb, cb = fd + (ultima+1)*lf, cd + (ultima+1)*lc
+			if not (0 <= fa < F and 0 <= ca < C and 0 <= fb < F and 0 <= cb < C):
+				return None
+			if opacas is None:
+				return 0
+			fn, cn = fd + ultima_cerca*lf, cd + ultima_cerca*lc
+			fu, cu = fb - lf, cb - lc
+			if pf:
+				# Cercanas en una fila del plano N, laterales en una fila
+				# del plano O
+				w = fd + (pf < 0)
+				k = lc > 0
+				res = N_filas[w*(C+1) + max(ca, cn)+1] - N_filas[w*(C+1) + min(ca, cn)]
+				return res + O_filas[fd*(C+2) + max(ca, cu)+k+1] - O_filas[fd*(C+2) + min(ca, cu)+k]
+			# Cercanas en una columna del plano O, laterales en una
+			# columna del plano N
+			w = cd + (pc < 0)
+			k = lf > 0
+			res = O_columnas[(max(fa, fn)+1)*(C+1) + w] - O_columnas[min(fa, fn)*(C+1) + w]
+			return res + N_columnas[(max(fa, fu)+k+1)*C + cd] - N_columnas[(min(fa, fu)+k)*C + cd]
+
+		if opacas is not None:
+			N_filas, N_columnas = self._N_filas, self._N_columnas
+			O_filas, O_columnas = self._O_filas, self._O_columnas
+
+		for (pf, pc), (lf, lc) in _OCTANTES:
+			luz = [(0.0, 1.0)]  # Intervalos de pendientes iluminados
+			paso = lf*C + lc  # Diferencia de índice entre celdas de una fila
+			for d in xrange(1, radio+1):
+				cerca, lejos = d - 0.5, d + 0.5
+				ultima = min(d, int((radio2 - d*d) ** 0.5))
+				primera = int(luz[0][0]*cerca + 0.5)
+
+				# Si la fila está dentro de la grilla y no tiene paredes
+				# opacas al alcance de la luz, la luz no cambia y las
+				# celdas visibles de cada intervalo son consecutivas
+				fd, cd = f0 + d*pf, c0 + d*pc
+				ultima_cerca = min(int(luz[-1][1]*cerca + 0.5), ultima)
+				ultima_lejos = min(int(luz[-1][1]*lejos + 0.5), ultima)
+				if primera <= ultima_lejos and cerrados(fd, cd, pf, pc, lf, lc, primera, ultima_cerca, ultima_lejos) == 0:
+					base = fd*C + cd
+					for inicio, fin in luz:
+						# Primera celda con inicio < b y última con fin > a
+						x1 = max(primera, int(inicio*cerca))
+						while x1 > primera and inicio < (x1 - 0.5)/cerca:
+							x1 -= 1
+						while x1 <= ultima_lejos and not inicio < (x1 + 0.5)/cerca:
+							x1 += 1
+						x2 = min(ultima_lejos, int(fin*lejos + 1))
+						while x2 < ultima_lejos and fin > (x2 + 0.5)/lejos:
+							x2 += 1
+						while x2 >= x1 and not fin > (x2 - 0.5)/lejos:
+							x2 -= 1
+						if x1 <= x2:
+							i1, i2 = base + x1*paso, base + x2*paso
+							res[min(i1, i2):max(i1, i2)+1:abs(paso)] = True
+					continue
+
+				# Los rayos entran a la fila cruzando la pared cercana de
+				# alguna celda: las opacas bloquean su intervalo
+				bloqueos = []
+				for x in xrange(primera, ultima_cerca + 1):
+					f, c = f0 + d*pf + x*lf, c0 + d*pc + x*lc
+					if opaca(f - pf, c - pc, pf, pc):
+						bloqueos.append(((x - 0.5)/cerca, (x + 0.5)/cerca))
+				luz = _restar(luz, bloqueos)
+				if not luz:
+					break
+
+				# Una celda es visible si algún rayo entra por su pared
+				# cercana, o por la lateral si está abierta. Las paredes
+				# laterales opacas bloquean los rayos que las cruzan
+				bloqueos = []
+				for x in xrange(primera, min(int(luz[-1][1]*lejos + 0.5), ultima) + 1):
+					f, c = f0 + d*pf + x*lf, c0 + d*pc + x*lc
+					if not (0 <= f < F and 0 <= c < C):
+						continue
+					lateral = x > 0 and not opaca(f, c, -lf, -lc)
+					a = (x - 0.5)/lejos if lateral else (x - 0.5)/cerca
+					b = (x + 0.5)/cerca
+					for inicio, fin in luz:
+						if inicio < b and fin > a:
+							res[f*C + c] = True
+							break
+						if inicio >= b:
+							break
+					if opaca(f, c, lf, lc):
+						bloqueos.append(((x + 0.5)/lejos, (x + 0.5)/cerca))
+				luz = _restar(luz, bloqueos)
+				if not luz:
+					break
+
+	def _lineas(self, pos, radio, res):
+		'''Marca en res las celdas visibles de una grilla hexagonal,
+		recorriendo el árbol de líneas del radio'''
+		numpy = almacen.requiere_numpy()
+
+		F, C = self._grilla.cant_filas, self._grilla.cant_columnas
+		f0, c0 = pos
+		arbol = _arbol(radio)
+		df, dc = arbol.desplazamientos[c0 & 1]
+		f = f0 + df
+		c = c0 + dc
+		dentro = (f >= 0) & (f < F) & (c >= 0) & (c < C)
+		indices = numpy.where(dentro, f*C + c, 0)
+
+		# Un nodo queda tapado si está fuera de la grilla, si la pared
+		# que lo separa de su padre es opaca o si su padre está tapado
+		tapado = ~dentro
+		if self._opacas is not None:
+			paredes = self._paredes[indices[arbol.padres], arbol.direcciones]
+			tapado |= self._opacas[paredes]
+			tapado[0] = False  # El observador no tiene pared de entrada
+		for inicio, fin in arbol.niveles:
+			tapado[inicio:fin] |= tapado[arbol.padres[inicio:fin]]
+
+		destinos = arbol.destinos[~tapado[arbol.destinos]]
+		res[indices[destinos]] = True
+
+class _Arbol(object):
+	"""Árbol de las líneas hexagonales desde una celda hasta todas las
+	celdas de un radio. Cada nodo es una celda de alguna línea, y su
+	padre es la celda anterior de la misma línea; las líneas que
+	empiezan igual comparten los nodos. Los nodos están ordenados por
+	profundidad, y el nodo 0 es el observador"""
+	def __init__(self, radio):
+		numpy = almacen.requiere_numpy()
+
+		nodos = {(0, 0, 0): 0}  # Cubo de cada nodo, por camino
+		cubos = [(0, 0, 0)]
+		padres = array('l', [0])
+		direcciones = array('l', [0])
+		profundidades = array('l', [0])
+		destinos = array('l', [0])
+
+		for x in xrange(-radio, radio+1):
+			for y in xrange(max(-radio, -x-radio), min(radio, -x+radio)+1):
+				if x == 0 and y == 0:
+					continue
+				padre = 0
+				destino = coordenadas.desde_cubo((x, y, -x-y))
+				linea = [coordenadas.a_cubo(pos) for pos in coordenadas.linea((0, 0), destino)]
+				for paso, cubo in enumerate(linea[1:], 1):
+					clave = (padre, cubo)
+					nodo = nodos.get(clave)
+					if nodo is None:
+						nodo = nodos[clave] = len(cubos)
+						anterior = linea[paso-1]
+						cubos.append(cubo)
+						padres.append(padre)
+						direcciones.append(coordenadas.DIRECCIONES.index(tuple(a - b for a, b in zip(cubo, anterior))))
+						profundidades.append(paso)
+					padre = nodo
+				destinos.append(padre)
+
+		# Se ordenan los nodos por profundidad, renumerando los padres
+		orden = numpy.argsort(numpy.frombuffer(profundidades, dtype=profundidades.typecode), kind="mergesort")
+		nuevo = numpy.empty_like(orden)
+		nuevo[orden] = numpy.arange(len(orden))
+		self.padres = nuevo[numpy.frombuffer(padres, dtype=padres.typecode)[orden]]
+		self.direcciones = numpy.frombuffer(direcciones, dtype=direcciones.typecode)[orden]
+		self.destinos = nuevo[numpy.frombuffer(destinos, dtype=destinos.typecode)]
+
+		profundidad = numpy.frombuffer(profundidades, dtype=profundidades.typecode)[orden]
+		limites = numpy.searchsorted(profundidad, numpy.arange(1, radio+2))
+		self.niveles = zip(limites[:-1].tolist(), limites[1:].tolist())
+
+		# Desplazamientos (fila, columna) de cada nodo respecto del
+		# observador, según la paridad de la columna del observador
+		cubos = numpy.array(cubos)[orden]
+		self.desplazamientos = []
+		for paridad in (0, 1):
+			# El observador está en la fila 0 y la columna paridad, cuyo
+			# cubo tiene z = 0
+			c = paridad + cubos[:, 0]
+			f = cubos[:, 2] + (c - (c & 1)) // 2
+			self.desplazamientos.append((f, c - paridad))
+
+def campo_vision(grilla, pos, radio, opaca=None):
+	'''Retorna un arreglo de numpy de valores booleanos con las celdas
+	de grilla visibles desde la celda de pos hasta la distancia radio.
+	Ver Vision'''
+	return Vision(grilla, opaca).visibles(pos, radio)
+
+def _acumular(opacas, eje):
+	'''Retorna un arreglo plano con las sumas acumuladas de la matriz
+	opacas a lo largo de eje, con un cero delante de cada fila (eje 1)
+	o columna (eje 0)'''
+	numpy = almacen.requiere_numpy()
+	forma = list(opacas.shape)
+	forma[eje] += 1
+	res = numpy.zeros(forma, dtype='i')
+	if eje:
+		numpy.cumsum(opacas, axis=1, out=res[:, 1:])
+	else:
+		numpy.cumsum(opacas, axis=0, out=res[1:])
+	return almacen.plano(res, 'i')
+
+def _arbol(radio):
+	'''Retorna el árbol de líneas del radio, calculándolo la primera
+	vez'''
+	arbol = _ARBOLES.get(radio)
+	if arbol is None:
+		arbol = _ARBOLES[radio] = _Arbol(radio)
+	return arbol
+
+def _restar(intervalos, bloqueos):
+	'''Retorna los intervalos ordenados y disjuntos de intervalos menos
+	los de bloqueos, que pueden solaparse'''
+	if not bloqueos:
+		return intervalos
+	bloqueos.sort()
+
+	res = []
+	k = 0
+	for inicio, fin in intervalos:
+		while k < len(bloqueos) and bloqueos[k][1] <= inicio:
+			k += 1
+		j = k
+		while inicio < fin and j < len(bloqueos) and bloqueos[j][0] < fin:
+			a, b = bloqueos[j]
+			if a > inicio:
+				res.append((inicio, a))
+			inicio = max(inicio, b)
+			j += 1
+		if inicio < fin:
+			res.append((inicio, fin))
+	return res